@@ -0,0 +1,134 @@
+# analysis_pool.py
+import gc
+import os
+import logging
+import multiprocessing
+from typing import Any, Dict, List, Optional, Tuple
+
+import spacy
+
+from config import Config
+from tweet_analyzer import TweetAnalyzer
+from tokenized_text import TokenizedText
+from condition_handler import ConditionMatch, evaluate_conditions
+from memory_monitor import process_memory
+
+# Analyseur du processus courant : créé par le parent avant le fork, hérité tel quel par les workers
+_ANALYZER: Optional[TweetAnalyzer] = None
+
+
+def _analyze_tweet(tweet: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[ConditionMatch]]:
+    """Analyse à deux niveaux d'un tweet dans un worker (voir TweetSimulator.process_tweet)"""
+    tokenized = TokenizedText(tweet["text"])
+    condition_match = evaluate_conditions(tokenized)
+    if condition_match is None:
+        return _ANALYZER.extract_rule_features(tweet, tokenized), None
+    return _ANALYZER.extract_keywords(tweet, tokenized), condition_match
+
+
+class AnalysisPool:
+    """
+    Pool de workers préforkés qui partagent le modèle spaCy du parent
+
+    Le parent charge le modèle et les tables compilées du moteur de conditions une
+    seule fois, puis forke les workers : les pages du modèle sont partagées en
+    copie sur écriture au lieu d'être rechargées dans chaque processus. gc.freeze()
+    avant le fork évite que le ramasse-miettes des workers ne recopie ces pages en
+    parcourant les objets hérités.
+
+    Les workers gardent les règles présentes au moment du fork : après un
+    rechargement du fichier des règles, appeler restart().
+    Nécessite le démarrage par fork (Linux, macOS).
+    """
+
+    def __init__(self, config: Config, nlp: Optional[spacy.Language] = None, workers: Optional[int] = None):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.workers = workers or config.ANALYSIS_WORKERS or os.cpu_count() or 1
+
+        global _ANALYZER
+        if _ANALYZER is None or nlp is not None:
+            _ANALYZER = TweetAnalyzer(config, nlp=nlp)
+        self.analyzer = _ANALYZER
+
+        self._context = multiprocessing.get_context("fork")
+        self._pool = None
+        self.start()
+
+    def start(self) -> None:
+        """Forke les workers (sans effet s'ils tournent déjà)"""
+        if self._pool is not None:
+            return
+        # Les objets déjà créés (modèle, règles) ne seront plus parcourus par le GC des workers
+        gc.collect()
+        gc.freeze()
+        self._pool = self._context.Pool(self.workers)
+        self.logger.info(f"Pool d'analyse démarré: {self.workers} workers (pid parent {os.getpid()})")
+
+    def close(self) -> None:
+        """Arrête les workers"""
+        if self._pool is None:
+            return
+        self._pool.close()
+        self._pool.join()
+        self._pool = None
+        gc.unfreeze()
+
+    def restart(self) -> None:
+        """Reforke les workers, par exemple pour qu'ils prennent les règles rechargées"""
+        self.close()
+        self.start()
+
+    def __enter__(self) -> "AnalysisPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def analyze(self, tweets: List[Dict[str, Any]],
+                chunksize: Optional[int] = None) -> List[Tuple[Dict[str, Any], Optional[ConditionMatch]]]:
+        """
+        Analyse des tweets répartie sur les workers
+
+        Chaque tweet passe d'abord par le moteur de conditions ; spaCy ne tourne que pour
+        les tweets éligibles (les autres reçoivent extract_rule_features).
+
+        Args:
+            tweets: Tweets à analyser
+            chunksize: Tweets envoyés à un worker à la fois (défaut: Config.SPACY_BATCH_SIZE)
+
+        Returns:
+            (analyse, ConditionMatch ou None) pour chaque tweet, dans l'ordre des tweets
+        """
+        if self._pool is None:
+            raise RuntimeError("Pool d'analyse arrêté")
+        return self._pool.map(_analyze_tweet, tweets, chunksize or self.config.SPACY_BATCH_SIZE)
+
+    def worker_pids(self) -> List[int]:
+        """Identifiants des workers de ce pool en cours d'exécution (pas ceux d'autres pools du processus)"""
+        if self._pool is None:
+            return []
+        # Processus du pool (multiprocessing.pool.Pool._pool), remplacés par le pool s'ils s'arrêtent
+        return sorted(worker.pid for worker in list(self._pool._pool) if worker.is_alive())
+
+    def memory_report(self) -> Dict[str, Any]:
+        """
+        Mémoire du parent et de chaque worker (voir process_memory)
+
+        "total_pss" est la mémoire réellement occupée par l'ensemble ; tant que les
+        workers partagent le modèle, elle reste bien inférieure à la somme des RSS.
+        """
+        parent = process_memory(os.getpid())
+        workers = [process_memory(pid) for pid in self.worker_pids()]
+        processes = [parent] + workers
+        total_pss = sum(p["pss"] for p in processes) if all(p["pss"] is not None for p in processes) else None
+        total_rss = sum(p["rss"] for p in processes) if all(p["rss"] is not None for p in processes) else None
+        return {"parent": parent, "workers": workers, "total_rss": total_rss, "total_pss": total_pss}
+
+    def log_memory(self) -> None:
+        """Journalise la mémoire par worker"""
+        report = self.memory_report()
+        for process in [report["parent"]] + report["workers"]:
+            self.logger.info(f"Mémoire pid {process['pid']}: RSS {process['rss']} kB, PSS {process['pss']} kB, "
+                             f"partagée {process['shared']} kB, privée {process['private']} kB")
+        self.logger.info(f"Mémoire totale: RSS {report['total_rss']} kB, PSS {report['total_pss']} kB")
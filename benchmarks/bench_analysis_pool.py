@@ -0,0 +1,70 @@
+# bench_analysis_pool.py
+"""
+Benchmark du pool d'analyse préforké (analysis_pool.AnalysisPool)
+
+Pour chaque nombre de workers : débit de l'analyse à deux niveaux et mémoire de chaque
+processus (RSS, PSS, partagée, privée). La mémoire ajoutée au parent par le chargement
+du modèle sert d'estimation de ce que coûterait un modèle chargé dans chaque worker.
+
+Usage:
+    python benchmarks/bench_analysis_pool.py [--count N] [--workers 1,2,4] [--model en_core_web_sm]
+    python benchmarks/bench_analysis_pool.py --model blank:en   # sans modèle installé
+"""
+import os
+import sys
+import time
+import argparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from config import Config
+from analysis_pool import AnalysisPool, _analyze_tweet, process_memory
+from bench_tweet_analyzer import load_model, corpus_tweets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du pool d'analyse préforké")
+    parser.add_argument("--model", default="en_core_web_sm")
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--workers", default="1,2,4")
+    args = parser.parse_args()
+
+    tweets = corpus_tweets(args.count)
+    before = process_memory(os.getpid())["rss"]
+    nlp = load_model(args.model)
+    after = process_memory(os.getpid())["rss"]
+    model_kb = after - before if before is not None and after is not None else None
+
+    pool = AnalysisPool(Config, nlp=nlp, workers=1)
+    pool.close()
+    start = time.perf_counter()
+    for tweet in tweets:
+        _analyze_tweet(tweet)
+    in_process = len(tweets) / (time.perf_counter() - start)
+
+    print(f"Modèle: {args.model}, {len(tweets)} tweets, {os.cpu_count()} CPU, modèle chargé: {model_kb} kB")
+    print(f"Dans le processus: {in_process:,.0f} tweets/s")
+    for workers in (int(value) for value in args.workers.split(",")):
+        pool.workers = workers
+        pool.start()
+        start = time.perf_counter()
+        pool.analyze(tweets)
+        throughput = len(tweets) / (time.perf_counter() - start)
+        report = pool.memory_report()
+        pool.close()
+
+        print(f"\n{workers} workers: {throughput:,.0f} tweets/s (x{throughput / in_process:.1f})")
+        print(f"  {'pid':>8}{'RSS kB':>10}{'PSS kB':>10}{'partagée':>10}{'privée':>10}")
+        for label, process in [("parent", report["parent"])] + [("worker", w) for w in report["workers"]]:
+            print(f"  {process['pid']:>8}{process['rss']:>10}{process['pss']:>10}"
+                  f"{process['shared']:>10}{process['private']:>10}  {label}")
+        print(f"  Total: RSS {report['total_rss']} kB, PSS {report['total_pss']} kB", end="")
+        if model_kb is not None:
+            print(f" (un modèle par worker: ~{report['total_pss'] + workers * model_kb} kB)")
+        else:
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# bench_condition_handler.py
+"""
+Benchmark de condition_handler.extract_ticker_info sur le corpus data/tweets
+
+Compare le débit (tweets/s) de la version courante avec celle d'une révision git
+de référence, et vérifie que les deux versions prennent les mêmes décisions.
+Seules sont admises les différences dues au découpage en mots actuel (tout caractère
+autre qu'une lettre, un chiffre, '_' ou '$' sépare deux mots, voir tokenized_text) :
+la référence prend alors la même décision sur le texte déjà normalisé.
+Mesure aussi le débit de l'évaluation par lots (evaluate_batch).
+
+Usage:
+    python benchmarks/bench_condition_handler.py [--baseline REV] [--repeat N]
+"""
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import subprocess
+import importlib.util
+from typing import List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import condition_handler
+from tokenized_text import normalize_text
+
+
+def load_tweet_texts(data_dir: str) -> List[str]:
+    """Charge le texte de tous les tweets stockés dans data_dir/tweets"""
+    texts = []
+    for tweet_file in sorted(glob.glob(os.path.join(data_dir, "tweets", "*.json"))):
+        with open(tweet_file, "r", encoding="utf-8") as f:
+            texts.append(json.load(f)["text"])
+    return texts
+
+
+def load_baseline_module(revision: str):
+    """Charge condition_handler.py tel qu'il était à une révision git donnée"""
+    source = subprocess.check_output(
+        ["git", "show", f"{revision}:condition_handler.py"], cwd=ROOT_DIR
+    )
+    spec = importlib.util.spec_from_loader("baseline_condition_handler", loader=None)
+    module = importlib.util.module_from_spec(spec)
+    exec(compile(source, f"{revision}:condition_handler.py", "exec"), module.__dict__)
+    return module
+
+
+def root_revision() -> str:
+    """Premier commit du dépôt (version d'origine du moteur de règles)"""
+    output = subprocess.check_output(["git", "rev-list", "--max-parents=0", "HEAD"], cwd=ROOT_DIR)
+    return output.decode().split()[0]
+
+
+def measure(function, texts: List[str], repeat: int) -> float:
+    """Retourne le débit en tweets par seconde"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            function(text)
+    elapsed = time.perf_counter() - start
+    return len(texts) * repeat / elapsed
+
+
+def measure_batch(texts: List[str], repeat: int) -> float:
+    """Retourne le débit de evaluate_batch en tweets par seconde"""
+    start = time.perf_counter()
+    condition_handler.evaluate_batch(texts * repeat)
+    elapsed = time.perf_counter() - start
+    return len(texts) * repeat / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extract_ticker_info")
+    parser.add_argument("--data-dir", default=os.path.join(ROOT_DIR, "data"))
+    parser.add_argument("--baseline", default=None,
+                        help="Révision git de référence (défaut: premier commit)")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    texts = load_tweet_texts(args.data_dir)
+    if not texts:
+        print(f"Aucun tweet trouvé dans {args.data_dir}")
+        return 1
+
+    revision = args.baseline or root_revision()
+    baseline = load_baseline_module(revision)
+
+    # Les deux versions doivent prendre les mêmes décisions, au découpage en mots près :
+    # ':', '#', '’'... séparent désormais les mots ('ELON’S' contient le mot 'elon')
+    differences = []
+    tokenizer_differences = []
+    for text in texts:
+        decision = condition_handler.extract_ticker_info(text)
+        if baseline.extract_ticker_info(text) == decision:
+            continue
+        if baseline.extract_ticker_info(normalize_text(text)) == decision:
+            tokenizer_differences.append(text)
+        else:
+            differences.append(text)
+    # L'évaluation par lots doit donner les mêmes instructions que l'appel unitaire
+    differences += [
+        text for text, result in zip(texts, condition_handler.evaluate_batch(texts))
+        if (result and result[1]) != condition_handler.extract_ticker_info(text)
+    ]
+
+    before = measure(baseline.extract_ticker_info, texts, args.repeat)
+    after = measure(condition_handler.extract_ticker_info, texts, args.repeat)
+    batch = measure_batch(texts, args.repeat)
+
+    print(f"Corpus: {len(texts)} tweets x {args.repeat} répétitions")
+    print(f"Avant ({revision[:7]}): {before:,.0f} tweets/s")
+    print(f"Après (courant): {after:,.0f} tweets/s")
+    print(f"Accélération: x{after / before:.1f}")
+    print(f"Par lots (evaluate_batch): {batch:,.0f} tweets/s")
+
+    if tokenizer_differences:
+        print(f"\n{len(tokenizer_differences)} décisions différentes dues au découpage en mots (attendu):")
+        for text in tokenizer_differences[:10]:
+            print(f"- {text[:80]!r}")
+
+    if differences:
+        print(f"\n{len(differences)} décisions différentes:")
+        for text in differences[:10]:
+            print(f"- {text[:80]!r}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# bench_image_hash.py
+"""
+Benchmark de l'index des hashes perceptuels (image_hash.HammingIndex)
+
+Remplit l'index de N hashes aléatoires sur 64 bits, puis mesure le temps d'une
+recherche (distance <= --distance) pour des variantes proches de hashes indexés
+et pour des hashes inconnus, comparé à une recherche exhaustive sur un échantillon.
+Mesure aussi le calcul du dHash d'une image JPEG.
+
+Usage:
+    python benchmarks/bench_image_hash.py [--sizes 100000,1000000] [--distance 6] [--queries 1000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+import cv2
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from config import Config
+from image_hash import HammingIndex, dhash, hamming
+from golden_corpus import GOLDEN_SYNTHETIC_SEED
+from memory_monitor import process_memory
+
+
+def near(image_hash: int, distance: int, rng: random.Random) -> int:
+    """Hash à distance exacte `distance` de image_hash"""
+    for bit in rng.sample(range(64), distance):
+        image_hash ^= 1 << bit
+    return image_hash
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'index des hashes perceptuels")
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--distance", type=int, default=Config.VISION_NEAR_DUPLICATE_DISTANCE)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+    rng = random.Random(GOLDEN_SYNTHETIC_SEED)
+
+    image = np.random.default_rng(GOLDEN_SYNTHETIC_SEED).integers(0, 255, (1080, 1920, 3), dtype=np.uint8)
+    content = cv2.imencode(".jpg", image)[1].tobytes()
+    start = time.perf_counter()
+    for _ in range(20):
+        dhash(content)
+    print(f"dHash d'un JPEG 1920x1080: {(time.perf_counter() - start) / 20 * 1000:.1f} ms")
+
+    print(f"{'hashes':>10}{'construction (s)':>18}{'RSS (MB)':>10}{'proches (µs)':>14}"
+          f"{'inconnus (µs)':>15}{'exhaustive (µs)':>17}{'rappel':>8}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        hashes = [rng.getrandbits(64) for _ in range(size)]
+        start = time.perf_counter()
+        index = HammingIndex()
+        index.update((image_hash, item_id) for item_id, image_hash in enumerate(hashes))
+        build_s = time.perf_counter() - start
+        rss_mb = process_memory()["rss"] / 1024
+
+        targets = rng.sample(range(size), args.queries)
+        queries = [near(hashes[target], rng.randint(0, args.distance), rng) for target in targets]
+        start = time.perf_counter()
+        found = sum(any(item_id == target for _, item_id in index.search(query, args.distance))
+                    for query, target in zip(queries, targets))
+        near_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+        unknown = [rng.getrandbits(64) for _ in range(args.queries)]
+        start = time.perf_counter()
+        for query in unknown:
+            index.search(query, args.distance)
+        unknown_us = (time.perf_counter() - start) / len(unknown) * 1e6
+
+        # Recherche exhaustive, sur quelques requêtes seulement
+        start = time.perf_counter()
+        for query in queries[:5]:
+            [item_id for item_id, image_hash in enumerate(hashes) if hamming(query, image_hash) <= args.distance]
+        brute_us = (time.perf_counter() - start) / 5 * 1e6
+
+        print(f"{size:>10}{build_s:>18.1f}{rss_mb:>10.0f}{near_us:>14.1f}{unknown_us:>15.1f}"
+              f"{brute_us:>17.0f}{found / len(queries):>8.0%}")
+        del index, hashes
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# bench_prompt_instructions.py
+"""
+Benchmark de condition_handler.get_prompt_instructions sur des tweets avec médias
+
+Utilise les tweets du corpus accompagnés d'une analyse de média, complétés par des
+tweets synthétiques avec médias (voir golden_corpus.py). Compare le débit avec
+celui d'une révision git de référence et vérifie que les formats produits
+(ticker_format, name_format, examples) sont identiques.
+
+base_instruction n'est pas comparé : il reprend extract_ticker_info, dont seules
+les expressions de plusieurs mots ont changé depuis la version d'origine
+(vérifié séparément par golden_corpus.py).
+
+Usage:
+    python benchmarks/bench_prompt_instructions.py [--baseline REV] [--count N] [--repeat N]
+"""
+import os
+import sys
+import time
+import argparse
+from typing import Any, Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import condition_handler
+from bench_condition_handler import load_baseline_module, root_revision
+from golden_corpus import load_corpus, synthetic_corpus
+
+FORMAT_FIELDS = ("ticker_format", "name_format", "examples")
+
+
+def media_records(count: int) -> List[Dict[str, Any]]:
+    """Tweets du corpus avec média, complétés par des tweets synthétiques avec média"""
+    corpus = [record for record in load_corpus() if record["media_analysis"]]
+    synthetic = []
+    seed = 0
+    while len(corpus) + len(synthetic) < count:
+        synthetic += [record for record in synthetic_corpus(corpus, count, seed) if record["media_analysis"]]
+        seed += 1
+    return (corpus + synthetic)[:count]
+
+
+def measure(functions: List, records: List[Dict[str, Any]], repeat: int) -> List[float]:
+    """
+    Retourne le débit (appels par seconde) de chaque fonction, meilleur des `repeat` passages
+
+    Les passages des différentes fonctions sont alternés pour que l'ordre de mesure
+    (mise en route de l'allocateur, fréquence du processeur) ne favorise aucune version.
+    """
+    best = [None] * len(functions)
+    for _ in range(repeat):
+        for index, function in enumerate(functions):
+            start = time.perf_counter()
+            for record in records:
+                function(record["text"], record["media_analysis"])
+            elapsed = time.perf_counter() - start
+            best[index] = elapsed if best[index] is None else min(best[index], elapsed)
+    return [len(records) / elapsed for elapsed in best]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de get_prompt_instructions (tweets avec médias)")
+    parser.add_argument("--baseline", default=None,
+                        help="Révision git de référence (défaut: premier commit)")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    revision = args.baseline or root_revision()
+    baseline = load_baseline_module(revision)
+
+    # Mesurer le calcul lui-même, pas le cache des conditions
+    if hasattr(baseline, "RULE_CACHE"):
+        baseline.RULE_CACHE.max_size = 0
+    condition_handler.RULE_CACHE.max_size = 0
+    condition_handler.RULE_CACHE.clear()
+
+    records = media_records(args.count)
+
+    differences = []
+    for record in records:
+        before = baseline.get_prompt_instructions(record["text"], record["media_analysis"])
+        after = condition_handler.get_prompt_instructions(record["text"], record["media_analysis"])
+        if any(before[field] != after[field] for field in FORMAT_FIELDS):
+            differences.append(record["id"])
+
+    before, after = measure(
+        [baseline.get_prompt_instructions, condition_handler.get_prompt_instructions], records, args.repeat)
+
+    print(f"Tweets avec médias: {len(records)} (meilleur de {args.repeat} passages)")
+    print(f"Avant ({revision[:7]}): {before:,.0f} appels/s")
+    print(f"Après (courant): {after:,.0f} appels/s")
+    print(f"Accélération: x{after / before:.1f}")
+
+    if differences:
+        print(f"\n{len(differences)} formats différents:")
+        for record_id in differences[:10]:
+            print(f"- {record_id}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
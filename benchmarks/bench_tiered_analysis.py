@@ -0,0 +1,82 @@
+# bench_tiered_analysis.py
+"""
+Benchmark de l'analyse à deux niveaux du simulateur
+
+Avant : extract_keywords (spaCy complet) puis le moteur de conditions, pour chaque tweet.
+Après : le moteur de conditions d'abord ; les tweets rejetés n'ont que l'analyse légère
+(extract_rule_features), spaCy ne tourne que pour les tweets éligibles.
+Affiche le coût médian et p99 par tweet, séparément pour les tweets rejetés et éligibles.
+
+Usage:
+    python benchmarks/bench_tiered_analysis.py [--count N] [--model en_core_web_sm]
+    python benchmarks/bench_tiered_analysis.py --model blank:en   # sans modèle installé
+"""
+import os
+import sys
+import time
+import argparse
+from typing import Any, Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from config import Config
+from tweet_analyzer import TweetAnalyzer
+from tokenized_text import TokenizedText
+from condition_handler import RULE_CACHE, evaluate_conditions
+from golden_corpus import percentile
+from bench_tweet_analyzer import load_model, corpus_tweets
+
+
+def single_tier(analyzer: TweetAnalyzer, tweet: Dict[str, Any]) -> bool:
+    """Ancien ordre : spaCy pour tous les tweets, puis les conditions"""
+    tokenized = TokenizedText(tweet["text"])
+    analyzer.extract_keywords(tweet, tokenized)
+    return evaluate_conditions(tokenized) is not None
+
+
+def two_tiers(analyzer: TweetAnalyzer, tweet: Dict[str, Any]) -> bool:
+    """Nouvel ordre : les conditions, puis spaCy seulement si le tweet est éligible"""
+    tokenized = TokenizedText(tweet["text"])
+    if evaluate_conditions(tokenized) is None:
+        analyzer.extract_rule_features(tweet, tokenized)
+        return False
+    analyzer.extract_keywords(tweet, tokenized)
+    return True
+
+
+def measure(step, analyzer: TweetAnalyzer, tweets: List[Dict[str, Any]]) -> Dict[bool, List[int]]:
+    """Durées (ns) par tweet, regroupées par décision d'éligibilité"""
+    timings = {False: [], True: []}
+    for tweet in tweets:
+        start = time.perf_counter_ns()
+        eligible = step(analyzer, tweet)
+        timings[eligible].append(time.perf_counter_ns() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'analyse à deux niveaux")
+    parser.add_argument("--model", default="en_core_web_sm")
+    parser.add_argument("--count", type=int, default=5000)
+    args = parser.parse_args()
+
+    analyzer = TweetAnalyzer(Config, nlp=load_model(args.model))
+    tweets = corpus_tweets(args.count)
+    measure(two_tiers, analyzer, tweets[:200])  # Mise en route
+
+    print(f"Modèle: {args.model} ({', '.join(analyzer.nlp.pipe_names) or 'aucun composant'}), {len(tweets)} tweets")
+    print(f"{'':<32}{'tweets':>8}{'médiane (µs)':>14}{'p99 (µs)':>12}{'total (s)':>11}")
+    for name, step in (("spaCy puis règles", single_tier), ("règles puis spaCy", two_tiers)):
+        RULE_CACHE.clear()  # Même point de départ pour les deux ordres
+        timings = measure(step, analyzer, tweets)
+        for eligible, label in ((False, "rejetés"), (True, "éligibles")):
+            values = sorted(timings[eligible])
+            if not values:
+                continue
+            print(f"{name + ' / ' + label:<32}{len(values):>8}{percentile(values, 0.5) / 1000:>14.1f}"
+                  f"{percentile(values, 0.99) / 1000:>12.1f}{sum(values) / 1e9:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
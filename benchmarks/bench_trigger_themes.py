@@ -0,0 +1,141 @@
+# bench_trigger_themes.py
+"""
+Benchmark de la détection des thèmes (condition_handler.detect_trigger_themes)
+
+Compare l'automate compilé des règles (un passage, frontières de mots) à l'ancienne
+boucle sur chaque mot-clé de TRIGGER_THEMES (recherche de sous-chaîne), avec les
+mots-clés actuels puis 10x et 100x plus de mots-clés. Les mots-clés ajoutés sont
+tirés du vocabulaire du corpus (pour garder des correspondances réalistes) et
+complétés par des pseudo-mots.
+
+Les écarts sont comptés par mot-clé trouvé dans un texte, par rapport à une
+référence indépendante du découpage : le mot-clé apparaît entouré de caractères
+qui ne sont ni des lettres, ni des chiffres, ni '$' (un cashtag n'est pas le mot).
+- faux positifs des sous-chaînes : mot-clé trouvé au milieu d'un mot ('war' dans 'award')
+- faux négatifs de l'automate : occurrence de la référence que l'automate ne trouve pas
+- faux positifs de l'automate : mot-clé trouvé par l'automate mais absent de la référence
+
+Usage:
+    python benchmarks/bench_trigger_themes.py [--count N] [--scales 1,10,100]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+from typing import Dict, List, Set, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from config import Config
+from condition_handler import RuleSet, detect_trigger_themes
+from golden_corpus import GOLDEN_SYNTHETIC_SEED, load_corpus, synthetic_corpus
+
+
+def substring_themes(text: str, trigger_themes: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Ancienne détection : chaque mot-clé cherché comme sous-chaîne du texte"""
+    text_lower = text.lower()
+    detected_themes = {}
+    for theme, keywords in trigger_themes.items():
+        matches = [keyword for keyword in keywords if keyword.lower() in text_lower]
+        if matches:
+            detected_themes[theme] = matches
+    return detected_themes
+
+
+_WORD_PATTERNS: Dict[str, "re.Pattern"] = {}
+
+
+def whole_word(keyword: str, text_lower: str) -> bool:
+    """Référence : le mot-clé apparaît dans le texte sans lettre, chiffre ni '$' de part et d'autre"""
+    pattern = _WORD_PATTERNS.get(keyword)
+    if pattern is None:
+        body = r"\s+".join(re.escape(word) for word in keyword.split())
+        pattern = _WORD_PATTERNS[keyword] = re.compile(r"(?<![\w$])" + body + r"(?![\w$])")
+    return pattern.search(text_lower) is not None
+
+
+def keyword_set(themes: Dict[str, List[str]]) -> Set[Tuple[str, str]]:
+    """Paires (thème, mot-clé en minuscules) d'un résultat de détection"""
+    return {(theme, keyword.lower()) for theme, keywords in themes.items() for keyword in keywords}
+
+
+def classify(text: str, themes: Dict[str, List[str]], rules: RuleSet) -> Tuple[int, int, int]:
+    """
+    Écarts des deux détections par rapport à la référence (voir whole_word)
+
+    Returns:
+        (faux positifs des sous-chaînes, faux négatifs de l'automate, faux positifs de l'automate)
+    """
+    text_lower = text.lower()
+    substring = keyword_set(substring_themes(text, themes))
+    index = keyword_set(detect_trigger_themes(text, rules))
+    # Toute occurrence de la référence est aussi une sous-chaîne : seuls ces mots-clés sont vérifiés
+    expected = {pair for pair in substring | index if whole_word(pair[1], text_lower)}
+    return len(substring - expected), len(expected - index), len(index - expected)
+
+
+def scaled_themes(scale: int, vocabulary: List[str], rng: random.Random) -> Dict[str, List[str]]:
+    """TRIGGER_THEMES avec scale fois plus de mots-clés par thème"""
+    existing = {keyword.lower() for keywords in Config.TRIGGER_THEMES.values() for keyword in keywords}
+    # Mots du corpus faits de lettres et de chiffres ('&', '—' ou 'all,”' ne sont pas des mots-clés)
+    candidates = [word for word in vocabulary if word not in existing and re.fullmatch(r"\w+", word)]
+    rng.shuffle(candidates)
+    themes = {}
+    for theme, keywords in Config.TRIGGER_THEMES.items():
+        extra = []
+        for _ in range(len(keywords) * (scale - 1)):
+            if candidates and rng.random() < 0.5:
+                extra.append(candidates.pop())
+            else:
+                extra.append("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 10))))
+        themes[theme] = list(keywords) + extra
+    return themes
+
+
+def measure(function, texts: List[str]) -> float:
+    """Durée moyenne par texte, en µs"""
+    start = time.perf_counter()
+    for text in texts:
+        function(text)
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de detect_trigger_themes")
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--scales", default="1,10,100")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    records = [record for record in corpus if record["text"]]
+    records += synthetic_corpus(corpus, args.count, GOLDEN_SYNTHETIC_SEED)
+    texts = [record["text"] for record in records if record["text"]][:args.count]
+    vocabulary = sorted({word.strip(".,!?:;\"'()").lower() for text in texts for word in text.split()} - {""})
+    rng = random.Random(GOLDEN_SYNTHETIC_SEED)
+
+    print(f"{len(texts)} textes")
+    print(f"{'échelle':>8}{'mots-clés':>11}{'compilation (ms)':>18}{'sous-chaînes (µs)':>19}"
+          f"{'automate (µs)':>15}{'gain':>8}{'FP sous-ch.':>13}{'FN automate':>13}{'FP automate':>13}")
+    for scale in (int(value) for value in args.scales.split(",")):
+        themes = Config.TRIGGER_THEMES if scale == 1 else scaled_themes(scale, vocabulary, rng)
+        keyword_count = sum(len(keywords) for keywords in themes.values())
+
+        start = time.perf_counter()
+        rules = RuleSet.from_file(Config.CONDITION_RULES_FILE, trigger_themes=themes)
+        rules.matcher.build()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        substring_us = measure(lambda text: substring_themes(text, themes), texts)
+        index_us = measure(lambda text: detect_trigger_themes(text, rules), texts)
+        substring_fp, index_fn, index_fp = (sum(counts) for counts in
+                                            zip(*(classify(text, themes, rules) for text in texts)))
+        print(f"{scale:>7}x{keyword_count:>11}{build_ms:>18.1f}{substring_us:>19.1f}"
+              f"{index_us:>15.1f}{f'x{substring_us / index_us:.1f}':>8}"
+              f"{substring_fp:>13}{index_fn:>13}{index_fp:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# bench_tweet_analyzer.py
+"""
+Benchmark de TweetAnalyzer.extract_keywords_batch (nlp.pipe) face à extract_keywords
+
+Analyse les tweets du corpus (complétés par des tweets synthétiques, voir golden_corpus.py)
+un par un puis par lots, pour chaque taille de lot et nombre de processus demandés.
+Vérifie que chaque analyse est identique octet pour octet (JSON) à celle de extract_keywords
+et affiche le débit en tweets par seconde.
+
+Usage:
+    python benchmarks/bench_tweet_analyzer.py [--count N] [--batch-sizes 1,16,64,256] [--processes 1,2,4]
+    python benchmarks/bench_tweet_analyzer.py --model blank:en   # sans modèle installé
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Any, Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import spacy
+
+from config import Config
+from tweet_analyzer import TweetAnalyzer
+from golden_corpus import GOLDEN_SYNTHETIC_SEED, load_corpus, synthetic_corpus
+
+
+def load_model(name: str) -> spacy.Language:
+    """Charge un modèle spaCy ; 'blank:LANG' crée un pipeline vide (tokenisation seule)"""
+    if name.startswith("blank:"):
+        return spacy.blank(name.split(":", 1)[1])
+    return spacy.load(name)
+
+
+def corpus_tweets(count: int) -> List[Dict[str, Any]]:
+    """Tweets du corpus complétés par des tweets synthétiques (textes non vides)"""
+    corpus = load_corpus()
+    records = [record for record in corpus if record["text"]]
+    records += [record for record in synthetic_corpus(corpus, count, GOLDEN_SYNTHETIC_SEED) if record["text"]]
+    return [{"id": record["id"], "text": record["text"]} for record in records[:count]]
+
+
+def encode(analyses: List[Dict[str, Any]]) -> List[bytes]:
+    """Sérialisation JSON de chaque analyse (comparaison octet pour octet)"""
+    return [json.dumps(analysis, ensure_ascii=False).encode("utf-8") for analysis in analyses]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extract_keywords_batch")
+    parser.add_argument("--model", default="en_core_web_sm")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--batch-sizes", default="1,16,64,256")
+    parser.add_argument("--processes", default="1,2,4")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    analyzer = TweetAnalyzer(Config, nlp=load_model(args.model))
+    tweets = corpus_tweets(args.count)
+    batch_sizes = [int(value) for value in args.batch_sizes.split(",")]
+    processes = [int(value) for value in args.processes.split(",")]
+
+    # Mise en route (chargement paresseux des tables, allocations)
+    analyzer.extract_keywords_batch(tweets[:100], batch_size=32, n_process=1)
+
+    best = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        reference = [analyzer.extract_keywords(tweet) for tweet in tweets]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    expected = encode(reference)
+    single = len(tweets) / best
+
+    print(f"Modèle: {args.model}, {len(tweets)} tweets, {os.cpu_count()} CPU (meilleur de {args.repeat} passages)")
+    print(f"{'n_process':>10}{'batch_size':>12}{'tweets/s':>12}{'vs 1 par 1':>12}  identique")
+    print(f"{'-':>10}{'-':>12}{single:>12,.0f}{'x1.0':>12}  oui")
+
+    failures = 0
+    for n_process in processes:
+        for batch_size in batch_sizes:
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                analyses = analyzer.extract_keywords_batch(tweets, batch_size=batch_size, n_process=n_process)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            identical = encode(analyses) == expected
+            failures += not identical
+            throughput = len(tweets) / best
+            print(f"{n_process:>10}{batch_size:>12}{throughput:>12,.0f}{f'x{throughput / single:.1f}':>12}"
+                  f"  {'oui' if identical else 'NON'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
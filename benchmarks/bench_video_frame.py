@@ -0,0 +1,148 @@
+# bench_video_frame.py
+"""
+Benchmark de l'extraction de la première frame des vidéos (MediaAnalyzer.extract_first_frame)
+
+Génère des vidéos MP4 de plusieurs durées, les sert en local avec un débit limité
+(--bandwidth, pour simuler le réseau) et compare l'ancienne méthode (téléchargement
+complet dans un fichier temporaire, frame écrite puis relue sur disque) à la lecture
+par requêtes Range : durée et octets téléchargés par vidéo.
+
+Usage:
+    python benchmarks/bench_video_frame.py [--durations 5,60,300] [--bandwidth 20] [--repeat 3]
+"""
+import os
+import re
+import sys
+import time
+import base64
+import tempfile
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from config import Config
+from media_analyzer import MediaAnalyzer
+from video_stream import RangedHttpStream, read_first_frame
+from golden_corpus import GOLDEN_SYNTHETIC_SEED
+
+
+class ThrottledHandler(BaseHTTPRequestHandler):
+    """Fichiers du répertoire du serveur, avec requêtes Range, au débit server.bandwidth (octets/s)"""
+
+    def do_GET(self):
+        path = os.path.join(self.server.directory, self.path.lstrip("/"))
+        size = os.path.getsize(path)
+        match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        with open(path, "rb") as f:
+            if match:
+                start, end = int(match.group(1)), min(int(match.group(2)), size - 1)
+                f.seek(start)
+                data = f.read(end - start + 1)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                data = f.read()
+                self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        chunk = 64 * 1024
+        try:
+            for offset in range(0, len(data), chunk):
+                self.wfile.write(data[offset:offset + chunk])
+                time.sleep(len(data[offset:offset + chunk]) / self.server.bandwidth)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def write_video(path: str, seconds: int) -> None:
+    """Vidéo 640x360 à 25 images/s : dégradé animé et bruit (débit proche d'un clip réel)"""
+    rng = np.random.default_rng(GOLDEN_SYNTHETIC_SEED)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 25, (640, 360))
+    gradient = np.tile(np.linspace(0, 255, 640, dtype=np.uint8), (360, 1))
+    noise = rng.integers(0, 40, (8, 360, 640), dtype=np.uint8)
+    for index in range(seconds * 25):
+        frame = np.roll(gradient, index * 4, axis=1) + noise[index % len(noise)]
+        writer.write(cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR))
+    writer.release()
+
+
+def full_download_first_frame(video_url: str) -> str:
+    """Ancienne extraction : vidéo entière sur disque, frame écrite en JPEG puis relue en base64"""
+    temp_dir = tempfile.mkdtemp()
+    video_path = os.path.join(temp_dir, "temp_video.mp4")
+    with requests.get(video_url, stream=True) as response:
+        response.raise_for_status()
+        with open(video_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=8192):
+                f.write(chunk)
+    capture = cv2.VideoCapture(video_path)
+    ok, frame = capture.read()
+    capture.release()
+    frame_path = os.path.join(temp_dir, "first_frame.jpg")
+    cv2.imwrite(frame_path, frame)
+    with open(frame_path, "rb") as f:
+        encoded = base64.b64encode(f.read()).decode("utf-8")
+    os.remove(frame_path)
+    os.remove(video_path)
+    os.rmdir(temp_dir)
+    return encoded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'extraction de la première frame")
+    parser.add_argument("--durations", default="5,60,300", help="Durées des vidéos (secondes)")
+    parser.add_argument("--bandwidth", type=float, default=20, help="Débit du serveur local (Mo/s)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ThrottledHandler)
+    server.directory = directory
+    server.bandwidth = args.bandwidth * 1024 * 1024
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    Config.OPENAI_API_KEY = Config.OPENAI_API_KEY or "benchmark"
+    analyzer = MediaAnalyzer(Config)
+    print(f"Débit {args.bandwidth} Mo/s, VIDEO_FETCH_BLOCK_BYTES={Config.VIDEO_FETCH_BLOCK_BYTES}")
+    print(f"{'durée (s)':>10}{'taille (Mo)':>13}{'complet (s)':>13}{'Range (s)':>11}{'gain':>8}"
+          f"{'téléchargé (Ko)':>17}{'requêtes':>10}")
+    for seconds in (int(value) for value in args.durations.split(",")):
+        name = f"video_{seconds}s.mp4"
+        write_video(os.path.join(directory, name), seconds)
+        size_mb = os.path.getsize(os.path.join(directory, name)) / 1024 / 1024
+        url = f"{base_url}/{name}"
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            full_download_first_frame(url)
+        full_s = (time.perf_counter() - start) / args.repeat
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            frame = analyzer.extract_first_frame(url)
+            assert frame, "Extraction échouée"
+            base64.b64encode(frame)
+        ranged_s = (time.perf_counter() - start) / args.repeat
+
+        with RangedHttpStream(url, max_bytes=Config.VIDEO_MAX_FETCH_BYTES,
+                              block_size=Config.VIDEO_FETCH_BLOCK_BYTES) as stream:
+            read_first_frame(stream)
+        print(f"{seconds:>10}{size_mb:>13.1f}{full_s:>13.2f}{ranged_s:>11.3f}{f'x{full_s / ranged_s:.0f}':>8}"
+              f"{stream.bytes_fetched / 1024:>17.0f}{stream.requests:>10}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# bench_video_keyframes.py
+"""
+Benchmark des planches contact de scènes (MediaAnalyzer.extract_contact_sheet)
+
+Génère une vidéo de plusieurs scènes, la sert en local avec un débit limité et compare,
+jusqu'à l'appel Vision (client factice) : la première frame seule, une analyse par
+scène (un appel chacune) et la planche contact (un seul appel). Affiche le nombre de
+scènes retrouvées, d'appels Vision, la durée, les octets téléchargés et envoyés.
+
+Usage:
+    python benchmarks/bench_video_keyframes.py [--scenes 6] [--scene-seconds 10] [--bandwidth 20]
+"""
+import os
+import sys
+import time
+import base64
+import tempfile
+import argparse
+import threading
+from http.server import ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from config import Config
+from media_analyzer import MediaAnalyzer
+from video_stream import RangedHttpStream, sample_keyframes
+from golden_corpus import GOLDEN_SYNTHETIC_SEED
+from bench_video_thumbnail import CountingHandler, RecordingClient
+
+
+def write_scenes(path: str, scenes: int, seconds: int) -> None:
+    """Vidéo 640x360 à 25 images/s : scènes de disques colorés, en mouvement à l'intérieur de chaque scène"""
+    rng = np.random.default_rng(GOLDEN_SYNTHETIC_SEED)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 25, (640, 360))
+    for _ in range(scenes):
+        background = np.zeros((360, 640, 3), np.uint8)
+        for _ in range(8):
+            color = tuple(int(value) for value in rng.integers(0, 255, 3))
+            center = (int(rng.integers(0, 640)), int(rng.integers(0, 360)))
+            cv2.circle(background, center, int(rng.integers(30, 120)), color, -1)
+        for index in range(seconds * 25):
+            writer.write(np.roll(background, index * 2, axis=1))
+    writer.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des planches contact de scènes")
+    parser.add_argument("--scenes", type=int, default=6)
+    parser.add_argument("--scene-seconds", type=int, default=10)
+    parser.add_argument("--bandwidth", type=float, default=20, help="Débit du serveur local (Mo/s)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    write_scenes(os.path.join(directory, "scenes.mp4"), args.scenes, args.scene_seconds)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    server.directory = directory
+    server.bandwidth = args.bandwidth * 1024 * 1024
+    server.bytes_sent = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    video_url = f"http://127.0.0.1:{server.server_address[1]}/scenes.mp4"
+    Config.OPENAI_API_KEY = Config.OPENAI_API_KEY or "benchmark"
+
+    def per_scene(analyzer):
+        # Une analyse par scène : autant d'appels Vision que de frames
+        with RangedHttpStream(video_url, max_bytes=Config.VIDEO_KEYFRAMES_MAX_FETCH_BYTES,
+                              block_size=Config.VIDEO_FETCH_BLOCK_BYTES) as stream:
+            frames = sample_keyframes(stream, Config.VIDEO_KEYFRAMES, candidates=Config.VIDEO_KEYFRAME_CANDIDATES,
+                                      threshold=Config.VIDEO_SCENE_CHANGE_THRESHOLD)
+        for _, frame in frames:
+            encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, Config.VIDEO_FRAME_JPEG_QUALITY])[1]
+            analyzer.analyze_image("data:image/jpeg;base64," + base64.b64encode(encoded.tobytes()).decode())
+        return len(frames)
+
+    size_mb = os.path.getsize(os.path.join(directory, "scenes.mp4")) / 1024 / 1024
+    print(f"{args.scenes} scènes de {args.scene_seconds} s ({size_mb:.1f} Mo), débit {args.bandwidth} Mo/s, "
+          f"VIDEO_KEYFRAMES={Config.VIDEO_KEYFRAMES}, VIDEO_KEYFRAME_CANDIDATES={Config.VIDEO_KEYFRAME_CANDIDATES}")
+    print(f"{'variante':<24}{'frames':>8}{'appels':>8}{'durée (ms)':>12}{'téléchargé (Ko)':>17}{'requêtes (Ko)':>15}")
+    for name, keyframes, analyze in (
+            ("première frame", 1, lambda analyzer: analyzer.process_video(video_url) and 1),
+            ("une analyse par scène", Config.VIDEO_KEYFRAMES, per_scene),
+            ("planche contact", Config.VIDEO_KEYFRAMES, None)):
+        Config.VIDEO_KEYFRAMES = keyframes
+        analyzer = MediaAnalyzer(Config)
+        analyzer.client = RecordingClient()
+        server.bytes_sent = 0
+        start = time.perf_counter()
+        if analyze is None:
+            sheet, frame_count = analyzer.extract_contact_sheet(video_url)
+            analyzer.analyze_image("data:image/jpeg;base64," + base64.b64encode(sheet).decode())
+        else:
+            frame_count = analyze(analyzer)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"{name:<24}{frame_count:>8}{len(analyzer.client.image_urls):>8}{elapsed_ms:>12.0f}"
+              f"{server.bytes_sent / 1024:>17.0f}{analyzer.client.request_bytes / 1024:>15.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# bench_video_thumbnail.py
+"""
+Benchmark de l'analyse des vidéos : vignette Twitter (preview_image_url) ou décodage de la vidéo
+
+Sert en local, avec un débit limité, une vidéo MP4 et sa vignette JPEG (la première
+frame, comme '…/ext_tw_video_thumb/…'), puis mesure pour MediaAnalyzer.process_video
+le temps jusqu'à l'appel Vision (client factice, sans réseau) et les octets transférés :
+téléchargés par l'analyseur, envoyés dans la requête Vision, et téléchargés par l'API
+elle-même (l'URL de la vignette lui est transmise telle quelle).
+
+Variantes : vignette ; vignette avec cache Vision (contenu téléchargé pour son
+empreinte) ; première frame par requêtes Range (recours sans vignette) ; ancienne
+méthode (vidéo téléchargée en entier).
+
+Usage:
+    python benchmarks/bench_video_thumbnail.py [--seconds 30] [--bandwidth 20] [--repeat 5]
+"""
+import os
+import re
+import sys
+import json
+import time
+import tempfile
+import argparse
+import threading
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from config import Config
+from media_analyzer import MediaAnalyzer
+from vision_cache import VisionCache
+from bench_video_frame import full_download_first_frame, write_video
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    """Fichiers du répertoire du serveur (requêtes Range), au débit server.bandwidth ; compte les octets servis"""
+
+    def do_GET(self):
+        path = os.path.join(self.server.directory, self.path.lstrip("/"))
+        size = os.path.getsize(path)
+        match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        with open(path, "rb") as f:
+            if match:
+                start, end = int(match.group(1)), min(int(match.group(2)), size - 1)
+                f.seek(start)
+                data = f.read(end - start + 1)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                data = f.read()
+                self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        chunk = 64 * 1024
+        try:
+            for offset in range(0, len(data), chunk):
+                self.wfile.write(data[offset:offset + chunk])
+                self.server.bytes_sent += len(data[offset:offset + chunk])
+                time.sleep(len(data[offset:offset + chunk]) / self.server.bandwidth)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class RecordingClient:
+    """Client OpenAI factice : enregistre la taille des requêtes Vision et l'URL d'image transmise"""
+
+    def __init__(self):
+        self.request_bytes = 0
+        self.image_urls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.request_bytes += len(json.dumps(kwargs["messages"]))
+        for part in kwargs["messages"][0]["content"]:
+            if part["type"] == "image_url":
+                self.image_urls.append(part["image_url"]["url"])
+        content = json.dumps({"description": "benchmark", "subjects": [], "is_meme": False})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vignette Twitter / décodage de la vidéo")
+    parser.add_argument("--seconds", type=int, default=30, help="Durée de la vidéo")
+    parser.add_argument("--bandwidth", type=float, default=20, help="Débit du serveur local (Mo/s)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    video_path = os.path.join(directory, "video.mp4")
+    write_video(video_path, args.seconds)
+    capture = cv2.VideoCapture(video_path)
+    _, frame = capture.read()
+    capture.release()
+    cv2.imwrite(os.path.join(directory, "thumbnail.jpg"), frame)
+    thumbnail_size = os.path.getsize(os.path.join(directory, "thumbnail.jpg"))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    server.directory = directory
+    server.bandwidth = args.bandwidth * 1024 * 1024
+    server.bytes_sent = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    video_url, thumbnail_url = f"{base_url}/video.mp4", f"{base_url}/thumbnail.jpg"
+
+    Config.OPENAI_API_KEY = Config.OPENAI_API_KEY or "benchmark"
+    Config.VISION_NEAR_DUPLICATE_DISTANCE = -1
+
+    def run(name, analyze, api_fetch):
+        analyzer = MediaAnalyzer(Config)
+        analyzer.client = RecordingClient()
+        server.bytes_sent = 0
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            analyze(analyzer)
+        elapsed_ms = (time.perf_counter() - start) / args.repeat * 1000
+        request_kb = analyzer.client.request_bytes / args.repeat / 1024
+        print(f"{name:<34}{elapsed_ms:>12.1f}{server.bytes_sent / args.repeat / 1024:>17.0f}"
+              f"{request_kb:>14.1f}{api_fetch / 1024:>10.0f}")
+
+    print(f"Vidéo de {args.seconds} s ({os.path.getsize(video_path) / 1024 / 1024:.1f} Mo), "
+          f"vignette de {thumbnail_size / 1024:.0f} Ko, débit {args.bandwidth} Mo/s")
+    print(f"{'variante':<34}{'durée (ms)':>12}{'téléchargé (Ko)':>17}{'requête (Ko)':>14}{'API (Ko)':>10}")
+    run("vignette", lambda analyzer: analyzer.process_video(video_url, thumbnail_url), thumbnail_size)
+
+    def with_cache(analyzer):
+        # Cache vide à chaque appel : coût d'un premier passage (téléchargement pour l'empreinte)
+        analyzer.vision_cache = VisionCache(os.path.join(tempfile.mkdtemp(), "vision_cache.sqlite3"))
+        analyzer.process_video(video_url, thumbnail_url)
+    run("vignette + cache Vision", with_cache, thumbnail_size)
+    run("première frame (Range, recours)", lambda analyzer: analyzer.process_video(video_url), 0)
+    run("vidéo complète (ancienne méthode)",
+        lambda analyzer: analyzer.analyze_image("data:image/jpeg;base64," + full_download_first_frame(video_url)), 0)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+# golden_corpus.py
+"""
+Équivalence et débit du moteur de conditions sur les corpus stockés
+
+Exécute extract_ticker_info, analyze_media_description, get_prompt_instructions
+et PatternMatcher.is_eligible sur un instantané figé des tweets et analyses de
+médias de data/, test_data/ et manual_data/ (benchmarks/golden/corpus.json),
+complété par des tweets synthétiques générés de façon reproductible à partir des
+listes de mots et de termes enregistrées dans le même fichier. Les entrées ne
+dépendent donc ni des exécutions du simulateur (qui ajoutent des tweets à data/)
+ni des modifications des vocabulaires. Chaque décision est comparée à la sortie
+de référence enregistrée (benchmarks/golden/condition_engine.json) : la moindre
+différence fait échouer le script. Le débit et les temps p50/p99 de chaque
+fonction sont affichés.
+
+Usage:
+    python benchmarks/golden_corpus.py            # comparer à la référence
+    python benchmarks/golden_corpus.py --record   # enregistrer une nouvelle référence
+    python benchmarks/golden_corpus.py --snapshot --record   # figer à nouveau les corpus, puis la référence
+    python benchmarks/golden_corpus.py --scale 100000   # débit sur un corpus agrandi
+"""
+import os
+import sys
+import json
+import glob
+import time
+import random
+import hashlib
+import argparse
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import condition_handler
+from condition_handler import extract_ticker_info, analyze_media_description, get_prompt_instructions
+from pattern_matcher import PatternMatcher
+from config import Config
+
+CORPUS_DIRS = ("data", "test_data", "manual_data")
+PATTERN_MATCHER = PatternMatcher()
+GOLDEN_FILE = os.path.join(ROOT_DIR, "benchmarks", "golden", "condition_engine.json")
+# Instantané des entrées de la référence : enregistrements, mots et termes des tweets synthétiques
+GOLDEN_CORPUS_FILE = os.path.join(ROOT_DIR, "benchmarks", "golden", "corpus.json")
+
+# Tweets synthétiques inclus dans la référence (graine et nombre fixes)
+GOLDEN_SYNTHETIC_SEED = 20250401
+GOLDEN_SYNTHETIC_COUNT = 1000
+
+
+def load_corpus(root_dir: str = ROOT_DIR) -> List[Dict[str, Any]]:
+    """
+    Charge les tweets et analyses de médias stockés
+
+    Returns:
+        Liste de {"id", "username", "text", "media_analysis"} triée par identifiant.
+        Chaque tweet est associé à l'analyse de son premier média si elle existe ;
+        les analyses sans tweet correspondant sont ajoutées avec un texte vide.
+    """
+    records = []
+    for corpus_dir in CORPUS_DIRS:
+        media_analyses = {}
+        for media_file in sorted(glob.glob(os.path.join(root_dir, corpus_dir, "media_analysis", "*.json"))):
+            stem = os.path.splitext(os.path.basename(media_file))[0]
+            with open(media_file, "r", encoding="utf-8") as f:
+                media_analyses[stem] = json.load(f)
+
+        for tweet_file in sorted(glob.glob(os.path.join(root_dir, corpus_dir, "tweets", "*.json"))):
+            stem = os.path.splitext(os.path.basename(tweet_file))[0]
+            with open(tweet_file, "r", encoding="utf-8") as f:
+                tweet = json.load(f)
+            records.append({
+                "id": f"{corpus_dir}/{stem}",
+                "username": stem.rsplit("_", 1)[0],
+                "text": tweet.get("text", ""),
+                "media_analysis": media_analyses.pop(f"{stem}_0", None),
+            })
+
+        for stem, media_analysis in media_analyses.items():
+            if not stem.endswith("_0"):
+                continue
+            records.append({
+                "id": f"{corpus_dir}/media/{stem}",
+                "username": stem.rsplit("_", 2)[0],
+                "text": "",
+                "media_analysis": media_analysis,
+            })
+    return records
+
+
+def corpus_words(corpus: List[Dict[str, Any]]) -> List[str]:
+    """Mots des tweets du corpus (triés, sans doublon)"""
+    return sorted({word for record in corpus for word in record["text"].split()})
+
+
+def vocabulary_terms() -> List[str]:
+    """Termes des vocabulaires de règles et des thèmes déclencheurs courants (triés, sans doublon)"""
+    return sorted(
+        set().union(*condition_handler.TEXT_VOCABULARIES.values(), *condition_handler.MEDIA_VOCABULARIES.values())
+        | {keyword for keywords in Config.TRIGGER_THEMES.values() for keyword in keywords}
+    )
+
+
+def synthetic_corpus(corpus: List[Dict[str, Any]], count: int, seed: int,
+                     words: Optional[List[str]] = None, terms: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Génère des tweets synthétiques en recombinant les mots du corpus, les termes
+    des vocabulaires, des $TICKERS et les analyses de médias existantes
+
+    La génération ne dépend que du contenu (ensembles triés), pas de l'ordre des règles.
+
+    Args:
+        words: Mots à recombiner (par défaut, ceux du corpus, voir corpus_words)
+        terms: Termes à insérer (par défaut, ceux des vocabulaires courants, voir vocabulary_terms)
+    """
+    rng = random.Random(seed)
+    if words is None:
+        words = corpus_words(corpus)
+    if terms is None:
+        terms = vocabulary_terms()
+    media_pool = [record["media_analysis"] for record in corpus if record["media_analysis"]]
+    punctuation = ["", "", "", "!", ".", ",", "?", "...", " #", " @"]
+
+    records = []
+    for index in range(count):
+        parts = rng.sample(words, min(len(words), rng.randint(0, 20)))
+        parts += [rng.choice(terms) for _ in range(rng.randint(0, 2))]
+        if rng.random() < 0.1:
+            parts.append("$" + rng.choice(terms).split()[0].upper())
+        rng.shuffle(parts)
+        text = " ".join(part + rng.choice(punctuation) for part in parts)
+        if rng.random() < 0.2:
+            text = text.upper()
+
+        media_analysis = None
+        roll = rng.random()
+        if roll < 0.3 and media_pool:
+            media_analysis = rng.choice(media_pool)
+        elif roll < 0.5:
+            media_analysis = {
+                "description": " ".join(rng.sample(words, min(len(words), 10)) + [rng.choice(terms)]),
+                "subjects": [rng.choice(terms) for _ in range(rng.randint(0, 3))],
+                "actions": [rng.choice(words) + " " + rng.choice(terms) for _ in range(rng.randint(0, 2))],
+                "emotional_themes": rng.sample(["joy", "sadness", "fear", "anger", "humor"], rng.randint(0, 2)),
+                "is_meme": rng.random() < 0.2,
+            }
+
+        records.append({
+            "id": f"synthetic/{seed}/{index}",
+            "username": rng.choice(["elonmusk", "kanyewest", "someone", "trump", ""]),
+            "text": text,
+            "media_analysis": media_analysis,
+        })
+    return records
+
+
+# Fonctions comparées : nom -> (fonction, applicable à l'enregistrement ?)
+FUNCTIONS: Dict[str, Tuple[Callable[[Dict[str, Any]], Any], Callable[[Dict[str, Any]], bool]]] = {
+    "extract_ticker_info": (
+        lambda record: extract_ticker_info(record["text"]),
+        lambda record: True,
+    ),
+    "analyze_media_description": (
+        lambda record: analyze_media_description(record["media_analysis"]),
+        lambda record: record["media_analysis"] is not None,
+    ),
+    "get_prompt_instructions": (
+        lambda record: get_prompt_instructions(record["text"], record["media_analysis"]),
+        lambda record: True,
+    ),
+    "PatternMatcher.is_eligible": (
+        lambda record: PATTERN_MATCHER.is_eligible(record["text"], record["username"], record["media_analysis"]),
+        lambda record: True,
+    ),
+}
+
+
+def digest(value: Any) -> str:
+    """Empreinte courte d'une décision (sérialisation JSON canonique)"""
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+def run(records: List[Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, str]], Dict[str, List[int]]]:
+    """
+    Exécute chaque fonction sur chaque enregistrement
+
+    Returns:
+        (empreintes par enregistrement et par fonction, durées en ns par fonction)
+    """
+    decisions: Dict[str, Dict[str, str]] = {}
+    timings: Dict[str, List[int]] = {name: [] for name in FUNCTIONS}
+    perf_counter_ns = time.perf_counter_ns
+
+    for record in records:
+        record_decisions = decisions[record["id"]] = {}
+        for name, (function, applies) in FUNCTIONS.items():
+            if not applies(record):
+                continue
+            start = perf_counter_ns()
+            value = function(record)
+            timings[name].append(perf_counter_ns() - start)
+            record_decisions[name] = digest(value)
+    return decisions, timings
+
+
+def percentile(sorted_values: List[int], fraction: float) -> int:
+    """Valeur au rang donné (méthode du rang le plus proche)"""
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def report(timings: Dict[str, List[int]]) -> None:
+    """Affiche le débit et les temps p50/p99 de chaque fonction"""
+    print(f"{'Fonction':<30}{'appels':>10}{'appels/s':>14}{'p50 (us)':>12}{'p99 (us)':>12}")
+    for name, durations in timings.items():
+        if not durations:
+            continue
+        ordered = sorted(durations)
+        throughput = len(ordered) / (sum(ordered) / 1e9)
+        print(f"{name:<30}{len(ordered):>10}{throughput:>14,.0f}"
+              f"{percentile(ordered, 0.50) / 1000:>12.1f}{percentile(ordered, 0.99) / 1000:>12.1f}")
+
+
+def compare(decisions: Dict[str, Dict[str, str]], golden: Dict[str, Dict[str, str]]) -> List[str]:
+    """Liste les différences entre les décisions courantes et la référence"""
+    differences = []
+    for record_id in sorted(set(golden) | set(decisions)):
+        expected = golden.get(record_id)
+        actual = decisions.get(record_id)
+        if expected is None or actual is None:
+            differences.append(f"{record_id}: {'absent de la référence' if expected is None else 'absent du corpus'}")
+            continue
+        for name in sorted(set(expected) | set(actual)):
+            if expected.get(name) != actual.get(name):
+                differences.append(f"{record_id}: {name}")
+    return differences
+
+
+def write_snapshot(path: str = GOLDEN_CORPUS_FILE) -> Dict[str, Any]:
+    """Fige les corpus stockés, leurs mots et les termes des vocabulaires courants dans path"""
+    corpus = load_corpus()
+    snapshot = {"records": corpus, "words": corpus_words(corpus), "terms": vocabulary_terms()}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, indent=1, sort_keys=True, ensure_ascii=False)
+        f.write("\n")
+    return snapshot
+
+
+def load_snapshot(path: str = GOLDEN_CORPUS_FILE) -> Dict[str, Any]:
+    """Instantané figé des entrées de la référence : {"records", "words", "terms"}"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def golden_records(path: str = GOLDEN_CORPUS_FILE) -> List[Dict[str, Any]]:
+    """Enregistrements couverts par la référence : corpus figé + tweets synthétiques fixes"""
+    snapshot = load_snapshot(path)
+    corpus = snapshot["records"]
+    return corpus + synthetic_corpus(corpus, GOLDEN_SYNTHETIC_COUNT, GOLDEN_SYNTHETIC_SEED,
+                                     words=snapshot["words"], terms=snapshot["terms"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Équivalence et débit du moteur de conditions")
+    parser.add_argument("--golden", default=GOLDEN_FILE)
+    parser.add_argument("--record", action="store_true", help="Enregistrer la référence au lieu de comparer")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="Figer à nouveau les corpus stockés et les vocabulaires (à combiner avec --record)")
+    parser.add_argument("--scale", type=int, default=0,
+                        help="Tweets synthétiques supplémentaires pour la mesure du débit")
+    parser.add_argument("--cache", action="store_true",
+                        help="Garder le cache des conditions (désactivé par défaut pour mesurer le moteur)")
+    args = parser.parse_args()
+
+    if not args.cache:
+        condition_handler.RULE_CACHE.max_size = 0
+        condition_handler.RULE_CACHE.clear()
+
+    if args.snapshot:
+        write_snapshot()
+        print(f"Instantané des corpus enregistré: {GOLDEN_CORPUS_FILE}")
+
+    records = golden_records()
+    decisions, timings = run(records)
+
+    if args.scale:
+        _, scale_timings = run(synthetic_corpus(records, args.scale, GOLDEN_SYNTHETIC_SEED + 1))
+        for name, durations in scale_timings.items():
+            timings[name].extend(durations)
+
+    print(f"Corpus: {len(records)} enregistrements (+{args.scale} synthétiques pour le débit)")
+    report(timings)
+
+    if args.record:
+        os.makedirs(os.path.dirname(args.golden), exist_ok=True)
+        with open(args.golden, "w", encoding="utf-8") as f:
+            json.dump(decisions, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"\nRéférence enregistrée: {args.golden}")
+        return 0
+
+    with open(args.golden, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+
+    differences = compare(decisions, golden)
+    if differences:
+        print(f"\n{len(differences)} décisions différentes de la référence:")
+        for difference in differences[:20]:
+            print(f"- {difference}")
+        return 1
+    print("\nToutes les décisions sont identiques à la référence")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# soak_memory.py
+"""
+Test d'endurance mémoire de TweetAnalyzer
+
+Analyse un flux de tweets synthétiques qui contiennent chacun des hashtags, cashtags
+et mentions inédits (le pire cas pour le vocabulaire spaCy) et relève le RSS à
+intervalles réguliers. Avec la reconstruction du pipeline (NLP_MAX_NEW_STRINGS),
+le RSS doit se stabiliser ; sans (--max-new-strings 0), il croît avec le nombre de tweets.
+
+Usage:
+    python benchmarks/soak_memory.py [--count 1000000] [--max-new-strings 100000] [--model en_core_web_sm]
+    python benchmarks/soak_memory.py --model blank:en   # sans modèle installé
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from typing import Any, Dict, Iterator, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from config import Config
+from tweet_analyzer import TweetAnalyzer
+from memory_monitor import MemoryMonitor
+from golden_corpus import GOLDEN_SYNTHETIC_SEED, load_corpus
+from bench_tweet_analyzer import load_model
+
+
+def tweet_stream(texts: List[str], count: int, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Lots de tweets du corpus, chacun complété par des jetons jamais vus"""
+    rng = random.Random(GOLDEN_SYNTHETIC_SEED)
+    for start in range(0, count, batch_size):
+        batch = []
+        for index in range(start, min(start + batch_size, count)):
+            suffix = f"{index:x}"
+            text = f"{rng.choice(texts)} #tag{suffix} $COIN{suffix} @user{suffix}"
+            batch.append({"id": str(index), "text": text})
+        yield batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test d'endurance mémoire de TweetAnalyzer")
+    parser.add_argument("--model", default="en_core_web_sm")
+    parser.add_argument("--count", type=int, default=1000000)
+    parser.add_argument("--batch-size", type=int, default=Config.SPACY_BATCH_SIZE)
+    parser.add_argument("--max-new-strings", type=int, default=Config.NLP_MAX_NEW_STRINGS)
+    parser.add_argument("--samples", type=int, default=20, help="Nombre de relevés du RSS")
+    parser.add_argument("--export", default=None, help="Fichier JSON de l'historique mémoire")
+    args = parser.parse_args()
+
+    Config.NLP_MAX_NEW_STRINGS = args.max_new_strings
+    analyzer = TweetAnalyzer(Config, nlp=load_model(args.model))
+    texts = [record["text"] for record in load_corpus() if record["text"]]
+    monitor = MemoryMonitor(enabled=True, export_path=args.export, sample_interval=0,
+                            history_size=args.samples + 1)
+    every = max(1, args.count // args.samples)
+
+    print(f"Modèle: {args.model}, {args.count} tweets, NLP_MAX_NEW_STRINGS={args.max_new_strings}")
+    print(f"{'tweets':>10}{'RSS (MB)':>10}{'chaînes spaCy':>15}{'reconstructions':>17}{'tweets/s':>10}")
+    start = time.perf_counter()
+    processed = 0
+    next_sample = 0
+    for batch in tweet_stream(texts, args.count, args.batch_size):
+        analyzer.extract_keywords_batch(batch, batch_size=args.batch_size, n_process=1)
+        processed += len(batch)
+        if processed >= next_sample or processed == args.count:
+            next_sample += every
+            sample = monitor.sample(nlp_strings=len(analyzer.nlp.vocab.strings), nlp_recycles=analyzer.recycles)
+            monitor.processed = processed
+            print(f"{processed:>10}{sample['rss_kb'] / 1024:>10.1f}{sample['nlp_strings']:>15}"
+                  f"{sample['nlp_recycles']:>17}{processed / (time.perf_counter() - start):>10,.0f}")
+
+    # Croissance du RSS sur la deuxième moitié du test (après la mise en route)
+    rss = [sample["rss_kb"] for sample in monitor.samples]
+    half = rss[len(rss) // 2:]
+    print(f"RSS: min {min(rss) / 1024:.1f} MB, max {max(rss) / 1024:.1f} MB, "
+          f"croissance sur la deuxième moitié {(half[-1] - half[0]) / 1024:+.1f} MB")
+    if args.export:
+        print(f"Historique: {monitor.export()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,311 +1,414 @@
 # condition_handler.py
 import re
-from typing import Dict, Optional, List, Union, Tuple
-
-# Import the existing function with all its condition logic
-def extract_ticker_info(text):
-    # Listes de mots pour chaque condition
-    negative_words = {'pain', 'hurting', 'hurt', 'wound', 'wounded', 'wounding', 'defeat', 'defeated', 'defeating', 'steal', 'stolen', 'stealing', 'shatter', 'shattered', 'shattering', 'ruin', 'ruined', 'ruining', 'damage', 'damaged', 'damaging', 'crush', 'crushed', 'crushing', 'bankrupt', 'bankrupted', 'bankrupting', 'destroy', 'destroyed', 'destroying', 'help', 'helpless', 'helping', 'devastate', 'devastated', 'devastating', 'exhaust', 'exhausted', 'exhausting', 'collapse', 'collapsed', 'collapsing', 'sink', 'sunk', 'sinking', 'despair', 'despaired', 'despairing', 'strand', 'stranded', 'stranding', 'war'}
-    death_words = {'die', 'dead', 'died', 'decease', 'deceased', 'deceasing', 'go', 'gone', 'went', 'perish', 'perished', 'perishing', 'bury', 'buried', 'buried', 'wither', 'withered', 'withering', 'expire', 'expired', 'expiring', 'pass', 'passed', 'passing', 'succumb', 'succumbed', 'succumbing', 'depart', 'departed', 'departing', 'fade', 'faded', 'fading', 'live', 'lifeless', 'lived', 'extinguish', 'extinct', 'extinguished', 'lose', 'lost', 'lost', 'slay', 'slain', 'slaying', 'kill', 'killed', 'killing', 'murder', 'murdered', 'murdering', 'execute', 'executed', 'executing', 'vanish', 'vanished', 'vanishing', 'fall', 'felled', 'felling', 'rest', 'resting', 'rested', 'dies', 'death'}
-    mascot_words = {'mascot', 'logo', 'symbol', 'icon', 'badge', 'figure', 'character', 'avatar', 'entity', 'fictional character', 'cartoon', 'illustration', 'caricature', 'creature', 'totem', 'puppet', 'alter ego', 'creature', 'imaginary figure', 'fantasy being', 'virtual character', 'animated figure'}
-    crime_words = {'charge', 'charged', 'charging', 'arrest', 'arrested', 'arresting', 'detain', 'detained', 'detaining', 'indict', 'indicted', 'indicting', 'convict', 'convicted', 'convicting', 'gun', 'gunned', 'gunning', 'shoot', 'shot', 'shooting', 'knife', 'knifed', 'knifing', 'stab', 'stabbed', 'stabbing', 'accuse', 'accused', 'accusing', 'assault', 'assaulted', 'assaulting', 'attack', 'attacked', 'attacking', 'rob', 'robbed', 'robbing', 'accuse', 'accused', 'accusing', 'assault', 'assaulted', 'assaulting', 'attack', 'attacked', 'attacking', 'rob', 'robbed', 'robbing'}
-    toilet_words = {'pee', 'peed', 'peeing', 'poo', 'pooed', 'pooing', 'wee-wee', 'wee-weed', 'wee-weeing', 'tinkle', 'tinkled', 'tinkling', 'whiz', 'whizzed', 'whizzing', 'piddle', 'piddled', 'piddling', 'poop', 'pooped', 'pooping', 'doo-doo', 'doo-dooed', 'doo-dooing', 'dookie', 'dookied', 'dookieing', 'number two', 'number twoed', 'number twoing', 'pee-pee', 'pee-peed', 'pee-peeing', 'potty', 'pottied', 'pottying', 'dump', 'dumped', 'dumping', 'bm', 'bmed', 'bming'}
-    social_media_brands = {'twitter', 'x', 'duolingo', 'reddit', 'twitch', 'minecraft', 'walmart', 'discord', 'mcdonald\'s', 'pumpfun', 'colonel sanders'}
-    animals = {'lion', 'elephant', 'giraffe', 'zebra', 'tiger', 'bear', 'monkey', 'gorilla', 'hippopotamus', 'rhinoceros', 'crocodile', 'snake', 'flamingo', 'ostrich', 'kangaroo', 'koala', 'panda', 'wolf', 'cheetah'}
-    meme_coins = {'pepe', 'doge', 'dogwifhat'}
-    crypto_words = {'bitcoin', 'ethereum', 'stablecoin', 'solana', 'doge', 'shiba', 'pepe', 'floki', 'bonk', 'dogwifhat', 'popcat', 'floki', 'bonk'}
-    elon_brands = {'spacex', 'optimus', 'boringcompany', 'tesla', 'cybertruck', 'neuralink'}
-    sex_offender_words = {'sexual predator', 'sexual abuser', 'rapist', 'child molester', 'pedophile', 'statutory rapist', 'sexual assailant', 'sex criminal', 'registered sex offender', 'sexual deviant', 'perpetrator', 'sexual delinquent', 'sexual violator', 'incest offender', 'exhibitionist', 'voyeur', 'sexual exploiter', 'pornography offender', 'sex trafficker', 'sexual coercer', 'indecency', 'p*dophile', 'sex'}
-    touch_words = {'touch', 'touched', 'touching', 'caress', 'caressed', 'caressing', 'fondle', 'fondled', 'fondling', 'stroke', 'stroked', 'stroking', 'cuddle', 'cuddled', 'cuddling', 'rub', 'rubbed', 'rubbing', 'tease', 'teased', 'teasing'}
-
-    text_lower = text.lower()
-    text_lower = text_lower.replace(","," ")
-    text_lower = text_lower.replace("."," ")
-    text_lower = text_lower.replace(";"," ")
-    text_lower = text_lower.replace("-"," ")
-    text_lower = text_lower.replace("/"," ")
-    text_lower = text_lower.replace("@"," ")
-    text_lower = text_lower.replace("?"," ")
-    text_lower = text_lower.replace("!"," ")
-
-    words = text_lower.split()
-
-    # Condition 1: '$' suivi d'un mot (à supprimer carrément) 
-    for word in words:
-        if word == 'hat' or word == "hats" or word == 'cap' or word == 'caps':
-            return "Create a memecoin concept where ticker is first letter of person + WH (max 10 chars), name is '[person] Wif Hat' (if no name found create one)"
-
-        # Condition 2: Elon
-        if word == 'elon':
-            return "Create a memecoin concept that captures Elon Musk’s eccentric and futuristic persona—only if the event is weird, impulsive, or techy in a viral way; avoid standard Tesla/SpaceX updates unless there's meme potential; if it doesn’t qualify, return status 801."
-
-        # Condition 10: Style (simulé ici pour texte, à adapter pour images)
-        if word == 'style' or word =='styles':
-            return "Create a memecoin concept where ticker is the style identified, name is the style simplified + 'ification' (e.g., Anime -> Animification)"
-
-        if word == 'meme' or word == 'memes':
-            return "If the word 'meme' appears in the text, create a meme-related concept, but the name must never contain the word 'Coin'"
-
-    # Condition 3: Kanye West
-    if 'kanye west' in text_lower:
-        return "Create a memecoin concept where ticker and name are related to Kanye West"
-
-    # Condition 4: Mots négatifs
-    if any(word.lower() in negative_words for word in words):
-        return "Create a memecoin concept where ticker is the first proper noun or random name (max 10 chars), name is 'Justice for [noun/name]'"
-
-    # Condition 5: Mots de mort
-    if any(word.lower() in death_words for word in words):
-        return "Create a memecoin concept where, ticker is the name of the person associated with the event or create a name if none is given (max 10 chars), name is 'RIP name. The event has to be in the recent time not long ago. refers to the person concerned rather than the environment.'"
-
-    # Condition 6: Mascottes
-    if any(word.lower() in mascot_words for word in words):
-        return "Create a memecoin where the ticker is the mascot’s name (or a random name if unknown, max 10 chars), and the name must strictly be 'New [Company] Mascot', where [Company] is the name of the company where the mascot appears."
-
-    # Condition 7: Crime
-    if any(word.lower() in crime_words for word in words):
-        return "Create a memecoin concept where ticker is person's name (max 10 chars, use first name if multiple), name is 'Jail [first name]' (if no name, use 'billy')"
-
-    # Condition 9: Mots de toilette
-    if any(word.lower() in toilet_words for word in words):
-        return "Create a memecoin concept where ticker is related to the most shocking toilet word action (max 10 chars), name is the most shocking action involving the toilet word"
-
-    # Condition 11: Trump
-    if 'trump' in text_lower:
-        return "Create a memecoin concept that captures Trump’s chaotic, exaggerated, or meme-worthy energy, only if the event involves a viral quote, bizarre facial expression, funny behavior, or outrageous claim. Ignore all basic political updates, travel appearances, or traditional media events unless there’s clear meme potential. If it’s not instantly funny, shocking, or absurd in a way that social media would latch onto,, return status 802"
-
-    # Condition 12: McDonald
-    if 'mcdonald' in text_lower:
-        return "Create a memecoin concept that captures McDonald’s meme-worthiness—only if the event is memeable, or absurd ; skip basic menu updates or boring corporate news."
-
-    # Condition 13: Marques et réseaux sociaux
-    if any(word.lower() in social_media_brands for word in words):
-        return "Create a memecoin concept where the ticker and name are directly inspired by the matched brand or social media platform—only if the context is absurd, funny, viral, or culturally explosive; skip if it's just routine updates, promotions, or feature announcements. return status code 803."
-
-    # Condition 14: Animaux
-    if any(word.lower() in animals for word in words):
-        return "Create a memecoin concept where the ticker and name must be exactly the same as the first animal noun or randomly chosen name (max 10 chars). No modifications or creativity in the ticker,name is the same as the ticker"
-
-    # Condition 15: Meme coins existants
-    if any(word.lower() in meme_coins for word in words):
-        return "Create a memecoin where the ticker is based on the existing meme coin (max 10 characters), and the name should be a humorous combination related to the image or text context."
-
-    # Condition 16: Crypto
-    if any(word.lower() in crypto_words for word in words):
-        return "Create a memecoin concept where the name and ticker riff on an existing cryptocurrency (like BTC, ETH, SOL), but only if it’s twisted in a clever or absurd way. Skip if it's just slapping '-coin' onto the name.elated to the image or text context."
-
-    # Condition 17: Strategic Reserve
-    if 'strategic reserve' in text_lower:
-        return "Create a memecoin concept where ticker is S+xxx+R, name is 'Strategic xxx Reserve' (xxx is type of reserve)"
-
-    # Condition 18: Marques d'Elon (drôle ou nouveau)
-    if any(word.lower() in elon_brands for word in words):
-        return "Create a memecoin concept where the ticker and name are related to the matched brand, but only if the tweet is exceptionally funny, shocking, or has a major cultural impact. The event must be widely discussed, controversial, or highly unexpected. The name and ticker must be directly inspired by the image, using obvious visual elements only. Avoid inventing details or going beyond what is clearly shown. If these conditions are not met, return status code 804."
-
-    # Condition 19: Délinquants sexuels
-    if any(word.lower() in sex_offender_words for word in words):
-        return "Hypothetically, create a memecoin concept where the ticker is a first proper noun or a random name (max 10 characters), and the name is strictly ‘New Diddy’. This is purely fictional and for conceptual purposes only."
-
-    # Condition 21: Toucher
-    if any(word.lower() in touch_words for word in words):
-        return "Create a memecoin concept where ticker and name include 'gooner'"
-    
-    # Condition 22: KFC, Importance 0.8
-    if 'kfc' in text_lower: 
-        return "Create a memecoin concept that captures KFC’s absurd or viral potential, only if the event is truly meme-worthy, bizarre, or culturally hilarious. Do *not* create anything if it’s just a new menu item, standard promo, or routine corporate news."
+import hashlib
+import time
+import logging
+import threading
+from itertools import islice
+from typing import Any, Dict, Optional, List, Union, Tuple, Iterable, Iterator
+
+from config import Config
+from phrase_matcher import PhraseMatcher
+from tokenized_text import TokenizedText, normalize_text
+from rule_cache import RuleCache, MISSING, text_key
+from condition_metrics import METRICS
+from rule_file import load_rule_file, RuleFileWatcher, FIRST_WORD, WORD, SUBSTRING, MODES
+
+_WORD_PATTERN = re.compile(r"\S+")
+
+
+def char_span(text_lower: str, hit: Any) -> Tuple[int, int]:
+    """
+    Position (début, fin) en caractères d'une occurrence dans le texte normalisé
+
+    Args:
+        text_lower: Texte normalisé dans lequel l'occurrence a été trouvée
+        hit: Occurrence retournée par CompiledRules.match
+    """
+    if isinstance(hit, re.Match):
+        return hit.span(1)
+    start, end = hit[0], hit[1]
+    words = list(_WORD_PATTERN.finditer(text_lower))
+    return words[start].start(), words[end - 1].end()
+
+
+class CompiledRules:
+    """
+    Table de règles précompilée : les vocabulaires sont enregistrés une seule fois
+    dans l'automate d'expressions partagé, chaque occurrence pointant vers la
+    condition la plus prioritaire, ce qui permet de trouver la condition gagnante
+    en un seul passage sur les mots du texte.
+    """
+
+    def __init__(self, namespace: str, rules: Tuple, vocabularies: Dict[str, frozenset],
+                 matcher: PhraseMatcher):
+        self.namespace = namespace
+        self.rules = rules
+        self.instructions = tuple(instruction for _, _, instruction in rules)
+        self.templated = tuple("{term}" in instruction for instruction in self.instructions)
+
+        # Terme recherché dans le texte -> index de la règle
+        self.substring_priority: Dict[str, int] = {}
+        # Les règles "premier mot" doivent précéder toutes les autres
+        self.first_word_count = 0
+        # Premier mot de chaque expression : un texte qui n'en contient aucun
+        # ne peut déclencher aucune règle mot/expression (voir may_match)
+        heads = set()
+
+        for index, (condition_id, mode, _) in enumerate(rules):
+            vocabulary = vocabularies[condition_id]
+            if mode not in MODES:
+                raise ValueError(f"Règle '{condition_id}' : mode inconnu '{mode}' (attendu: {', '.join(MODES)})")
+            if mode == FIRST_WORD:
+                if index != self.first_word_count:
+                    raise ValueError(f"Règle '{condition_id}' : les règles {FIRST_WORD} doivent être en tête")
+                self.first_word_count += 1
+            if mode == SUBSTRING:
+                for term in vocabulary:
+                    self.substring_priority.setdefault(term, index)
+            else:
+                # Ordre trié pour que la construction de l'automate soit reproductible
+                for term in sorted(vocabulary):
+                    words = normalize_text(term).split()
+                    matcher.add(words, (namespace, index, term))
+                    if words:
+                        heads.add(words[0])
+
+        self.heads = frozenset(heads)
+
+        # Une seule expression pour tous les termes à rechercher dans le texte.
+        # Le lookahead permet de repérer des occurrences qui se chevauchent.
+        terms = sorted(self.substring_priority, key=len, reverse=True)
+        self.substring_pattern = re.compile(
+            "(?=(" + "|".join(re.escape(term) for term in terms) + "))"
+        ) if terms else None
+
+    def may_match(self, tokens: List[str], text_lower: str) -> bool:
+        """
+        Préfiltre sans faux négatif : False garantit que match ne trouvera rien
+
+        Une expression ne peut être trouvée que si son premier mot fait partie des mots
+        du texte, et un terme recherché comme sous-chaîne que si l'expression régulière
+        le trouve. Coût : un test d'appartenance par mot, plus une recherche si besoin.
+        """
+        if not self.heads.isdisjoint(tokens):
+            return True
+        return self.substring_pattern is not None and self.substring_pattern.search(text_lower) is not None
+
+    def match(self, phrase_hits: List[Tuple[int, int, Any]], text_lower: str) -> Optional[Tuple[int, str, Any]]:
+        """
+        Retourne (index de la règle gagnante, terme trouvé, occurrence) pour le texte donné, ou None
+
+        Args:
+            phrase_hits: Occurrences trouvées par l'automate partagé, triées par position
+            text_lower: Texte normalisé (voir normalize_text)
+
+        L'occurrence est soit un tuple de l'automate (positions en mots), soit
+        un re.Match pour les termes recherchés comme sous-chaînes (voir char_span).
+        """
+        namespace = self.namespace
+        first_word_count = self.first_word_count
+        best = len(self.rules)
+        best_term = None
+        best_hit = None
+
+        for hit in phrase_hits:
+            payload = hit[2]
+            if payload[0] != namespace:
+                continue
+            index = payload[1]
+            if index < first_word_count:
+                return index, payload[2], hit
+            if index < best:
+                best = index
+                best_term = payload[2]
+                best_hit = hit
+
+        if self.substring_pattern is not None:
+            for found in self.substring_pattern.finditer(text_lower):
+                index = self.substring_priority[found.group(1)]
+                if index < best:
+                    best = index
+                    best_term = found.group(1)
+                    best_hit = found
+
+        if best == len(self.rules):
+            return None
+        return best, best_term, best_hit
+
+    def instruction(self, index: int, term: str) -> str:
+        """Instruction de la règle, complétée par le terme trouvé si besoin"""
+        if self.templated[index]:
+            return self.instructions[index].replace("{term}", term)
+        return self.instructions[index]
+
+
+def ruleset_version(text_rules: Tuple, media_rules: Tuple, text_vocabularies: Dict[str, frozenset],
+                    media_vocabularies: Dict[str, frozenset], trigger_themes: Dict[str, List[str]]) -> str:
+    """Empreinte des règles, des vocabulaires et des thèmes (change dès qu'un terme change)"""
+    digest = hashlib.sha1()
+    for value in (
+        text_rules,
+        media_rules,
+        sorted((key, sorted(terms)) for key, terms in text_vocabularies.items()),
+        sorted((key, sorted(terms)) for key, terms in media_vocabularies.items()),
+        sorted(trigger_themes.items()),
+    ):
+        digest.update(repr(value).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+class RuleSet:
+    """
+    Ensemble complet des règles compilées : automate d'expressions partagé par les
+    règles du texte, des médias et les thèmes de Config, tables précompilées et version
+
+    Un RuleSet n'est jamais modifié après sa construction. Le rechargement en construit
+    un nouveau puis remplace la référence RULES en une seule affectation : chaque
+    évaluation lit RULES une fois et travaille sur un ensemble cohérent du début à la fin.
+    """
+
+    def __init__(self, text_rules: Tuple, media_rules: Tuple, text_vocabularies: Dict[str, frozenset],
+                 media_vocabularies: Dict[str, frozenset], trigger_themes: Dict[str, List[str]]):
+        self.text_rules = text_rules
+        self.media_rules = media_rules
+        self.text_vocabularies = text_vocabularies
+        self.media_vocabularies = media_vocabularies
+        self.trigger_themes = trigger_themes
+
+        self.matcher = PhraseMatcher()
+        self.text = CompiledRules("text", text_rules, text_vocabularies, self.matcher)
+        self.media = CompiledRules("media", media_rules, media_vocabularies, self.matcher)
+        for theme, keywords in trigger_themes.items():
+            for position, keyword in enumerate(keywords):
+                self.matcher.add(normalize_text(keyword).split(), ("theme", theme, position))
+        self.matcher.build()
+
+        self.version = ruleset_version(text_rules, media_rules, text_vocabularies, media_vocabularies,
+                                       trigger_themes)
+
+    @classmethod
+    def from_file(cls, path: str, trigger_themes: Optional[Dict[str, List[str]]] = None) -> "RuleSet":
+        """Charge et compile le fichier des règles (voir rule_file.load_rule_file)"""
+        return cls.from_definitions(load_rule_file(path), trigger_themes)
+
+    @classmethod
+    def from_definitions(cls, definitions: Dict[str, Any],
+                         trigger_themes: Optional[Dict[str, List[str]]] = None) -> "RuleSet":
+        """Compile des règles validées par rule_file.load_rule_file / parse_rule_data"""
+        return cls(
+            definitions["text_rules"],
+            definitions["media_rules"],
+            definitions["text_vocabularies"],
+            definitions["media_vocabularies"],
+            Config.TRIGGER_THEMES if trigger_themes is None else trigger_themes,
+        )
+
+
+# Règles actives, chargées depuis Config.CONDITION_RULES_FILE
+RULES = RuleSet.from_file(Config.CONDITION_RULES_FILE)
+
+# Résultats déjà calculés, indexés par l'empreinte du texte normalisé et la version des règles
+RULE_CACHE = RuleCache(Config.RULE_CACHE_SIZE, RULES.version)
+
+
+def _publish(rules: RuleSet) -> None:
+    """Expose les tables des règles actives au niveau du module (lecture seule, pour les outils)"""
+    global TEXT_RULES, MEDIA_RULES, TEXT_VOCABULARIES, MEDIA_VOCABULARIES
+    global PHRASE_MATCHER, TEXT_ENGINE, MEDIA_ENGINE, RULESET_VERSION
+    TEXT_RULES, MEDIA_RULES = rules.text_rules, rules.media_rules
+    TEXT_VOCABULARIES, MEDIA_VOCABULARIES = rules.text_vocabularies, rules.media_vocabularies
+    PHRASE_MATCHER, TEXT_ENGINE, MEDIA_ENGINE = rules.matcher, rules.text, rules.media
+    RULESET_VERSION = rules.version
+
+
+_publish(RULES)
+
+_logger = logging.getLogger(__name__)
+_reload_lock = threading.Lock()
+_watcher: Optional[RuleFileWatcher] = None
+
+
+def install_rules(rules: RuleSet) -> None:
+    """
+    Active un nouvel ensemble de règles (remplacement atomique de RULES)
+
+    Les évaluations en cours terminent avec l'ancien ensemble. Le cache des conditions
+    n'est vidé que si la version change : recharger un fichier identique garde le cache.
+    """
+    global RULES
+    with _reload_lock:
+        RULES = rules
+        _publish(rules)
+        RULE_CACHE.set_version(rules.version)
+
+
+def reload_rules(path: Optional[str] = None) -> bool:
+    """
+    Recharge le fichier des règles et l'active s'il est valide
+
+    Un fichier illisible ou invalide est signalé dans les logs et les règles actives
+    sont conservées.
+
+    Returns:
+        True si de nouvelles règles ont été activées
+    """
+    path = path or Config.CONDITION_RULES_FILE
+    try:
+        rules = RuleSet.from_file(path)
+    except (OSError, ValueError, KeyError) as e:
+        _logger.error(f"Règles non rechargées, les règles actives sont conservées ({path}): {e}")
+        return False
+
+    if rules.version == RULES.version:
+        _logger.info(f"Règles inchangées (version {rules.version})")
+        return False
+
+    previous = RULES.version
+    install_rules(rules)
+    _logger.info(f"Règles rechargées depuis {path}: version {previous} -> {rules.version}")
+    return True
+
+
+def start_rule_watcher(path: Optional[str] = None, interval: Optional[float] = None) -> RuleFileWatcher:
+    """
+    Démarre (une seule fois) la surveillance du fichier des règles : chaque modification
+    est rechargée par reload_rules dans les secondes qui suivent
+    """
+    global _watcher
+    path = path or Config.CONDITION_RULES_FILE
+    with _reload_lock:
+        if _watcher is None:
+            _watcher = RuleFileWatcher(
+                path,
+                lambda: reload_rules(path),
+                Config.CONDITION_RULES_RELOAD_INTERVAL if interval is None else interval,
+            )
+        watcher = _watcher
+    watcher.start()
+    return watcher
+
 
-    return None
+def rule_cache_stats() -> Dict[str, Any]:
+    """Statistiques du cache des conditions (succès, échecs, taille)"""
+    return RULE_CACHE.stats()
 
-def analyze_media_description(media_analysis: Dict) -> Optional[str]:
+
+def _match(rules: RuleSet, engine: CompiledRules, tokenized: TokenizedText) -> Optional[Tuple[int, str, Any]]:
+    """CompiledRules.match avec préfiltre et mise en cache par texte normalisé"""
+    if not engine.may_match(tokenized.tokens, tokenized.normalized):
+        return None
+    if RULE_CACHE.max_size <= 0:
+        return engine.match(find_phrase_hits(tokenized, rules.matcher), tokenized.normalized)
+    key = text_key(rules.version, engine.namespace, tokenized.normalized)
+    found = RULE_CACHE.get(key)
+    if found is MISSING:
+        found = engine.match(find_phrase_hits(tokenized, rules.matcher), tokenized.normalized)
+        RULE_CACHE.put(key, found)
+    return found
+
+
+def _instruction(rules: RuleSet, engine: CompiledRules, tokenized: TokenizedText) -> Optional[str]:
+    """Instruction de la condition déclenchée par le texte, ou None"""
+    found = _match(rules, engine, tokenized)
+    if found is None:
+        return None
+    return engine.instruction(found[0], found[1])
+
+
+def find_phrase_hits(text: Union[str, TokenizedText],
+                     matcher: Optional[PhraseMatcher] = None) -> List[Tuple[int, int, Any]]:
+    """
+    Trouve en un seul passage toutes les expressions connues dans un texte normalisé
+
+    Pour un TokenizedText, le résultat est conservé et réutilisé aux appels suivants
+    tant que l'automate (les règles actives) ne change pas
+
+    Args:
+        text: Texte normalisé ou TokenizedText
+        matcher: Automate à utiliser (défaut: celui des règles actives)
+    """
+    if matcher is None:
+        matcher = RULES.matcher
+    if isinstance(text, TokenizedText):
+        if text.phrase_hits is None or text.phrase_matcher is not matcher:
+            text.phrase_hits = matcher.find_all(text.tokens)
+            text.phrase_matcher = matcher
+        return text.phrase_hits
+    return matcher.find_all(text.split())
+
+
+def extract_ticker_info(text: Union[str, TokenizedText]):
+    """
+    Retourne l'instruction de la condition déclenchée par le texte du tweet,
+    ou None si aucune condition ne correspond
+    """
+    rules = RULES
+    return _instruction(rules, rules.text, TokenizedText.of(text))
+
+
+def analyze_media_description(media_analysis: Union[Dict, TokenizedText]) -> Optional[str]:
     """
     Analyze ONLY the description field from media content and check for conditions
+
+    Accepte aussi directement la description déjà découpée (TokenizedText)
     """
-    if not media_analysis or "description" not in media_analysis:
+    if isinstance(media_analysis, TokenizedText):
+        description = media_analysis
+    elif not media_analysis or "description" not in media_analysis:
         return None
-        
-    # Récupérer uniquement la description et la convertir en minuscules
-    description = media_analysis.get("description", "").lower()
-    
-    # Nettoyer la description comme pour le texte du tweet
-    description = description.replace(",", " ")
-    description = description.replace(".", " ")
-    description = description.replace(";", " ")
-    description = description.replace("-", " ")
-    description = description.replace("/", " ")
-    description = description.replace("@", " ")
-    description = description.replace("?", " ")
-    description = description.replace("!", " ")
-    
-    # Séparer la description en mots
-    words = description.split()
-    
-    # Listes de mots pour chaque condition (identiques à extract_ticker_info)
-    negative_words = {'pain', 'hurting', 'hurt', 'wound', 'wounded', 'wounding', 'defeat', 'defeated', 'defeating', 'steal', 'stolen', 'stealing', 'shatter', 'shattered', 'shattering', 'ruin', 'ruined', 'ruining', 'damage', 'damaged', 'damaging', 'crush', 'crushed', 'crushing', 'bankrupt', 'bankrupted', 'bankrupting', 'destroy', 'destroyed', 'destroying', 'help', 'helpless', 'helping', 'devastate', 'devastated', 'devastating', 'exhaust', 'exhausted', 'exhausting', 'collapse', 'collapsed', 'collapsing', 'sink', 'sunk', 'sinking', 'despair', 'despaired', 'despairing', 'strand', 'stranded', 'stranding'}
-    death_words = {'die', 'dead', 'died', 'dies', 'decease', 'deceased', 'deceasing', 'go', 'gone', 'went', 'perish', 'perished', 'perishing', 'bury', 'buried', 'buried', 'wither', 'withered', 'withering', 'expire', 'expired', 'expiring', 'pass', 'passed', 'passing', 'succumb', 'succumbed', 'succumbing', 'depart', 'departed', 'departing', 'fade', 'faded', 'fading', 'live', 'lifeless', 'lived', 'extinguish', 'extinct', 'extinguished', 'lose', 'lost', 'lost', 'slay', 'slain', 'slaying', 'kill', 'killed', 'killing', 'murder', 'murdered', 'murdering', 'execute', 'executed', 'executing', 'vanish', 'vanished', 'vanishing', 'fall', 'felled', 'felling', 'rest', 'resting', 'rested', 'death'}
-    mascot_words = {'mascot', 'logo', 'symbol', 'icon', 'badge', 'figure', 'character', 'avatar', 'entity', 'fictional character', 'cartoon', 'illustration', 'caricature', 'creature', 'totem', 'puppet', 'alter ego', 'creature', 'imaginary figure', 'fantasy being', 'virtual character', 'animated figure', 'action figure', 'toy', 'doll'}
-    crime_words = {'charge', 'charged', 'charging', 'arrest', 'arrested', 'arresting', 'detain', 'detained', 'detaining', 'indict', 'indicted', 'indicting', 'convict', 'convicted', 'convicting', 'gun', 'gunned', 'gunning', 'shoot', 'shot', 'shooting', 'knife', 'knifed', 'knifing', 'stab', 'stabbed', 'stabbing', 'accuse', 'accused', 'accusing', 'assault', 'assaulted', 'assaulting', 'attack', 'attacked', 'attacking', 'rob', 'robbed', 'robbing', 'accuse', 'accused', 'accusing', 'assault', 'assaulted', 'assaulting', 'attack', 'attacked', 'attacking', 'rob', 'robbed', 'robbing', 'prison', 'jail', 'handcuff', 'weapon'}
-    toilet_words = {'pee', 'peed', 'peeing', 'poo', 'pooed', 'pooing', 'wee-wee', 'wee-weed', 'wee-weeing', 'tinkle', 'tinkled', 'tinkling', 'whiz', 'whizzed', 'whizzing', 'piddle', 'piddled', 'piddling', 'poop', 'pooped', 'pooping', 'doo-doo', 'doo-dooed', 'doo-dooing', 'dookie', 'dookied', 'dookieing', 'number two', 'number twoed', 'number twoing', 'pee-pee', 'pee-peed', 'pee-peeing', 'potty', 'pottied', 'pottying', 'dump', 'dumped', 'dumping', 'bm', 'bmed', 'bming', 'toilet', 'bathroom', 'urinal'}
-    social_media_brands = {'twitter', 'x', 'duolingo', 'reddit', 'twitch', 'minecraft', 'walmart', 'discord', 'mcdonald', 'pumpfun', 'colonel sanders', 'burger king', 'wendy', 'taco bell', 'facebook', 'instagram', 'tiktok', 'snapchat', 'youtube'}
-    animals = {'lion', 'elephant', 'giraffe', 'zebra', 'tiger', 'bear', 'monkey', 'gorilla', 'hippopotamus', 'rhinoceros', 'crocodile', 'snake', 'flamingo', 'ostrich', 'kangaroo', 'koala', 'panda', 'wolf', 'cheetah', 'dog', 'cat', 'pet', 'animal'}
-    meme_coins = {'pepe', 'doge', 'dogwifhat', 'shib', 'shiba', 'bonk', 'wojak', 'floki'}
-    crypto_words = {'bitcoin', 'ethereum', 'stablecoin', 'solana', 'doge', 'shiba', 'pepe', 'floki', 'bonk', 'dogwifhat', 'popcat', 'floki', 'bonk', 'crypto', 'cryptocurrency', 'btc', 'eth', 'sol'}
-    elon_brands = {'spacex', 'optimus', 'boringcompany', 'tesla', 'cybertruck', 'neuralink', 'x', 'twitter', 'rocket', 'mars', 'electric car'}
-    sex_offender_words = {'sexual predator', 'sexual abuser', 'rapist', 'child molester', 'pedophile', 'statutory rapist', 'sexual assailant', 'sex criminal', 'registered sex offender', 'sexual deviant', 'perpetrator', 'sexual delinquent', 'sexual violator', 'incest offender', 'exhibitionist', 'voyeur', 'sexual exploiter', 'pornography offender', 'sex trafficker', 'sexual coercer', 'indecency', 'p*dophile', 'sex'}
-    touch_words = {'touch', 'touched', 'touching', 'caress', 'caressed', 'caressing', 'fondle', 'fondled', 'fondling', 'stroke', 'stroked', 'stroking', 'cuddle', 'cuddled', 'cuddling', 'rub', 'rubbed', 'rubbing', 'tease', 'teased', 'teasing', 'hold', 'holding', 'embrace'}
-    style_words = {'anime', 'cartoon', 'pixel', 'style', 'ghibli', 'pixel art', 'drawing', 'illustration', 'sketch', 'animated', 'artistic', 'stylized', 'noir', 'vintage', 'retro', 'futuristic'}
-    
-    # Vérifier pour chaque catégorie de mots
-    
-   # 1. Hats/Caps/Accessoires
-    if any(word in description for word in ['hat', 'hats', 'cap', 'caps']):
-        return "Create a memecoin concept where ticker is first letter of visible entity + WH (max 10 chars), name is '[entity] Wif Hat' (if no entity visible, create one based on image context)"
-    
-    # 2. Elon Musk
-    if any(word in description for word in ['elon', 'musk']):
-        return "Create a memecoin concept that captures Elon Musk’s eccentric and futuristic persona—only if the event is weird, impulsive, or techy in a viral way; avoid standard Tesla/SpaceX updates unless there's meme potential; if it doesn’t qualify, return status code 801."
-    
-    # 3. Style (verfication nécessaire !)
-    for style in style_words:
-        if style in words or (len(style.split()) > 1 and style in description):
-            return f"Create a memecoin concept where ticker is based on the {style} style identified, name is the style simplified + 'ification' (e.g., Anime -> Animification)"
-    
-    # 4. Meme
-    if 'meme' in words or 'memes' in words:
-        return "Create a meme-related memecoin concept based on the visual elements in the image, but the name must never contain the word 'Coin'"
-    
-    # 5. Deaths
-    if any(word in death_words for word in words):
-        return "Create a memecoin concept where, ticker is the name of the person visible in the image or create a name if none is given (max 10 chars), name is 'RIP [name]'"
-    
-    # 6. Negative/Defeated concepts
-    if any(word in negative_words for word in words):
-        return "Create a memecoin concept where ticker is the first proper noun or visible subject (max 10 chars), name is 'Justice for [noun/name]'"
-    
-    # 7. Mascot/Character/Figure
-    if any(word in mascot_words for word in words):
-        return "Create a memecoin where the ticker is based on the visible character or mascot (max 10 chars), and the name must include the character's distinctive features"
-    
-    # 8. Crime/Jail
-    if any(word in crime_words for word in words):
-        return "Create a memecoin concept where ticker is related to any person visible in the image (max 10 chars), name is 'Jail [name]' (if no name, use 'billy')"
-    
-    # 9. Toilet/Bathroom
-    if any(word in toilet_words for word in words):
-        return "Create a memecoin concept where ticker is related to the toilet/bathroom context shown in the image (max 10 chars), name is a humorous take on the bathroom situation"
-    
-    # 10. Trump
-    if 'trump'in words or 'donald trump' in words:
-        return "Create a memecoin concept that captures Trump’s chaotic, exaggerated, or meme-worthy energy, only if the event involves a viral quote, bizarre facial expression, funny behavior, or outrageous claim. Ignore all basic political updates, travel appearances, or traditional media events unless there’s clear meme potential. If it’s not instantly funny, shocking, or absurd in a way that social media would latch onto, return 902"
-    
-    # 11. McDonald's/Fast Food
-    if any(word in ['mcdonald', 'mcdonalds', 'mcdo'] for word in words):
-        return "Create a memecoin concept that captures the fast food or McDonald's elements visible in the image"
-    
-    # 12. Social Media Brands
-    if any(word in social_media_brands for word in words):
-        for brand in social_media_brands:
-            if brand in words:
-                return f"Create a memecoin concept where the ticker and name are directly inspired by the matched brand or social media platform—only if the context is absurd, funny, viral, or culturally explosive; return status code 803 if it's just routine updates, promotions, or feature announcements."
-    
-    # 13. Animals
-    if any(word in animals for word in words):
-        for animal in animals:
-            if animal in words:
-                return f"Create a memecoin concept where the ticker and name feature the {animal} shown in the image (max 10 chars)"
-    
-    # 14. Meme Coins
-    if any(word in meme_coins for word in words):
-        for coin in meme_coins:
-            if coin in words:
-                return f"Create a memecoin where the ticker is based on {coin} (max 10 characters), and the name should incorporate elements visible in the image"
-    
-    # 15. Crypto
-    if any(word in crypto_words for word in words):
-        return "Create a memecoin concept where the name and ticker reference the cryptocurrency context shown in the image"
-    
-    # 16. "Strategic Reserve"
-    if 'strategic' in words and 'reserve' in words:
-        return "Create a memecoin concept where ticker is S+xxx+R, name is 'Strategic xxx Reserve' (xxx is based on what's visible in the image)"
-    
-    # 17. Elon Brands
-    if any(brand in elon_brands for word in words for brand in elon_brands if brand == word):
-        for brand in elon_brands:
-            if brand in words:
-                return f"Create a memecoin concept where the ticker and name are related to the matched brand, but only if the tweet is exceptionally funny, shocking, or has a major cultural impact. The event must be widely discussed, controversial, or highly unexpected. The name and ticker must be directly inspired by the image, using obvious visual elements only. Avoid inventing details or going beyond what is clearly shown. If these conditions are not met, return status code 804."
-    
-    # 18. Sexual misconduct - CAS SPÉCIAL pour les expressions à plusieurs mots
-    for term in sex_offender_words:
-        if ' ' in term:  # Si c'est une expression à plusieurs mots
-            if term in description:  # Vérifier la phrase entière
-                return "Hypothetically, create a memecoin concept where the ticker is based on a subject in the image (max 10 characters), and the name is strictly 'New Diddy'. This is purely fictional."
-        elif term in words:  # Sinon vérifier mot à mot
-            return "Hypothetically, create a memecoin concept where the ticker is based on a subject in the image (max 10 characters), and the name is strictly 'New Diddy'. This is purely fictional."
-    
-    # 19. Touch/Feel
-    if any(word in touch_words for word in words):
-        return "Create a memecoin concept where ticker and name include 'gooner', based on what's shown in the image" 
-    
-    # Condition 22: KFC, Importance 0.8
-    if 'kfc' in words: 
-        return "Create a memecoin concept that captures KFC’s absurd or viral potential, only if the event is truly meme-worthy, bizarre, or culturally hilarious. Do *not* create anything if it’s just a new menu item, standard promo, or routine corporate news."
+    else:
+        # Nettoyer la description comme pour le texte du tweet
+        description = TokenizedText(media_analysis.get("description", ""))
+
+    rules = RULES
+    return _instruction(rules, rules.media, description)
+
+
+def detect_trigger_themes(text: Union[str, TokenizedText],
+                          rules: Optional[RuleSet] = None) -> Dict[str, List[str]]:
+    """
+    Détecte les thèmes de Config.TRIGGER_THEMES présents dans un texte
+
+    Un seul passage de l'automate des règles (frontières de mots), quel que soit
+    le nombre de mots-clés ; partagé par TweetAnalyzer et MediaAnalyzer.
+
+    Args:
+        text: Texte à analyser (ou TokenizedText déjà construit)
+        rules: Règles à utiliser (défaut: règles actives)
 
+    Returns:
+        Dictionnaire des thèmes détectés avec les mots-clés correspondants,
+        dans l'ordre de la configuration
+    """
+    if rules is None:
+        rules = RULES
+    positions: Dict[str, set] = {}
+    for _, _, payload in find_phrase_hits(TokenizedText.of(text), rules.matcher):
+        if payload[0] == "theme":
+            positions.setdefault(payload[1], set()).add(payload[2])
 
-    return None
+    detected_themes = {}
+    for theme, keywords in rules.trigger_themes.items():
+        if theme in positions:
+            detected_themes[theme] = [keywords[position] for position in sorted(positions[theme])]
+    return detected_themes
 
 def is_pattern_eligible(tweet_text: str, username: str = None, media_analysis: Dict = None) -> bool:
     """
     Determines if a tweet matches any pattern that should make it automatically eligible,
     now enhanced to properly analyze media content
     """
-    # 1. First check text conditions
-    condition_match = extract_ticker_info(tweet_text)
-    if condition_match:
-        return True
-    
-    # 2. Then thoroughly check media conditions if available
-    if media_analysis and "description" in media_analysis:
-        media_condition = analyze_media_description(media_analysis)
-        if media_condition:
-            return True, media_condition
-        
-    return False
+    # Conditions du texte puis de la description du média (voir evaluate_conditions)
+    return evaluate_conditions(tweet_text, media_analysis, with_guidance=False) is not None
+
+
+# Champs de l'analyse média lus par _build_prompt_instructions
+_PROMPT_MEDIA_FIELDS = ("description", "is_meme", "subjects", "actions", "emotional_themes")
+
 
-    # Check for death-related terms
-    death_words = ["dead", "deceased", "gone", "perished", "died", "rip", "killed", "passed"]
-    tweet_lower = tweet_text.lower()
-    if any(word in tweet_lower for word in death_words):
-        return True
-    
-    # Check for specific usernames (case-insensitive)
-    celebrity_usernames = ["elonmusk", "kanyewest", "ye", "drake", "trump", "biden", "kimkardashian", "justinbieber"]
-    if username and any(celeb.lower() in username.lower() for celeb in celebrity_usernames):
-        return True
-    
-    # Check for dollar sign references
-    if "$" in tweet_text:
-        return True
-    
-    # Check for memes, hats, styles in text
-    special_terms = ["meme", "hat", "style", "anime", "justice", "wif"]
-    if any(term in tweet_lower for term in special_terms):
-        return True
-    
-    # Check media analysis if provided
-    if media_analysis:
-        # If it's a meme, automatically eligible
-        if media_analysis.get("is_meme", False):
-            return True
-        
-        # If it contains specific subjects of interest
-        subjects = media_analysis.get("subjects", [])
-        interesting_subjects = ["animal", "dog", "cat", "person", "celebrity", "hat", "computer"]
-        if any(subj in " ".join(subjects).lower() for subj in interesting_subjects):
-            return True
-    
-    return False
-    
 # New function to provide more detailed instructions
-def get_prompt_instructions(tweet_text: str, media_analysis: Optional[Dict] = None) -> Dict:
+def get_prompt_instructions(tweet_text: Union[str, TokenizedText], media_analysis: Optional[Dict] = None) -> Dict:
     """
     Analyzes tweet text and media analysis to generate specific prompt instructions
     
@@ -316,9 +419,70 @@ def get_prompt_instructions(tweet_text: str, media_analysis: Optional[Dict] = No
         - name_format: Specific format for name
         - examples: Relevant examples to guide generation
     """
-    # First check if we have a direct condition match from original function
-    basic_instruction = extract_ticker_info(tweet_text)
-    
+    tweet = TokenizedText.of(tweet_text)
+    rules = RULES
+    if RULE_CACHE.max_size <= 0:
+        # First check if we have a direct condition match from original function
+        return _build_prompt_instructions(tweet, media_analysis, _instruction(rules, rules.text, tweet))
+
+    # Le résultat dépend du texte exact (casse des $TICKERS) et des champs utilisés du média
+    if media_analysis:
+        media_fields = repr([media_analysis.get(field) for field in _PROMPT_MEDIA_FIELDS])
+    else:
+        media_fields = ""
+    key = text_key(rules.version, "prompt", tweet.text + "\0" + media_fields)
+
+    result = RULE_CACHE.get(key)
+    if result is MISSING:
+        # First check if we have a direct condition match from original function
+        result = _build_prompt_instructions(tweet, media_analysis, _instruction(rules, rules.text, tweet))
+        RULE_CACHE.put(key, result)
+    # Copie : l'appelant peut modifier le dictionnaire sans altérer le cache
+    return dict(result, examples=[dict(example) for example in result["examples"]])
+
+
+# Formats déduits du texte du tweet (recherche de sous-chaînes). Dans l'ordre d'origine
+# le dernier trouvé l'emporte : la table est donc parcourue à l'envers et s'arrête au premier.
+# (termes, ticker_format, name_format, exemples)
+_PROMPT_TEXT_FORMATS = tuple(reversed((
+    (("hat",),
+     "Use format [first letter + WH]", "[subject] WIF HAT",
+     (("DWH", "dog wif hat"), ("EWH", "elon wif hat"))),
+    (("pain", "wounded", "broken", "defeated", "stealing", "shattered", "ruined", "damaged", "crushed"),
+     "Use format based on subject name", "JUSTICE FOR [subject]",
+     (("LARRY", "justice for larry"), ("PEPE", "justice for pepe"))),
+    (("rip", "dead", "deceased", "gone", "perished", "buried", "died"),
+     "Use format RIP [initial letters]", "RIP [subject]",
+     (("RIPVAL", "rip val"), ("SARAHF", "rip sarah"))),
+    (("style", "anime", "ghibli", "ai", "transform"),
+     "Use the style name", "[style]ification",
+     (("ANIME", "animification"), ("KNIT", "knitification"))),
+)))
+
+_PROMPT_MEDIA_STYLES = ("anime", "cartoon", "pixar", "disney", "animated")
+_PROMPT_ANIMALS = ("dog", "cat", "bear", "frog", "bird", "monkey", "ape", "lion", "tiger", "animal")
+_PROMPT_WEARING_TERMS = ("wearing", "with", "hat", "clothes", "costume", "dressed")
+# Objets portés, par ordre de priorité
+_PROMPT_WORN_ITEMS = ("hat", "cap", "helmet", "glasses", "tie", "shirt", "coat")
+# "Carti" ne peut jamais correspondre (textes en minuscules) : retiré sans changer le résultat
+_PROMPT_CELEBRITIES = ("elon", "musk", "trump", "biden", "kanye", "playboicarti", "kardashian", "bieber", "celebrity")
+_PROMPT_CELEBRITY_EXAMPLES = {"elon": {"ticker": "ELON", "name": "elonking"},
+                              "trump": {"ticker": "TRM", "name": "trumpcycle"}}
+_PROMPT_NEGATIVE_EMOTIONS = ("sadness", "fear", "anger", "disgust", "tragedy", "suffering")
+_PROMPT_DEATH_IMAGERY = ("death", "funeral", "grave", "deceased", "memorial", "rip")
+_DOLLAR_PATTERN = re.compile(r'\$([A-Za-z0-9]+)')
+
+
+def _build_prompt_instructions(tweet: TokenizedText, media_analysis: Optional[Dict],
+                               basic_instruction: Optional[str],
+                               description_tokens: Optional[TokenizedText] = None) -> Dict:
+    """
+    Corps de get_prompt_instructions, la condition textuelle étant déjà connue
+
+    Chaque texte (tweet, description, chaque sujet et action) est mis en minuscules
+    une seule fois et les tables ci-dessus sont parcourues en s'arrêtant au premier
+    terme décisif
+    """
     # Initialize response
     result = {
         "base_instruction": basic_instruction if basic_instruction else "Generate based on tweet content",
@@ -327,58 +491,24 @@ def get_prompt_instructions(tweet_text: str, media_analysis: Optional[Dict] = No
         "examples": []
     }
     
-    # Check for specific patterns that should influence formats
-    
     # 1. Check for $ symbol (direct token reference)
-    dollar_pattern = r'\$([A-Za-z0-9]+)'
-    dollar_matches = re.findall(dollar_pattern, tweet_text)
-    if dollar_matches:
-        result["ticker_format"] = f"Use '{dollar_matches[0].upper()}' as ticker"
-        result["name_format"] = f"Base name on '{dollar_matches[0]}'"
-        result["examples"] = [
-            {"ticker": dollar_matches[0].upper(), "name": dollar_matches[0]}
-        ]
-        return result
-    
-    # 2. Check for "hat" mentions (dogwifhat pattern)
-    if "hat" in tweet_text.lower():
-        result["ticker_format"] = "Use format [first letter + WH]"
-        result["name_format"] = "[subject] WIF HAT"
-        result["examples"] = [
-            {"ticker": "DWH", "name": "dog wif hat"},
-            {"ticker": "EWH", "name": "elon wif hat"}
-        ]
-    
-    # 3. Check for negative events
-    negative_words = ["pain", "wounded", "broken", "defeated", "stealing", 
-                      "shattered", "ruined", "damaged", "crushed"]
-    if any(word in tweet_text.lower() for word in negative_words):
-        result["ticker_format"] = "Use format based on subject name"
-        result["name_format"] = "JUSTICE FOR [subject]"
-        result["examples"] = [
-            {"ticker": "LARRY", "name": "justice for larry"},
-            {"ticker": "PEPE", "name": "justice for pepe"}
-        ]
-    
-    # 4. Check for death references
-    death_words = ["rip", "dead", "deceased", "gone", "perished", "buried", "died"]
-    if any(word in tweet_text.lower() for word in death_words):
-        result["ticker_format"] = "Use format RIP [initial letters]"
-        result["name_format"] = "RIP [subject]"
-        result["examples"] = [
-            {"ticker": "RIPVAL", "name": "rip val"},
-            {"ticker": "SARAHF", "name": "rip sarah"}
-        ]
-    
-    # 5. Check for style/AI transformations
-    style_words = ["style", "anime", "ghibli", "ai", "transform"]
-    if any(word in tweet_text.lower() for word in style_words):
-        result["ticker_format"] = "Use the style name"
-        result["name_format"] = "[style]ification"
-        result["examples"] = [
-            {"ticker": "ANIME", "name": "animification"},
-            {"ticker": "KNIT", "name": "knitification"}
-        ]
+    if "$" in tweet.text:
+        dollar_match = _DOLLAR_PATTERN.search(tweet.text)
+        if dollar_match:
+            token = dollar_match.group(1)
+            result["ticker_format"] = f"Use '{token.upper()}' as ticker"
+            result["name_format"] = f"Base name on '{token}'"
+            result["examples"] = [{"ticker": token.upper(), "name": token}]
+            return result
+    
+    # 2-5. hat / negative / death / style : la dernière catégorie présente l'emporte
+    tweet_lower = tweet.lower
+    for terms, ticker_format, name_format, examples in _PROMPT_TEXT_FORMATS:
+        if any(term in tweet_lower for term in terms):
+            result["ticker_format"] = ticker_format
+            result["name_format"] = name_format
+            result["examples"] = [{"ticker": ticker, "name": name} for ticker, name in examples]
+            break
     
     # Add image analysis based rules if media analysis is provided
     if media_analysis:
@@ -388,76 +518,271 @@ def get_prompt_instructions(tweet_text: str, media_analysis: Optional[Dict] = No
             result["examples"].append({"ticker": "MEME", "name": "memecoin"})
         
         # Check for anime/style detection
-        description = media_analysis.get("description", "").lower()
-        if any(style in description for style in ["anime", "cartoon", "pixar", "disney", "animated"]):
+        if description_tokens is not None:
+            description = description_tokens.lower
+        else:
+            description = media_analysis.get("description", "").lower()
+        if any(style in description for style in _PROMPT_MEDIA_STYLES):
             result["name_format"] = "[style]ification"
             result["ticker_format"] = "Use the style name"
             result["examples"].append({"ticker": "ANIME", "name": "animification"})
         
-        # Check for animals in image
+        # Check for animals (premier sujet qui en mentionne un) and persons in image
         subjects = media_analysis.get("subjects", [])
-        animals = ["dog", "cat", "bear", "frog", "bird", "monkey", "ape", "lion", "tiger", "animal"]
-        detected_animals = [subj for subj in subjects if any(animal in subj.lower() for animal in animals)]
+        animal = None
+        person_detected = False
+        for subj in subjects:
+            subj_lower = subj.lower()
+            if animal is None and any(candidate in subj_lower for candidate in _PROMPT_ANIMALS):
+                animal = subj
+            if not person_detected and "person" in subj_lower:
+                person_detected = True
         
-        if detected_animals:
-            animal = detected_animals[0]
+        if animal is not None:
+            # Check for "wif" pattern (animal wearing something) : l'objet retenu est celui
+            # de la dernière action qui mentionne à la fois un vêtement et un objet
+            worn_item = None
+            for action in reversed(media_analysis.get("actions", [])):
+                action_lower = action.lower()
+                if any(term in action_lower for term in _PROMPT_WEARING_TERMS):
+                    worn_item = next((item for item in _PROMPT_WORN_ITEMS if item in action_lower), None)
+                    if worn_item:
+                        break
             
-            # Check for "wif" pattern (animal wearing something)
-            actions = media_analysis.get("actions", [])
-            wearing_terms = ["wearing", "with", "hat", "clothes", "costume", "dressed"]
-            if any(term in " ".join(actions).lower() for term in wearing_terms):
-                worn_item = None
-                # Try to detect what the animal is wearing
-                for action in actions:
-                    if any(term in action.lower() for term in wearing_terms):
-                        worn_items = ["hat", "cap", "helmet", "glasses", "tie", "shirt", "coat"]
-                        for item in worn_items:
-                            if item in action.lower():
-                                worn_item = item
-                                break
-                
-                if worn_item:
-                    result["name_format"] = f"{animal} wif {worn_item}"
-                    result["ticker_format"] = f"{animal[0:1]}W{worn_item[0:1]}"
-                    result["examples"].append({"ticker": "DWH", "name": "dog wif hat"})
+            if worn_item:
+                result["name_format"] = f"{animal} wif {worn_item}"
+                result["ticker_format"] = f"{animal[0:1]}W{worn_item[0:1]}"
+                result["examples"].append({"ticker": "DWH", "name": "dog wif hat"})
         
         # Check for person detection
-        person_detected = any("person" in subj.lower() for subj in subjects)
         if person_detected:
             # Detect celebrities
-            celebrities = ["elon", "musk", "trump", "biden", "kanye", "Carti", "playboicarti", "kardashian", "bieber", "celebrity"]
-            celebrity_match = None
-            for celeb in celebrities:
-                if celeb in description.lower() or celeb in tweet_text.lower():
-                    celebrity_match = celeb
-                    break
+            celebrity_match = next(
+                (celeb for celeb in _PROMPT_CELEBRITIES if celeb in description or celeb in tweet_lower), None)
             
             if celebrity_match:
                 result["name_format"] = f"{celebrity_match} + relevant action/object"
                 result["ticker_format"] = f"{celebrity_match[:3].upper()}"
-                if celebrity_match == "elon":
-                    result["examples"].append({"ticker": "ELON", "name": "elonking"})
-                elif celebrity_match == "trump":
-                    result["examples"].append({"ticker": "TRM", "name": "trumpcycle"})
+                example = _PROMPT_CELEBRITY_EXAMPLES.get(celebrity_match)
+                if example:
+                    result["examples"].append(dict(example))
         
         # Check for negative or tragic imagery
-        emotional_themes = media_analysis.get("emotional_themes", [])
-        negative_emotions = ["sadness", "fear", "anger", "disgust", "tragedy", "suffering"]
-        if any(emotion in " ".join(emotional_themes).lower() for emotion in negative_emotions):
+        emotional_themes = " ".join(media_analysis.get("emotional_themes", [])).lower()
+        if any(emotion in emotional_themes for emotion in _PROMPT_NEGATIVE_EMOTIONS):
             # Try to find a subject to apply "justice for" format
-            if subjects and len(subjects) > 0:
+            if subjects:
                 subject = subjects[0].split()[0]  # Take first word of first subject
                 result["name_format"] = f"justice for {subject}"
                 result["ticker_format"] = subject.upper()
                 result["examples"].append({"ticker": "LARRY", "name": "justice for larry"})
         
         # Check for death-related imagery
-        death_related = ["death", "funeral", "grave", "deceased", "memorial", "rip"]
-        if any(term in description.lower() for term in death_related):
-            if subjects and len(subjects) > 0:
+        if any(term in description for term in _PROMPT_DEATH_IMAGERY):
+            if subjects:
                 subject = subjects[0].split()[0]  # Take first word of first subject
                 result["name_format"] = f"rip {subject}"
                 result["ticker_format"] = f"RIP{subject[:3].upper()}"
                 result["examples"].append({"ticker": "RIPVAL", "name": "rip val"})
     
-    return result
\ No newline at end of file
+    return result
+
+
+def format_guidance_from_instructions(instructions: Dict) -> Dict[str, Any]:
+    """
+    Convertit le résultat de get_prompt_instructions en consignes de format
+    (format_type, ticker_format, name_format, example_ticker, example_name)
+    """
+    result = {
+        "format_type": "standard" if not instructions["base_instruction"] else "custom",
+        "ticker_format": instructions["ticker_format"],
+        "name_format": instructions["name_format"],
+        "example_ticker": None,
+        "example_name": None
+    }
+
+    # Add example if available
+    if instructions["examples"]:
+        first_example = instructions["examples"][0]
+        result["example_ticker"] = first_example.get("ticker", "")
+        result["example_name"] = first_example.get("name", "")
+
+    return result
+
+
+class ConditionMatch:
+    """
+    Condition déclenchée par un tweet, calculée une seule fois puis transmise
+    aux étapes suivantes (format, génération, stockage)
+
+    Attributes:
+        condition_id: Identifiant de la règle (voir TEXT_RULES / MEDIA_RULES)
+        source: "text" ou "media" selon l'endroit où le terme a été trouvé
+        term: Terme du vocabulaire qui a déclenché la règle
+        span: Position (début, fin) du terme dans le texte normalisé
+        instruction: Instruction ajoutée au prompt de génération
+        prompt_instructions: Résultat équivalent à get_prompt_instructions
+        format_guidance: Consignes de format dérivées de prompt_instructions
+    """
+
+    __slots__ = ("condition_id", "source", "term", "span", "instruction",
+                 "prompt_instructions", "format_guidance")
+
+    def __init__(self, condition_id: str, source: str, term: str, span: Tuple[int, int],
+                 instruction: str, prompt_instructions: Optional[Dict] = None,
+                 format_guidance: Optional[Dict] = None):
+        self.condition_id = condition_id
+        self.source = source
+        self.term = term
+        self.span = span
+        self.instruction = instruction
+        self.prompt_instructions = prompt_instructions
+        self.format_guidance = format_guidance
+
+    def __repr__(self) -> str:
+        return (f"ConditionMatch(condition_id={self.condition_id!r}, source={self.source!r}, "
+                f"term={self.term!r}, span={self.span!r})")
+
+
+def evaluate_conditions(tweet_text: Union[str, TokenizedText], media_analysis: Optional[Dict] = None,
+                        with_guidance: bool = True) -> Optional[ConditionMatch]:
+    """
+    Évalue une seule fois les conditions d'un tweet : d'abord le texte,
+    puis la description du média si aucune condition textuelle n'est trouvée
+
+    Args:
+        tweet_text: Texte du tweet (ou TokenizedText déjà construit)
+        media_analysis: Analyse du premier média (optionnel)
+        with_guidance: Calculer aussi prompt_instructions et format_guidance
+
+    Returns:
+        ConditionMatch, ou None si le tweet ne déclenche aucune condition
+    """
+    if not METRICS.enabled:
+        return _evaluate_conditions(tweet_text, media_analysis, with_guidance)
+
+    start = time.perf_counter()
+    match = _evaluate_conditions(tweet_text, media_analysis, with_guidance)
+    elapsed = time.perf_counter() - start
+    if match is None:
+        METRICS.record_evaluation(None, None, elapsed)
+    else:
+        METRICS.record_evaluation(match.condition_id, match.source, elapsed)
+    return match
+
+
+def _evaluate_conditions(tweet_text: Union[str, TokenizedText], media_analysis: Optional[Dict],
+                         with_guidance: bool) -> Optional[ConditionMatch]:
+    """Corps de evaluate_conditions (sans instrumentation)"""
+    rules = RULES
+    tweet = TokenizedText.of(tweet_text)
+    description = None
+    source = tweet
+    engine = rules.text
+    found = _match(rules, engine, tweet)
+
+    if found is None and media_analysis and "description" in media_analysis:
+        description = source = TokenizedText.of(media_analysis["description"])
+        engine = rules.media
+        found = _match(rules, engine, description)
+
+    if found is None:
+        return None
+
+    index, term, hit = found
+    match = ConditionMatch(
+        condition_id=engine.rules[index][0],
+        source=engine.namespace,
+        term=term,
+        span=char_span(source.normalized, hit),
+        instruction=engine.instruction(index, term),
+    )
+
+    if with_guidance:
+        # Seule une condition textuelle sert d'instruction de base (comme get_prompt_instructions)
+        basic_instruction = match.instruction if engine is rules.text else None
+        match.prompt_instructions = _build_prompt_instructions(
+            tweet, media_analysis, basic_instruction, description)
+        match.format_guidance = format_guidance_from_instructions(match.prompt_instructions)
+
+    return match
+
+
+# Taille par défaut des lots lus par iter_evaluate
+BATCH_CHUNK_SIZE = 1024
+
+
+def iter_evaluate(tweets: Iterable, chunk_size: int = BATCH_CHUNK_SIZE,
+                  rules: Optional[RuleSet] = None) -> Iterator[Optional[Tuple[str, str]]]:
+    """
+    Évalue un flux de tweets et produit, dans le même ordre, (condition_id, instruction)
+    ou None pour chaque tweet sans condition
+
+    Le flux est lu par lots de chunk_size : la mémoire reste constante quelle que soit
+    la taille de l'entrée. Dans un lot, les textes identiques (retweets, doublons)
+    ne sont normalisés et analysés qu'une seule fois. Tout le flux est évalué avec
+    les règles actives au premier tweet lu, même si elles sont rechargées entre-temps.
+
+    Args:
+        tweets: Textes, ou tuples (texte, description du média ou None)
+        chunk_size: Nombre de tweets lus à la fois
+        rules: Règles à utiliser (défaut: règles actives, voir rule_whatif.py)
+    """
+    iterator = iter(tweets)
+    if rules is None:
+        rules = RULES
+    text_engine = rules.text
+    media_engine = rules.media
+    find_all = rules.matcher.find_all
+
+    def evaluate(engine, text):
+        text_lower = normalize_text(text)
+        tokens = text_lower.split()
+        if not engine.may_match(tokens, text_lower):
+            return None
+        found = engine.match(find_all(tokens), text_lower)
+        if found is None:
+            return None
+        return engine.rules[found[0]][0], engine.instruction(found[0], found[1])
+
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+
+        text_results = {}
+        media_results = {}
+        for item in chunk:
+            if isinstance(item, str):
+                text, description = item, None
+            else:
+                text, description = item
+
+            result = text_results.get(text, text_results)
+            if result is text_results:
+                result = text_results[text] = evaluate(text_engine, text)
+
+            if result is None and description:
+                result = media_results.get(description, media_results)
+                if result is media_results:
+                    result = media_results[description] = evaluate(media_engine, description)
+
+            yield result
+
+
+def evaluate_batch(texts: Iterable[str], media_descriptions: Optional[Iterable[Optional[str]]] = None,
+                   chunk_size: int = BATCH_CHUNK_SIZE, rules: Optional[RuleSet] = None) -> List[Optional[Tuple[str, str]]]:
+    """
+    Évalue un lot de tweets en un seul appel (voir iter_evaluate)
+
+    Args:
+        texts: Textes des tweets
+        media_descriptions: Description du premier média de chaque tweet (None si absent)
+        chunk_size: Nombre de tweets traités à la fois
+        rules: Règles à utiliser (défaut: règles actives)
+
+    Returns:
+        Liste de (condition_id, instruction) ou None, dans l'ordre des textes
+    """
+    tweets = texts if media_descriptions is None else zip(texts, media_descriptions)
+    return list(iter_evaluate(tweets, chunk_size, rules))
@@ -0,0 +1,144 @@
+# condition_metrics.py
+import os
+import json
+import time
+import logging
+from bisect import bisect_left
+from typing import Any, Dict, Optional
+
+from config import Config
+
+# Bornes supérieures (en microsecondes) des classes de l'histogramme des temps d'évaluation
+LATENCY_BUCKETS_US = (5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+# Codes de statut qui signalent un rejet par le générateur (voir status_codes.py)
+REJECTION_STATUS_CODES = (801, 802, 803, 804)
+
+
+class ConditionMetrics:
+    """
+    Compteurs du moteur de conditions : conditions déclenchées (par source texte/média),
+    histogramme des temps d'évaluation et rejets en aval de chaque condition
+
+    Désactivé, le moteur ne fait qu'un test sur `enabled` par tweet.
+    """
+
+    def __init__(self, enabled: bool = False, export_path: Optional[str] = None,
+                 export_interval: float = 60.0):
+        self.logger = logging.getLogger(__name__)
+        self.enabled = enabled
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self.reset()
+
+    def reset(self) -> None:
+        """Remet tous les compteurs à zéro"""
+        self.started_at = time.time()
+        self.evaluations = 0
+        self.no_match = 0
+        # condition_id -> {"text": n, "media": n}
+        self.hits: Dict[str, Dict[str, int]] = {}
+        # Une classe par borne, plus une pour les valeurs au-delà de la dernière
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS_US) + 1)
+        self.latency_total = 0.0
+        # condition_id -> {"generated": n, "rejected": n, "status_codes": {code: n}}
+        self.outcomes: Dict[str, Dict[str, Any]] = {}
+        self._last_export = time.monotonic()
+
+    def record_evaluation(self, condition_id: Optional[str], source: Optional[str], elapsed: float) -> None:
+        """
+        Enregistre l'évaluation d'un tweet
+
+        Args:
+            condition_id: Condition déclenchée (None si aucune)
+            source: "text" ou "media"
+            elapsed: Durée de l'évaluation en secondes
+        """
+        self.evaluations += 1
+        if condition_id is None:
+            self.no_match += 1
+        else:
+            by_source = self.hits.get(condition_id)
+            if by_source is None:
+                by_source = self.hits[condition_id] = {"text": 0, "media": 0}
+            by_source[source] += 1
+
+        micros = elapsed * 1e6
+        self.latency_counts[bisect_left(LATENCY_BUCKETS_US, micros)] += 1
+        self.latency_total += elapsed
+
+        self.maybe_export()
+
+    def record_outcome(self, condition_id: str, status_code: Optional[int] = None) -> None:
+        """
+        Enregistre le résultat de la génération pour un tweet éligible
+
+        Args:
+            condition_id: Condition qui a rendu le tweet éligible
+            status_code: Code de statut retourné par le générateur (801-804 = rejet)
+        """
+        outcome = self.outcomes.get(condition_id)
+        if outcome is None:
+            outcome = self.outcomes[condition_id] = {"generated": 0, "rejected": 0, "status_codes": {}}
+        if status_code in REJECTION_STATUS_CODES:
+            outcome["rejected"] += 1
+            codes = outcome["status_codes"]
+            codes[str(status_code)] = codes.get(str(status_code), 0) + 1
+        else:
+            outcome["generated"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Retourne l'état des compteurs sous forme de dictionnaire sérialisable en JSON"""
+        bounds = [f"<={bound}us" for bound in LATENCY_BUCKETS_US] + [f">{LATENCY_BUCKETS_US[-1]}us"]
+
+        outcomes = {}
+        for condition_id, outcome in self.outcomes.items():
+            total = outcome["generated"] + outcome["rejected"]
+            outcomes[condition_id] = dict(
+                outcome,
+                status_codes=dict(outcome["status_codes"]),
+                rejection_rate=outcome["rejected"] / total if total else 0.0,
+            )
+
+        return {
+            "started_at": self.started_at,
+            "timestamp": time.time(),
+            "evaluations": self.evaluations,
+            "no_match": self.no_match,
+            "hits": {condition_id: dict(by_source) for condition_id, by_source in self.hits.items()},
+            "latency_histogram": dict(zip(bounds, self.latency_counts)),
+            "latency_mean_us": self.latency_total * 1e6 / self.evaluations if self.evaluations else 0.0,
+            "outcomes": outcomes,
+        }
+
+    def export(self, path: Optional[str] = None) -> str:
+        """Écrit un instantané JSON (remplacement atomique du fichier) et retourne son chemin"""
+        path = path or self.export_path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+        self._last_export = time.monotonic()
+        return path
+
+    def maybe_export(self) -> None:
+        """Exporte un instantané si l'intervalle d'export est écoulé"""
+        if not self.export_path or time.monotonic() - self._last_export < self.export_interval:
+            return
+        try:
+            self.export()
+        except OSError as e:
+            self.logger.warning(f"Export des métriques impossible: {e}")
+            self._last_export = time.monotonic()
+
+
+# Instance partagée par le moteur de conditions et le simulateur
+METRICS = ConditionMetrics(
+    enabled=Config.CONDITION_METRICS_ENABLED,
+    export_path=Config.CONDITION_METRICS_FILE,
+    export_interval=Config.CONDITION_METRICS_EXPORT_INTERVAL,
+)
@@ -15,25 +15,89 @@ class Config:
     # Modèles OpenAI
     OPENAI_TEXT_MODEL = "gpt-4"  # Pour la génération de meme coins
     OPENAI_VISION_MODEL = "gpt-4o"  # Pour l'analyse des images (remplace gpt-4-vision-preview)
+    # Cache persistant des analyses Vision, relatif au répertoire de données (vide pour désactiver)
+    VISION_CACHE_FILE = os.getenv('VISION_CACHE_FILE', 'vision_cache.sqlite3')
+    VISION_CACHE_TTL = float(os.getenv('VISION_CACHE_TTL', 7 * 24 * 3600))  # secondes
+    VISION_CACHE_MAX_ENTRIES = int(os.getenv('VISION_CACHE_MAX_ENTRIES', 10000))
+    # Télécharger les médias pour reconnaître une même image publiée sous plusieurs URLs
+    VISION_CACHE_HASH_CONTENT = os.getenv('VISION_CACHE_HASH_CONTENT', 'true').lower() == 'true'
+    VISION_CACHE_MAX_DOWNLOAD_BYTES = int(os.getenv('VISION_CACHE_MAX_DOWNLOAD_BYTES', 20 * 1024 * 1024))
+    # Réutiliser l'analyse d'une image proche (distance de Hamming des dHash sur 64 bits, -1 pour désactiver)
+    VISION_NEAR_DUPLICATE_DISTANCE = int(os.getenv('VISION_NEAR_DUPLICATE_DISTANCE', 6))
+    # Extraction de la première frame des vidéos : octets téléchargés au plus, par blocs (requêtes Range)
+    VIDEO_MAX_FETCH_BYTES = int(os.getenv('VIDEO_MAX_FETCH_BYTES', 8 * 1024 * 1024))
+    VIDEO_FETCH_BLOCK_BYTES = int(os.getenv('VIDEO_FETCH_BLOCK_BYTES', 256 * 1024))
+    VIDEO_FRAME_JPEG_QUALITY = int(os.getenv('VIDEO_FRAME_JPEG_QUALITY', 95))
+    # Analyser la vignette fournie par Twitter (preview_image_url) plutôt que la première frame
+    VIDEO_USE_PREVIEW_IMAGE = os.getenv('VIDEO_USE_PREVIEW_IMAGE', 'true').lower() == 'true'
+    # Sans vignette : planche contact d'au plus VIDEO_KEYFRAMES scènes (1 = première frame seule),
+    # choisies parmi VIDEO_KEYFRAME_CANDIDATES instants par détection des changements de scène
+    VIDEO_KEYFRAMES = int(os.getenv('VIDEO_KEYFRAMES', 6))
+    VIDEO_KEYFRAME_CANDIDATES = int(os.getenv('VIDEO_KEYFRAME_CANDIDATES', 12))
+    VIDEO_SCENE_CHANGE_THRESHOLD = float(os.getenv('VIDEO_SCENE_CHANGE_THRESHOLD', 0.3))  # Bhattacharyya, 0 à 1
+    VIDEO_KEYFRAMES_MAX_FETCH_BYTES = int(os.getenv('VIDEO_KEYFRAMES_MAX_FETCH_BYTES', 32 * 1024 * 1024))
+    VIDEO_CONTACT_SHEET_TILE_WIDTH = int(os.getenv('VIDEO_CONTACT_SHEET_TILE_WIDTH', 512))
     
     # Comptes à surveiller (IDs et usernames)
     CELEBRITY_ACCOUNTS = [
-        {"username": "elonmusk", "id": "44196397"},
-        {"username": "snoopdogg", "id": "36532825"},
-        {"username": "kanyewest", "id": "169686021"},
-        {"username": "justinbieber", "id": "27260086"},
-        {"username": "rihanna", "id": "79293791"},
-        {"username": "kevinhart4real", "id": "26257166"},
-        {"username": "kimkardashian", "id": "25365536"},
-        {"username": "taylorswift13", "id": "17919972"},
-        {"username": "cristiano", "id": "155659213"},
-        {"username": "Drake", "id": "27195114"}
+        {"username": "elonmusk", "id": "44196397", "name": "Elon Musk"},
+        {"username": "snoopdogg", "id": "36532825", "name": "Snoop Dogg"},
+        {"username": "kanyewest", "id": "169686021", "name": "Kanye West"},
+        {"username": "justinbieber", "id": "27260086", "name": "Justin Bieber"},
+        {"username": "rihanna", "id": "79293791", "name": "Rihanna"},
+        {"username": "kevinhart4real", "id": "26257166", "name": "Kevin Hart"},
+        {"username": "kimkardashian", "id": "25365536", "name": "Kim Kardashian"},
+        {"username": "taylorswift13", "id": "17919972", "name": "Taylor Swift"},
+        {"username": "cristiano", "id": "155659213", "name": "Cristiano Ronaldo"},
+        {"username": "Drake", "id": "27195114", "name": "Drake"}
     ]
     
     # Configuration de l'API Twitter
     TWEETS_FETCH_LIMIT = 50
     POLLING_INTERVAL_SECONDS = 60
     
+    # Cache des résultats du moteur de conditions (nombre d'entrées, 0 pour désactiver)
+    RULE_CACHE_SIZE = int(os.getenv('RULE_CACHE_SIZE', 4096))
+    
+    # Fichier des règles du moteur de conditions (vocabulaires, priorités, instructions)
+    CONDITION_RULES_FILE = os.getenv(
+        'CONDITION_RULES_FILE',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "condition_rules.json"))
+    # Intervalle (secondes) de vérification du fichier des règles pour le rechargement à chaud
+    CONDITION_RULES_RELOAD_INTERVAL = float(os.getenv('CONDITION_RULES_RELOAD_INTERVAL', 2))
+    
+    # Traitement par lots spaCy (TweetAnalyzer.extract_keywords_batch)
+    SPACY_BATCH_SIZE = int(os.getenv('SPACY_BATCH_SIZE', 64))
+    SPACY_N_PROCESS = int(os.getenv('SPACY_N_PROCESS', 1))
+    # Nouvelles chaînes tolérées dans le vocabulaire spaCy (hashtags, cashtags, mentions...)
+    # avant de recharger le pipeline depuis sa copie initiale (0 pour ne jamais recharger)
+    NLP_MAX_NEW_STRINGS = int(os.getenv('NLP_MAX_NEW_STRINGS', 100000))
+    # Entités connues (gazetteer.Gazetteer) : type d'entité des vocabulaires de conditions,
+    # en plus des comptes de CELEBRITY_ACCOUNTS et des meme coins du fichier d'exemples
+    GAZETTEER_CONDITION_LABELS = {
+        "elon": "PERSON", "kanye": "PERSON", "trump": "PERSON",
+        "elon_brand": "ORG", "social_brand": "ORG", "mcdonald": "ORG", "kfc": "ORG",
+        "meme_coin": "PRODUCT", "crypto": "PRODUCT",
+    }
+    GAZETTEER_EXAMPLES_FILE = os.getenv(
+        'GAZETTEER_EXAMPLES_FILE',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "exemple_ticker.txt"))
+    # Sans NER spaCy pour les tweets dont tous les mots en majuscule initiale sont des
+    # entités connues du gazetteer (désactivé par défaut : les entités spaCy restent identiques)
+    GAZETTEER_SKIP_NER = os.getenv('GAZETTEER_SKIP_NER', 'false').lower() == 'true'
+    # Cache persistant des sorties spaCy, relatif au répertoire de données (vide pour désactiver)
+    NLP_CACHE_FILE = os.getenv('NLP_CACHE_FILE', 'nlp_cache.sqlite3')
+    # Workers du pool d'analyse (analysis_pool.AnalysisPool, 0 = un par cœur)
+    ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', 0))
+    # Composants spaCy non chargés : l'analyse ne lit pas les lemmes. Le "parser" reste
+    # chargé : il fixe les débuts de phrase, qui empêchent le NER de produire des entités
+    # à cheval sur deux phrases. L'exclure ('parser,lemmatizer') est une option à activer
+    # explicitement : les entités des tweets de plusieurs phrases peuvent alors changer.
+    SPACY_EXCLUDED_COMPONENTS = [
+        name.strip() for name in os.getenv('SPACY_EXCLUDED_COMPONENTS', 'lemmatizer').split(',')
+        if name.strip()
+    ]
+    
     # Configuration des thèmes et déclencheurs
     TRIGGER_THEMES = {
         "catastrophe_naturelle": [
@@ -78,4 +142,15 @@ class Config:
     ]
     
     # Dossier pour le stockage des données
-    DATA_DIR = "data"
\ No newline at end of file
+    DATA_DIR = "data"
+    
+    # Métriques du moteur de conditions (désactivées par défaut)
+    CONDITION_METRICS_ENABLED = os.getenv('CONDITION_METRICS_ENABLED', 'false').lower() == 'true'
+    CONDITION_METRICS_FILE = os.path.join(DATA_DIR, "condition_metrics.json")
+    CONDITION_METRICS_EXPORT_INTERVAL = 60  # Secondes entre deux instantanés JSON
+
+    # Suivi mémoire des processus de longue durée (désactivé par défaut)
+    MEMORY_MONITOR_ENABLED = os.getenv('MEMORY_MONITOR_ENABLED', 'false').lower() == 'true'
+    MEMORY_MONITOR_FILE = os.path.join(DATA_DIR, "memory_usage.json")
+    MEMORY_MONITOR_INTERVAL = 60  # Secondes entre deux échantillons
+    MEMORY_MONITOR_HISTORY = 1440  # Échantillons conservés (24 h à un par minute)
@@ -0,0 +1,176 @@
+# gazetteer.py
+import re
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from config import Config
+from phrase_matcher import PhraseMatcher
+from tokenized_text import TokenizedText, normalize_text
+
+# Noms de meme coins dans le fichier d'exemples ('"ticker": "…"' / '"name": "…"', guillemets « » compris)
+_EXAMPLE_FIELD = re.compile(r'"(?:ticker|name)"\s*:\s*["«]\s*([^"»\n]+?)\s*["»]')
+
+# Mots du texte normalisé, pour retrouver la forme d'origine d'une entité
+_WORD = re.compile(r"\S+")
+
+
+class Gazetteer:
+    """
+    Index des entités connues : comptes de célébrités, marques, meme coins
+
+    Les noms sont comparés mot à mot au texte normalisé (frontières de mots), toutes
+    les occurrences étant trouvées en un seul passage de l'automate quel que soit
+    le nombre de noms. Une entité trouvée a la même forme qu'une entité spaCy
+    ({"text", "type"}) : le texte est celui du tweet, ou le nom canonique
+    (ex: "@elonmusk" -> "Elon Musk").
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._matcher = PhraseMatcher()
+        self.size = 0
+
+    def add(self, name: str, label: str, canonical: Optional[str] = None) -> None:
+        """
+        Ajoute un nom
+
+        Args:
+            name: Nom recherché (un ou plusieurs mots, normalisé ici)
+            label: Type d'entité (PERSON, ORG, PRODUCT...)
+            canonical: Forme retournée à la place du texte du tweet (None: texte du tweet)
+        """
+        words = normalize_text(name).split()
+        # Un seul caractère ('x') désigne trop souvent autre chose qu'une marque
+        if not words or len("".join(words)) < 2:
+            return
+        self._matcher.add(words, (label, canonical))
+        self.size += 1
+
+    @classmethod
+    def from_config(cls, config: Config = Config, vocabularies: Optional[Dict[str, Iterable[str]]] = None,
+                    examples_file: Optional[str] = None) -> "Gazetteer":
+        """
+        Construit l'index à partir de la configuration
+
+        - CELEBRITY_ACCOUNTS : nom et nom d'utilisateur de chaque compte (PERSON)
+        - GAZETTEER_CONDITION_LABELS : vocabulaires des conditions de marques, personnes
+          et cryptomonnaies (défaut: vocabulaires du texte des règles actives), ainsi que
+          le cashtag de chaque cryptomonnaie ('$doge')
+        - exemples de meme coins (GAZETTEER_EXAMPLES_FILE) : cashtags des tickers et noms d'un mot
+
+        Args:
+            config: Configuration
+            vocabularies: Vocabulaire de chaque condition
+            examples_file: Fichier d'exemples (défaut: config.GAZETTEER_EXAMPLES_FILE)
+        """
+        gazetteer = cls()
+        for account in config.CELEBRITY_ACCOUNTS:
+            name = account.get("name") or account["username"]
+            gazetteer.add(name, "PERSON")
+            gazetteer.add(account["username"], "PERSON", canonical=name)
+
+        if vocabularies is None:
+            from condition_handler import RULES
+            vocabularies = RULES.text_vocabularies
+        for condition_id, label in config.GAZETTEER_CONDITION_LABELS.items():
+            for term in sorted(vocabularies.get(condition_id, ())):
+                gazetteer.add(term, label)
+                if label == "PRODUCT":
+                    gazetteer.add("$" + term, label)
+
+        path = config.GAZETTEER_EXAMPLES_FILE if examples_file is None else examples_file
+        if path:
+            for coin in gazetteer._read_examples(path):
+                gazetteer.add("$" + coin, "PRODUCT")
+
+        gazetteer._matcher.build()
+        return gazetteer
+
+    def _read_examples(self, path: str) -> List[str]:
+        """Tickers et noms d'un seul mot des exemples de meme coins (sans doublons, en minuscules)"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+        except OSError as e:
+            self.logger.warning(f"Exemples de meme coins illisibles ({path}): {e}")
+            return []
+        coins = []
+        for value in _EXAMPLE_FIELD.findall(content):
+            coin = value.strip().lower()
+            if coin and " " not in coin and coin not in coins:
+                coins.append(coin)
+        return coins
+
+    def find(self, text: Union[str, TokenizedText]) -> List[Dict[str, str]]:
+        """
+        Entités connues présentes dans un texte, dans l'ordre du texte
+
+        Les occurrences qui se chevauchent sont départagées au profit de la plus
+        longue ('kanye west' plutôt que 'kanye').
+
+        Returns:
+            Liste de {"text", "type"}
+        """
+        tokenized = TokenizedText.of(text)
+        spans = self._spans(tokenized)
+        if not spans:
+            return []
+
+        original = _original_text(tokenized)
+        offsets = None
+        entities = []
+        for start, end, label, canonical in spans:
+            if canonical is None and original is not None:
+                if offsets is None:
+                    offsets = [match.span() for match in _WORD.finditer(tokenized.normalized)]
+                canonical = original[offsets[start][0]:offsets[end - 1][1]]
+            elif canonical is None:
+                canonical = " ".join(tokenized.tokens[start:end])
+            entities.append({"text": canonical, "type": label})
+        return entities
+
+    def covers_candidates(self, text: Union[str, TokenizedText]) -> bool:
+        """
+        True si des entités connues couvrent tous les mots candidats du texte
+
+        Un mot candidat commence par une majuscule dans le texte d'origine : c'est là
+        que le NER spaCy pourrait trouver une entité que le gazetteer ignore ('Paris'
+        dans 'Tesla opens in Paris'). Sans position fiable dans le texte d'origine,
+        retourne False.
+        """
+        tokenized = TokenizedText.of(text)
+        spans = self._spans(tokenized)
+        original = _original_text(tokenized)
+        if not spans or original is None:
+            return False
+        covered = set()
+        for start, end, _, _ in spans:
+            covered.update(range(start, end))
+        return all(
+            position in covered or not original[match.start()].isupper()
+            for position, match in enumerate(_WORD.finditer(tokenized.normalized))
+        )
+
+    def _spans(self, tokenized: TokenizedText) -> List[Tuple[int, int, str, Optional[str]]]:
+        """Occurrences retenues (début et fin en mots, type, forme canonique), dans l'ordre du texte"""
+        hits = self._matcher.find_all(tokenized.tokens)
+        # Plus à gauche d'abord, puis plus long
+        hits.sort(key=lambda hit: (hit[0], hit[0] - hit[1]))
+        spans: List[Tuple[int, int, str, Optional[str]]] = []
+        end_of_last = 0
+        for start, end, (label, canonical) in hits:
+            if start < end_of_last:
+                continue
+            spans.append((start, end, label, canonical))
+            end_of_last = end
+        return spans
+
+
+def _original_text(tokenized: TokenizedText) -> Optional[str]:
+    """
+    Texte d'origine, si les positions du texte normalisé s'y reportent
+
+    Le texte normalisé a la même longueur que le texte d'origine, sauf pour de rares
+    caractères Unicode dont la minuscule est plus longue.
+    """
+    return tokenized.text if len(tokenized.text) == len(tokenized.normalized) else None
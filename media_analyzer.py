@@ -1,23 +1,161 @@
 #media_analyzer.py
 import logging
 import requests
-import tempfile
-import os
 import json
+import base64
+import hashlib
+import threading
 from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlsplit
 import cv2
 from openai import OpenAI
 from config import Config
+from condition_handler import detect_trigger_themes
+from vision_cache import VisionCache
+from image_hash import HammingIndex, dhash
+from video_stream import RangedHttpStream, contact_sheet, read_first_frame, sample_keyframes
+
+# Prompt de l'analyse d'image (sa modification invalide le cache Vision)
+VISION_PROMPT = """
+            Analyze this image in detail. Identify:
+            1. Main subjects (people, objects, places)
+            2. Actions or events depicted
+            3. Overall mood or tone
+            4. Any visible text in the image
+            5. Emotional themes (joy, sadness, fear, etc.)
+            6. Whether it's a meme or humorous image
+            7. If the image shows a disaster, conflict, or crisis situation
+            
+            Respond in JSON format with this structure:
+            {
+                "description": "Complete description of the image",
+                "subjects": ["List of main subjects"],
+                "actions": ["List of actions or events"],
+                "mood": "Overall mood",
+                "visible_text": ["List of visible texts"],
+                "emotional_themes": ["List of emotional themes"],
+                "is_meme": true/false,
+                "is_crisis": true/false,
+                "crisis_type": "Type of crisis if applicable"
+            }
+            """
 
 class MediaAnalyzer:
     """Classe pour analyser les médias des tweets avec OpenAI Vision"""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, vision_cache: Optional[VisionCache] = None):
         self.config = config
         self.logger = logging.getLogger(__name__)
         
         # Initialiser le client OpenAI
         self.client = OpenAI(api_key=config.OPENAI_API_KEY)
+
+        # Analyses déjà obtenues, par URL normalisée, par contenu du média et par image proche
+        self.vision_cache = vision_cache
+        prompt_hash = hashlib.blake2b(VISION_PROMPT.encode(), digest_size=6).hexdigest()
+        self.vision_version = f"{config.OPENAI_VISION_MODEL}/{prompt_hash}"
+        # Hashes perceptuels du cache, complétés à chaque recherche par ceux
+        # enregistrés depuis (autres processus compris)
+        self.image_index = HammingIndex()
+        self._image_index_last_id = 0
+        self._image_index_lock = threading.Lock()
+
+    def _cached_analysis(self, image_url: str) -> Tuple[Optional[bytes], Optional[bytes], Optional[int],
+                                                        Optional[Dict[str, Any]]]:
+        """
+        Recherche une analyse dans le cache Vision, par URL, par contenu, puis par image
+        proche (hash perceptuel à distance <= VISION_NEAR_DUPLICATE_DISTANCE)
+
+        Returns:
+            (clé de l'URL, clé du contenu, hash perceptuel, analyse enregistrée ou None) ;
+            les clés et le hash servent à enregistrer l'analyse obtenue en cas d'échec
+            (None si non calculables)
+        """
+        if self.vision_cache is None:
+            return None, None, None, None
+
+        # Une URL data: est son propre contenu (frames extraites des vidéos)
+        url_key = None
+        if not image_url.startswith("data:"):
+            url_key = VisionCache.url_key(self.vision_version, image_url)
+            cached = self.vision_cache.get(url_key, kind="url")
+            if cached is not None:
+                self._log_cache_hit("URL", image_url)
+                return url_key, None, None, cached
+
+        content = self._media_content(image_url)
+        if content is None:
+            self.vision_cache.record_miss()
+            return url_key, None, None, None
+        content_key = VisionCache.content_key(self.vision_version, content)
+        cached = self.vision_cache.get(content_key, kind="content")
+        if cached is not None:
+            self._log_cache_hit("contenu", image_url)
+            # La prochaine fois, l'URL suffira
+            self.vision_cache.put(cached, url_key)
+            return url_key, content_key, None, cached
+
+        image_hash = None
+        if self.config.VISION_NEAR_DUPLICATE_DISTANCE >= 0:
+            image_hash = dhash(content)
+            if image_hash is not None:
+                cached = self._near_duplicate_analysis(image_hash)
+        if cached is not None:
+            self._log_cache_hit("image proche", image_url)
+            # Cette variante de l'image est désormais connue par son URL et son contenu
+            self.vision_cache.put(cached, url_key, content_key)
+        else:
+            self.vision_cache.record_miss()
+        return url_key, content_key, image_hash, cached
+
+    def _near_duplicate_analysis(self, image_hash: int) -> Optional[Dict[str, Any]]:
+        """Analyse de l'image déjà analysée la plus proche (recadrée, redimensionnée, recompressée)"""
+        with self._image_index_lock:
+            for item_id, stored_hash in self.vision_cache.image_hashes(self.vision_version,
+                                                                       after=self._image_index_last_id):
+                self.image_index.add(stored_hash, item_id)
+                self._image_index_last_id = item_id
+            matches = self.image_index.search(image_hash, self.config.VISION_NEAR_DUPLICATE_DISTANCE)
+
+        for distance, item_id in matches:
+            key = self.vision_cache.image_hash_key(item_id)
+            cached = self.vision_cache.get(key, kind="similar") if key is not None else None
+            if cached is not None:
+                self.logger.info(f"Image proche d'une image déjà analysée (distance {distance})")
+                return cached
+        return None
+
+    def _media_content(self, image_url: str) -> Optional[bytes]:
+        """Contenu d'un média pour le cache Vision (None si indisponible ou trop volumineux)"""
+        if image_url.startswith("data:"):
+            try:
+                return base64.b64decode(image_url.partition(",")[2])
+            except ValueError:
+                return None
+        if not self.config.VISION_CACHE_HASH_CONTENT:
+            return None
+
+        max_bytes = self.config.VISION_CACHE_MAX_DOWNLOAD_BYTES
+        try:
+            with requests.get(image_url, stream=True, timeout=10) as response:
+                response.raise_for_status()
+                content = bytearray()
+                for chunk in response.iter_content(chunk_size=65536):
+                    content += chunk
+                    if len(content) > max_bytes:
+                        self.logger.info(f"Média trop volumineux pour le cache Vision: {image_url}")
+                        return None
+                return bytes(content)
+        except requests.RequestException as e:
+            self.logger.info(f"Contenu du média indisponible pour le cache Vision ({image_url}): {e}")
+            return None
+
+    def _log_cache_hit(self, kind: str, image_url: str) -> None:
+        stats = self.vision_cache.stats()
+        self.logger.info(f"Analyse Vision lue dans le cache ({kind}): {image_url[:100]} "
+                         f"- taux de succès {stats['hit_rate']:.0%} "
+                         f"({stats['url_hits']} par URL, {stats['content_hits']} par contenu, "
+                         f"{stats['similar_hits']} par image proche, {stats['misses']} échecs)")
         
     def is_valid_image_url(self, url: str) -> bool:
         """
@@ -101,12 +239,13 @@ class MediaAnalyzer:
         # If not a recognized format, return original
         return tweet_url
     
-    def analyze_image(self, image_url: str) -> Dict[str, Any]:
+    def analyze_image(self, image_url: str, context: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyzes an image using OpenAI Vision
         
         Args:
             image_url: URL of the image to analyze
+            context: Text appended to the prompt (e.g. the image is a contact sheet of video frames)
             
         Returns:
             Results of the image analysis
@@ -129,30 +268,14 @@ class MediaAnalyzer:
                     "description": "Unable to access the image. It may be a non-direct URL."
                 }
             
+            # Analyse déjà enregistrée pour ce média (même URL, ou même contenu sous une autre URL)
+            url_key, content_key, image_hash, cached = self._cached_analysis(image_url)
+            if cached is not None:
+                cached["detected_themes"] = self.detect_themes_from_analysis(cached)
+                return cached
+
             # Construire le prompt pour l'analyse
-            vision_prompt = """
-            Analyze this image in detail. Identify:
-            1. Main subjects (people, objects, places)
-            2. Actions or events depicted
-            3. Overall mood or tone
-            4. Any visible text in the image
-            5. Emotional themes (joy, sadness, fear, etc.)
-            6. Whether it's a meme or humorous image
-            7. If the image shows a disaster, conflict, or crisis situation
-            
-            Respond in JSON format with this structure:
-            {
-                "description": "Complete description of the image",
-                "subjects": ["List of main subjects"],
-                "actions": ["List of actions or events"],
-                "mood": "Overall mood",
-                "visible_text": ["List of visible texts"],
-                "emotional_themes": ["List of emotional themes"],
-                "is_meme": true/false,
-                "is_crisis": true/false,
-                "crisis_type": "Type of crisis if applicable"
-            }
-            """
+            vision_prompt = VISION_PROMPT if context is None else f"{VISION_PROMPT}\n{context}"
             
             # Appel à l'API Vision
             # Appel à l'API Vision avec gestion des erreurs
@@ -241,6 +364,11 @@ class MediaAnalyzer:
                                 }
                 
                 self.logger.info(f" *** Analyse média: {analysis_result} ***")
+                # Enregistrer l'analyse (sans les thèmes, recalculés à chaque lecture)
+                if self.vision_cache is not None and analysis_result and "error" not in analysis_result:
+                    self.vision_cache.put(analysis_result, url_key, content_key)
+                    if image_hash is not None:
+                        self.vision_cache.add_image_hash(self.vision_version, image_hash, content_key)
                 # Détection des thèmes
                 detected_themes = self.detect_themes_from_analysis(analysis_result)
                 analysis_result["detected_themes"] = detected_themes
@@ -258,90 +386,130 @@ class MediaAnalyzer:
             self.logger.error(f"Erreur lors de l'analyse de l'image: {str(e)}")
             return {"error": str(e)}
     
-    def extract_first_frame(self, video_url: str) -> Optional[str]:
+    def extract_first_frame(self, video_url: str) -> Optional[bytes]:
         """
         Extrait la première frame d'une vidéo
         
+        Seuls les octets nécessaires au décodage sont téléchargés (requêtes HTTP Range,
+        au plus VIDEO_MAX_FETCH_BYTES) : la durée ne dépend pas de la longueur de la
+        vidéo. Décodage et encodage JPEG se font en mémoire, sans fichier temporaire.
+        
         Args:
             video_url: URL de la vidéo
             
         Returns:
-            Chemin temporaire vers l'image extraite ou None en cas d'échec
+            Image JPEG de la frame, ou None en cas d'échec
         """
         try:
             self.logger.info(f"Extraction de la première frame de: {video_url}")
             
-            # Télécharger la vidéo dans un fichier temporaire
-            response = requests.get(video_url, stream=True)
-            response.raise_for_status()
+            with RangedHttpStream(video_url, max_bytes=self.config.VIDEO_MAX_FETCH_BYTES,
+                                  block_size=self.config.VIDEO_FETCH_BLOCK_BYTES) as stream:
+                frame = read_first_frame(stream)
+                self.logger.info(f"{stream.bytes_fetched} octets téléchargés en {stream.requests} requêtes "
+                                 f"(vidéo de {stream.size} octets)")
+                if stream.error is not None:
+                    self.logger.error(f"Lecture de la vidéo interrompue: {stream.error}")
             
-            temp_dir = tempfile.gettempdir()
-            video_path = os.path.join(temp_dir, "temp_video.mp4")
-            
-            with open(video_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            # Extraire la première frame
-            cap = cv2.VideoCapture(video_path)
-            ret, frame = cap.read()
-            cap.release()
-            
-            if not ret:
+            if frame is None:
                 self.logger.error("Impossible d'extraire un frame de la vidéo")
                 return None
             
-            # Sauvegarder le frame
-            frame_path = os.path.join(temp_dir, "first_frame.jpg")
-            cv2.imwrite(frame_path, frame)
-            
-            return frame_path
+            ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.config.VIDEO_FRAME_JPEG_QUALITY])
+            return encoded.tobytes() if ok else None
             
         except Exception as e:
             self.logger.error(f"Erreur lors de l'extraction du frame: {str(e)}")
             return None
             
-    def process_video(self, video_url: str) -> Dict[str, Any]:
+    def is_video_url(self, url: str) -> bool:
+        """True si l'URL désigne un fichier vidéo (et non une image)"""
+        path = urlsplit(url).path.lower()
+        return "video.twimg.com/" in url.lower() or path.endswith(('.mp4', '.m3u8', '.mov', '.webm'))
+
+    def process_video(self, video_url: str, preview_image_url: Optional[str] = None) -> Dict[str, Any]:
         """
-        Traite une vidéo en extrayant la première frame et en l'analysant
+        Traite une vidéo (ou un GIF animé) en analysant sa vignette ou sa première frame
+        
+        La vignette fournie par Twitter (preview_image_url : '…/ext_tw_video_thumb/…',
+        '…/tweet_video_thumb/…') est analysée directement, sans télécharger ni décoder
+        la vidéo. À défaut de vignette, ou si son analyse échoue, les scènes de la vidéo
+        sont réunies en une planche contact (VIDEO_KEYFRAMES > 1) ou la première frame
+        est extraite ; dans tous les cas, un seul appel Vision.
         
         Args:
             video_url: URL de la vidéo
+            preview_image_url: URL de la vignette de la vidéo (champ de l'API v2)
             
         Returns:
-            Résultats de l'analyse de la première frame
+            Résultats de l'analyse de la vignette ou de la première frame
         """
-        frame_path = self.extract_first_frame(video_url)
-        
-        if not frame_path:
+        if (self.config.VIDEO_USE_PREVIEW_IMAGE and preview_image_url
+                and not self.is_video_url(preview_image_url)):
+            self.logger.info(f"Analyse de la vignette de la vidéo: {preview_image_url}")
+            analysis = self.analyze_image(preview_image_url)
+            if "error" not in analysis:
+                return analysis
+            self.logger.warning(f"Analyse de la vignette impossible ({analysis['error']}), "
+                                f"extraction de la première frame")
+        
+        context = None
+        if self.config.VIDEO_KEYFRAMES > 1:
+            # Plusieurs scènes réunies en une seule image : un seul appel Vision par vidéo
+            frame, frame_count = self.extract_contact_sheet(video_url)
+            if frame_count > 1:
+                context = (f"This image is a contact sheet of {frame_count} frames sampled in chronological "
+                           f"order from a video (numbered with their timestamp, top-left). "
+                           f"Describe the video as a whole.")
+        else:
+            frame = self.extract_first_frame(video_url)
+        
+        if not frame:
             return {"error": "Impossible d'extraire un frame de la vidéo"}
         
-        # Transformer le chemin local en URL accessible par OpenAI
-        # Dans un environnement réel, vous devriez uploader cette image
-        # vers un service de stockage comme S3 et utiliser l'URL publique
-        # Pour ce prototype, nous allons simuler cela
+        # La frame est envoyée à l'API dans une URL data (pas d'hébergement nécessaire)
+        data_url = f"data:image/jpeg;base64,{base64.b64encode(frame).decode('ascii')}"
+        return self.analyze_image(data_url, context=context)
+
+    def extract_contact_sheet(self, video_url: str) -> Tuple[Optional[bytes], int]:
+        """
+        Planche contact des scènes d'une vidéo (voir video_stream.sample_keyframes)
         
+        Jusqu'à VIDEO_KEYFRAMES frames, une par changement de scène, sont lues par
+        positionnement dans la vidéo (requêtes HTTP Range, au plus
+        VIDEO_KEYFRAMES_MAX_FETCH_BYTES) et réunies en une image.
+        
+        Args:
+            video_url: URL de la vidéo
+            
+        Returns:
+            (image JPEG ou None en cas d'échec, nombre de frames de la planche)
+        """
         try:
-            # Lire l'image pour l'envoyer à l'API
-            with open(frame_path, "rb") as image_file:
-                import base64
-                encoded_image = base64.b64encode(image_file.read()).decode('utf-8')
-                
-            # Créer une URL data pour l'image
-            data_url = f"data:image/jpeg;base64,{encoded_image}"
+            self.logger.info(f"Extraction des scènes de: {video_url}")
+            
+            with RangedHttpStream(video_url, max_bytes=self.config.VIDEO_KEYFRAMES_MAX_FETCH_BYTES,
+                                  block_size=self.config.VIDEO_FETCH_BLOCK_BYTES) as stream:
+                frames = sample_keyframes(stream, self.config.VIDEO_KEYFRAMES,
+                                          candidates=self.config.VIDEO_KEYFRAME_CANDIDATES,
+                                          threshold=self.config.VIDEO_SCENE_CHANGE_THRESHOLD)
+                self.logger.info(f"{len(frames)} scènes, {stream.bytes_fetched} octets téléchargés "
+                                 f"en {stream.requests} requêtes (vidéo de {stream.size} octets)")
+                if stream.error is not None:
+                    self.logger.warning(f"Lecture de la vidéo interrompue: {stream.error}")
+            
+            if not frames:
+                self.logger.error("Impossible d'extraire un frame de la vidéo")
+                return None, 0
             
-            # Analyser l'image
-            return self.analyze_image(data_url)
+            sheet = contact_sheet(frames, tile_width=self.config.VIDEO_CONTACT_SHEET_TILE_WIDTH) \
+                if len(frames) > 1 else frames[0][1]
+            ok, encoded = cv2.imencode(".jpg", sheet, [cv2.IMWRITE_JPEG_QUALITY, self.config.VIDEO_FRAME_JPEG_QUALITY])
+            return (encoded.tobytes(), len(frames)) if ok else (None, 0)
             
         except Exception as e:
-            self.logger.error(f"Erreur lors du traitement de la frame: {str(e)}")
-            return {"error": str(e)}
-        finally:
-            # Nettoyer les fichiers temporaires
-            try:
-                os.remove(frame_path)
-            except:
-                pass
+            self.logger.error(f"Erreur lors de l'extraction des scènes: {str(e)}")
+            return None, 0
     
     def detect_themes_from_analysis(self, analysis: Dict[str, Any]) -> Dict[str, List[str]]:
         """
@@ -353,8 +521,6 @@ class MediaAnalyzer:
         Returns:
             Dictionary of detected themes with corresponding terms
         """
-        detected_themes = {}
-        
         # Safely handle None values and create text from analysis for keyword search
         description = analysis.get("description", "") or ""
         
@@ -377,17 +543,10 @@ class MediaAnalyzer:
             " ".join([str(t) for t in visible_text if t is not None]),
             " ".join([str(e) for e in emotional_themes if e is not None]),
             crisis_type
-        ]).lower()
+        ])
         
-        # Détecter les thèmes basés sur les mots-clés
-        for theme, keywords in self.config.TRIGGER_THEMES.items():
-            matches = []
-            for keyword in keywords:
-                if keyword.lower() in analysis_text:
-                    matches.append(keyword)
-            
-            if matches:
-                detected_themes[theme] = matches
+        # Détecter les thèmes basés sur les mots-clés (un seul passage, frontières de mots)
+        detected_themes = detect_trigger_themes(analysis_text)
                 
         # Vérifier si l'analyse a détecté une crise
         if analysis.get("is_crisis", False):
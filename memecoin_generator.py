@@ -42,7 +42,7 @@ class MemecoinsGenerator:
                          max_retries: int = 3, is_image_primary: bool = False,
                          format_guidance: Optional[Dict] = None,
                          media_analysis: Optional[Dict] = None,
-                         condition_match: Optional[str] = None) -> Dict[str, Any]:
+                         condition_match: Any = None) -> Dict[str, Any]:
         """
         Generate a meme coin based on a tweet with a simplified prompt structure
         
@@ -56,10 +56,14 @@ class MemecoinsGenerator:
             format_guidance: Format guidance from pattern matcher (not heavily used in simplified version)
             media_analysis: Analysis of media content
             condition_match: The specific condition that was matched to trigger generation
+                (ConditionMatch from condition_handler.evaluate_conditions, or its instruction string)
         Returns:
             Dictionary containing meme coin information
         """
 
+        # Instruction de la condition déclenchée (ConditionMatch ou texte déjà extrait)
+        condition_match = getattr(condition_match, "instruction", condition_match)
+
         # Build the system prompt using the instructions
         system_prompt = self.base_prompt
 
@@ -84,18 +88,6 @@ class MemecoinsGenerator:
         if condition_match and any(f"status code {code}" in condition_match for code in [801, 802, 803, 804]):
             system_prompt += status_instruction
 
-        # First, check if we match any specific conditions from extract_ticker_info
-        try:
-            from condition_handler import get_prompt_instructions
-            prompt_instructions = get_prompt_instructions(tweet_content, media_analysis)
-        except ImportError:
-            # Fallback si le module n'est pas disponible
-            prompt_instructions = {
-                "base_instruction": None,
-                "ticker_format": None, 
-                "name_format": None,
-                "examples": []
-            }
          # Find similar examples from our training data
         #try:
              #matching_examples = self.example_learner.find_matching_examples(tweet_content, relevant_keywords)
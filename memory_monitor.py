@@ -0,0 +1,133 @@
+# memory_monitor.py
+import os
+import json
+import time
+import logging
+from collections import deque
+from typing import Any, Dict, Optional
+
+from config import Config
+
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Mémoire d'un processus (Linux, en kB), lue dans /proc/<pid>/smaps_rollup
+
+    Args:
+        pid: Processus à mesurer (défaut: processus courant)
+
+    Returns:
+        {"pid", "rss", "pss", "shared", "private"} : "pss" répartit les pages partagées
+        entre les processus qui les utilisent, "private" est la mémoire propre au processus
+        (pages recopiées après un fork comprises). Valeurs à None si /proc est indisponible.
+    """
+    if pid is None:
+        pid = os.getpid()
+    fields = {"Rss": 0, "Pss": 0, "Shared_Clean": 0, "Shared_Dirty": 0, "Private_Clean": 0, "Private_Dirty": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in fields:
+                    fields[name] = int(value.split()[0])
+    except (OSError, ValueError, IndexError):
+        return {"pid": pid, "rss": None, "pss": None, "shared": None, "private": None}
+    return {
+        "pid": pid,
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "shared": fields["Shared_Clean"] + fields["Shared_Dirty"],
+        "private": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+class MemoryMonitor:
+    """
+    Suivi de la mémoire d'un processus qui tourne longtemps (écouteur, backfill)
+
+    Un échantillon (RSS, PSS, tweets traités, jauges fournies par l'appelant comme la
+    taille du StringStore spaCy) est pris au plus une fois par sample_interval ;
+    l'historique est borné à history_size échantillons et exporté en JSON comme les
+    métriques du moteur de conditions. Désactivé, record ne fait qu'un test sur `enabled`.
+    """
+
+    def __init__(self, enabled: bool = False, export_path: Optional[str] = None,
+                 sample_interval: float = 60.0, history_size: int = 1440):
+        self.logger = logging.getLogger(__name__)
+        self.enabled = enabled
+        self.export_path = export_path
+        self.sample_interval = sample_interval
+        self.history_size = history_size
+        self.reset()
+
+    def reset(self) -> None:
+        """Oublie les échantillons et remet le compteur de tweets à zéro"""
+        self.started_at = time.time()
+        self.processed = 0
+        self.samples: "deque[Dict[str, Any]]" = deque(maxlen=self.history_size)
+        self._last_sample = None
+
+    def record(self, processed: int = 1, **gauges: Any) -> None:
+        """
+        Compte des tweets traités et prend un échantillon si l'intervalle est écoulé
+
+        Args:
+            processed: Nombre de tweets traités depuis le dernier appel
+            gauges: Valeurs ajoutées à l'échantillon (ex: nlp_strings=len(nlp.vocab.strings))
+        """
+        self.processed += processed
+        now = time.monotonic()
+        if self._last_sample is not None and now - self._last_sample < self.sample_interval:
+            return
+        self.sample(**gauges)
+        if self.export_path:
+            try:
+                self.export()
+            except OSError as e:
+                self.logger.warning(f"Export du suivi mémoire impossible: {e}")
+
+    def sample(self, **gauges: Any) -> Dict[str, Any]:
+        """Prend un échantillon immédiatement et le retourne"""
+        memory = process_memory()
+        sample = {"timestamp": time.time(), "processed": self.processed,
+                  "rss_kb": memory["rss"], "pss_kb": memory["pss"]}
+        sample.update(gauges)
+        self.samples.append(sample)
+        self._last_sample = time.monotonic()
+        return sample
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Historique et résumé (RSS minimal, maximal, dernier) sérialisables en JSON"""
+        rss = [sample["rss_kb"] for sample in self.samples if sample["rss_kb"] is not None]
+        return {
+            "started_at": self.started_at,
+            "timestamp": time.time(),
+            "pid": os.getpid(),
+            "processed": self.processed,
+            "rss_min_kb": min(rss) if rss else None,
+            "rss_max_kb": max(rss) if rss else None,
+            "rss_last_kb": rss[-1] if rss else None,
+            "samples": list(self.samples),
+        }
+
+    def export(self, path: Optional[str] = None) -> str:
+        """Écrit un instantané JSON (remplacement atomique du fichier) et retourne son chemin"""
+        path = path or self.export_path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+        return path
+
+
+# Instance partagée par l'analyse des tweets et les outils de longue durée
+MEMORY = MemoryMonitor(
+    enabled=Config.MEMORY_MONITOR_ENABLED,
+    export_path=Config.MEMORY_MONITOR_FILE,
+    sample_interval=Config.MEMORY_MONITOR_INTERVAL,
+    history_size=Config.MEMORY_MONITOR_HISTORY,
+)
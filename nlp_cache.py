@@ -0,0 +1,133 @@
+# nlp_cache.py
+import os
+import json
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import spacy
+
+from rule_cache import text_key
+
+# Version du format des sorties spaCy enregistrées (à changer si TweetAnalyzer._spacy_features change)
+FEATURES_FORMAT = "1"
+
+
+def model_version(nlp: spacy.Language) -> str:
+    """
+    Version du pipeline spaCy : version de spaCy, nom et version du modèle, composants actifs
+
+    Toute sortie enregistrée avec une autre version est ignorée (clé différente).
+    """
+    meta = nlp.meta
+    return (f"spacy-{spacy.__version__}/{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}"
+            f"/{','.join(nlp.pipe_names)}/{FEATURES_FORMAT}")
+
+
+class NlpCache:
+    """
+    Cache persistant (SQLite) des sorties spaCy, par empreinte du texte et version du modèle
+
+    Seules les sorties du modèle sont enregistrées (entités, substantifs et verbes
+    candidats) : STOP_WORDS et les thèmes sont appliqués à chaque lecture, leurs
+    modifications sont donc prises en compte sans invalider le cache. Un changement
+    de modèle, de version de spaCy ou de composants change la clé.
+
+    Utilisable depuis plusieurs threads et après un fork (la connexion est rouverte
+    dans le processus enfant).
+    """
+
+    def __init__(self, path: str):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Une connexion SQLite ne doit pas être partagée entre processus après un fork
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS features (key BLOB PRIMARY KEY, value TEXT NOT NULL)")
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def key(version: str, text: str) -> bytes:
+        """Clé d'un texte pour une version de modèle (voir model_version)"""
+        return text_key(version, "spacy", text)
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, Any]:
+        """Sorties enregistrées pour les clés demandées (les clés absentes sont omises)"""
+        found = {}
+        with self._lock:
+            connection = self._connect()
+            # Requêtes par paquets (limite du nombre de paramètres SQLite)
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = connection.execute(
+                    f"SELECT key, value FROM features WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                for key, value in rows:
+                    found[bytes(key)] = json.loads(value)
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def get(self, key: bytes) -> Optional[Any]:
+        """Sortie enregistrée pour une clé, ou None"""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Iterable[Tuple[bytes, Any]]) -> None:
+        """Enregistre des sorties (une seule transaction)"""
+        rows = [(key, json.dumps(value, ensure_ascii=False, separators=(",", ":"))) for key, value in items]
+        if not rows:
+            return
+        with self._lock:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.executemany("INSERT OR REPLACE INTO features (key, value) VALUES (?, ?)", rows)
+            except sqlite3.Error as e:
+                # Le cache n'est qu'une optimisation : l'analyse continue sans lui
+                self.logger.warning(f"Écriture impossible dans le cache NLP {self.path}: {e}")
+
+    def put(self, key: bytes, value: Any) -> None:
+        """Enregistre une sortie"""
+        self.put_many([(key, value)])
+
+    def clear(self) -> None:
+        """Vide le cache et remet les statistiques à zéro"""
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM features")
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistiques du cache (entrées, succès, échecs, taux de succès)"""
+        with self._lock:
+            size = self._connect().execute("SELECT COUNT(*) FROM features").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        """Ferme la connexion (rouverte automatiquement au prochain accès)"""
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
@@ -1,377 +1,199 @@
 # pattern_matcher.py
 import re
-from typing import Dict, List, Any, Optional
+import logging
+from typing import Dict, List, Any, Optional, Union
+
+from tokenized_text import TokenizedText
+
+# --- Vocabulaires du fallback (utilisés seulement si condition_handler est indisponible) ---
+
+# Mots et expressions comparés aux mots du texte normalisé.
+# Le tiret est remplacé par une espace dans le texte normalisé ('wee-wee' -> 'wee wee')
+FALLBACK_WORDS = (
+    # Mots négatifs
+    'pain', 'wounded', 'broken', 'defeated', 'stealing', 'shattered', 'ruined', 'damaged', 'crushed',
+    'bankrupt', 'destroyed', 'helpless', 'devastated', 'exhausted', 'collapsed', 'sunk', 'despair', 'stranded',
+    # Mots de mort
+    'dead', 'deceased', 'gone', 'perished', 'buried', 'withered', 'died', 'rip', 'killed',
+    # Mascottes
+    'mascot', 'logo', 'character', 'fictional character',
+    # Crime
+    'charged', 'arrested', 'detained', 'indicted', 'convicted', 'gun', 'knife',
+    # Toilettes
+    'pee', 'poo', 'wee wee', 'tinkle', 'whiz', 'piddle', 'poop', 'doo doo',
+    'dookie', 'number two', 'pee pee', 'potty', 'dump', 'bm',
+    # Réseaux sociaux
+    'twitter', 'kfc', 'x', 'duolingo', 'reddit', 'twitch', 'minecraft', 'walmart',
+    # Animaux
+    'lion', 'elephant', 'giraffe', 'zebra', 'tiger', 'bear', 'monkey', 'gorilla',
+    'hippopotamus', 'rhinoceros', 'crocodile', 'snake', 'flamingo', 'ostrich',
+    'kangaroo', 'koala', 'panda', 'wolf', 'cheetah', 'dog', 'cat',
+    # Meme coins et crypto
+    'pepe', 'doge', 'shiba', 'floki', 'bonk', 'dogwifhat', 'popcat',
+    'bitcoin', 'ethereum', 'stablecoin', 'solana',
+    # Marques d'Elon
+    'spacex', 'optimus', 'boringcompany', 'tesla', 'cybertruck',
+    # Toucher
+    'touching', 'caress', 'fondle', 'stroke', 'massage', 'embrace', 'cuddle', 'rub', 'tease',
+)
+
+# Termes recherchés n'importe où dans le texte en minuscules (même au milieu d'un mot)
+FALLBACK_SUBSTRINGS = (
+    'elon', 'kanye west', 'ye', 'hat', 'wif', 'strategic reserve',
+    # Délinquants sexuels
+    'sexual predator', 'sexual abuser', 'rapist', 'child molester', 'pedophile', 'statutory rapist', 'sex offender',
+    'meme',
+    # Styles
+    'anime', 'style', 'ghibli', 'cartoon', 'pixel',
+    # Termes spéciaux (comme dans is_pattern_eligible)
+    'justice',
+)
+
+# Comptes de célébrités (recherchés dans le nom d'utilisateur)
+FALLBACK_CELEBRITY_USERNAMES = ("elonmusk", "kanyewest", "ye", "drake", "trump", "biden",
+                                "kimkardashian", "justinbieber")
+
+# Sujets de l'analyse média qui rendent le tweet éligible
+FALLBACK_MEDIA_SUBJECTS = ("animal", "dog", "cat", "person", "celebrity", "hat", "computer")
+
+# Consignes de format du fallback
+FALLBACK_DEATH_PATTERNS = ("dead", "died", "death", "rip", "passed away")
+FALLBACK_WIF_PATTERNS = ("hat", "wif")
+
+
+def _any_substring(terms) -> "re.Pattern":
+    """Expression qui trouve l'un des termes n'importe où dans le texte"""
+    return re.compile("|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)))
+
 
 class PatternMatcher:
-    """Simple pattern matcher based on tweet content"""
-    
-    @staticmethod
-    def is_eligible(tweet_text: str, username: str = None, media_analysis: Optional[Dict] = None) -> bool:
-        """
-        Version qui délègue directement à condition_handler.is_pattern_eligible et extract_ticker_info
-        """
+    """
+    Simple pattern matcher based on tweet content
+
+    Construit une seule fois : les fonctions de condition_handler sont importées à la
+    construction et les vocabulaires du fallback sont précompilés (un ensemble de mots
+    et quelques expressions régulières), pour que le mode dégradé reste aussi rapide
+    que le moteur de conditions.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
         try:
-            # Première vérification: extract_ticker_info - contient beaucoup de patterns
-            from condition_handler import extract_ticker_info
-            ticker_info = extract_ticker_info(tweet_text)
-            if ticker_info:
-                return True
-                
-            # Deuxième vérification: complet is_pattern_eligible
-            from condition_handler import is_pattern_eligible
-            return is_pattern_eligible(tweet_text, username, media_analysis)
-            
+            from condition_handler import (
+                evaluate_conditions, get_prompt_instructions, format_guidance_from_instructions
+            )
+            self._evaluate_conditions = evaluate_conditions
+            self._get_prompt_instructions = get_prompt_instructions
+            self._format_guidance_from_instructions = format_guidance_from_instructions
         except ImportError as e:
-            print(f"Erreur d'importation de condition_handler: {e}")
-            # Fallback plus complet en cas d'échec d'importation
-            return PatternMatcher._complete_fallback_check(tweet_text, username, media_analysis)
-    
-    @staticmethod
-    def _complete_fallback_check(tweet_text: str, username: str = None, media_analysis: Optional[Dict] = None) -> bool:
-        """
-        Fallback d'urgence qui reproduit plus complètement les conditions du condition_handler
-        """
-        tweet_lower = tweet_text.lower()
-        words = tweet_text.split()
-        
-        # Vérification des "$" suivis d'un mot
-        if "$" in tweet_text:
-            for word in words:
-                if word.startswith('$') and len(word) > 1:
-                    return True
-        
-        # Vérification de "elon"
-        if 'elon' in tweet_lower:
-            return True
-            
-        # Vérification de "kanye west"
-        if 'kanye west' in tweet_lower or 'ye' in tweet_lower:
-            return True
-            
-        # Vérification des mots négatifs
-        negative_words = {'pain', 'wounded', 'broken', 'defeated', 'stealing', 'shattered', 
-                        'ruined', 'damaged', 'crushed', 'bankrupt', 'destroyed', 'helpless',
-                        'devastated', 'exhausted', 'collapsed', 'sunk', 'despair', 'stranded'}
-        if any(word.lower() in negative_words for word in words):
-            return True
-            
-        # Vérification des mots de mort
-        death_words = {'dead', 'deceased', 'gone', 'perished', 'buried', 'withered', 'died', 'rip', 'killed'}
-        if any(word.lower() in death_words for word in words):
-            return True
-            
-        # Vérification des mots de mascottes
-        mascot_words = {'mascot', 'logo', 'character', 'fictional character'}
-        if any(word.lower() in mascot_words for word in words):
-            return True
-            
-        # Vérification des mots de crime
-        crime_words = {'charged', 'arrested', 'detained', 'indicted', 'convicted', 'gun', 'knife'}
-        if any(word.lower() in crime_words for word in words):
-            return True
-            
-        # Vérification "hat"
-        if 'hat' in tweet_lower or 'wif' in tweet_lower:
-            return True
-            
-        # Vérification des mots des toilettes
-        toilet_words = {'pee', 'poo', 'wee-wee', 'tinkle', 'whiz', 'piddle', 'poop', 'doo-doo', 
-                    'dookie', 'number two', 'pee-pee', 'potty', 'dump', 'bm'}
-        if any(word.lower() in toilet_words for word in words):
-            return True
-            
-        # Vérification des réseaux sociaux
-        social_media_brands = {'twitter', 'kfc', 'x', 'duolingo', 'reddit', 'twitch', 'minecraft', 'walmart'}
-        if any(word.lower() in social_media_brands for word in words):
-            return True
-            
-        # Vérification des animaux
-        animals = {'lion', 'elephant', 'giraffe', 'zebra', 'tiger', 'bear', 'monkey', 'gorilla',
-                'hippopotamus', 'rhinoceros', 'crocodile', 'snake', 'flamingo', 'ostrich',
-                'kangaroo', 'koala', 'panda', 'wolf', 'cheetah', 'dog', 'cat'}
-        if any(word.lower() in animals for word in words):
-            return True
-            
-        # Vérification des meme coins
-        meme_coins = {'pepe', 'doge', 'shiba', 'floki', 'bonk', 'dogwifhat', 'popcat'}
-        if any(word.lower() in meme_coins for word in words):
-            return True
-            
-        # Vérification des mots crypto
-        crypto_words = {'bitcoin', 'ethereum', 'stablecoin', 'solana', 'doge'}
-        if any(word.lower() in crypto_words for word in words):
-            return True
-            
-        # Vérification "Strategic Reserve"
-        if 'strategic reserve' in tweet_lower:
-            return True
-            
-        # Vérification des marques d'Elon
-        elon_brands = {'spacex', 'optimus', 'boringcompany', 'tesla', 'cybertruck'}
-        if any(word.lower() in elon_brands for word in words):
-            return True
-        
-        # Vérification des délinquants sexuels
-        sex_offender_words = {'sexual predator', 'sexual abuser', 'rapist', 'child molester', 
-                            'pedophile', 'statutory rapist', 'sex offender'}
-        if any(offense in tweet_lower for offense in sex_offender_words):
-            return True
-        
-        # Vérification des mots de toucher
-        touch_words = {'touching', 'caress', 'fondle', 'stroke', 'massage', 'embrace', 'cuddle', 'rub', 'tease'}
-        if any(word.lower() in touch_words for word in words):
-            return True
-            
-        # Vérification "meme"
-        if 'meme' in tweet_lower:
-            return True
-        
-        # Vérification des styles
-        style_words = ['anime', 'style', 'ghibli', 'cartoon', 'pixel']
-        if any(style in tweet_lower for style in style_words):
-            return True
-        
-        # --- VÉRIFICATION DES PATTERNS COMME DANS is_pattern_eligible ---
-        
-        # Vérification des célébrités
-        celebrity_usernames = ["elonmusk", "kanyewest", "ye", "drake", "trump", "biden", 
-                            "kimkardashian", "justinbieber"]
-        if username and any(celeb.lower() in username.lower() for celeb in celebrity_usernames):
-            return True
-        
-        # Vérification des termes spéciaux
-        special_terms = ["meme", "hat", "style", "anime", "justice", "wif"]
-        if any(term in tweet_lower for term in special_terms):
-            return True
-        
-        # Vérification de l'analyse média
-        if media_analysis:
-            # Si c'est un mème
-            if media_analysis.get("is_meme", False):
-                return True
-            
-            # Vérification des sujets intéressants
-            subjects = media_analysis.get("subjects", [])
-            interesting_subjects = ["animal", "dog", "cat", "person", "celebrity", "hat", "computer"]
-            subject_text = " ".join([str(s).lower() for s in subjects if s]) if subjects else ""
-            if any(subj in subject_text for subj in interesting_subjects):
-                return True
-        
-        return False
-    
-    @staticmethod
-    def get_format_guidance(tweet_text: str, username: str = None, media_analysis: Optional[Dict] = None) -> Dict[str, Any]:
-        """
-        Get format guidance for memecoin generation, with direct call to condition_handler if possible
-        """
-        try:
-            from condition_handler import get_prompt_instructions
-            instructions = get_prompt_instructions(tweet_text, media_analysis)
-            
-            # Convert condition handler instructions to format guidance
-            result = {
-                "format_type": "standard" if not instructions["base_instruction"] else "custom",
-                "ticker_format": instructions["ticker_format"],
-                "name_format": instructions["name_format"],
-                "example_ticker": None,
-                "example_name": None
-            }
-            
-            # Add example if available
-            if instructions["examples"] and len(instructions["examples"]) > 0:
-                first_example = instructions["examples"][0]
-                result["example_ticker"] = first_example.get("ticker", "")
-                result["example_name"] = first_example.get("name", "")
-                
-            return result
-                
-        except ImportError:
-            # Fallback to basic pattern detection
-            return PatternMatcher._fallback_format_guidance(tweet_text, username, media_analysis)
-    
-    @staticmethod
-    def _fallback_format_guidance(tweet_text: str, username: str = None, media_analysis: Optional[Dict] = None) -> Dict[str, Any]:
+            self.logger.warning(f"Erreur d'importation de condition_handler, fallback utilisé: {e}")
+            self._evaluate_conditions = None
+            self._get_prompt_instructions = None
+            self._format_guidance_from_instructions = None
+
+        # Mots seuls : un test d'appartenance par mot du texte
+        self._fallback_words = frozenset(term for term in FALLBACK_WORDS if " " not in term)
+        # Expressions de plusieurs mots consécutifs du texte normalisé
+        phrases = [term for term in FALLBACK_WORDS if " " in term]
+        self._fallback_phrases = re.compile(
+            r"(?<!\S)(?:" + "|".join(r"\s+".join(map(re.escape, phrase.split())) for phrase in phrases) + r")(?!\S)"
+        )
+        self._fallback_substrings = _any_substring(FALLBACK_SUBSTRINGS)
+        self._celebrity_usernames = _any_substring(celeb.lower() for celeb in FALLBACK_CELEBRITY_USERNAMES)
+        self._media_subjects = _any_substring(FALLBACK_MEDIA_SUBJECTS)
+        # '$' au début d'un mot, suivi d'au moins un caractère
+        self._dollar_word = re.compile(r"(?<!\S)\$\S")
+
+        self._death_patterns = _any_substring(FALLBACK_DEATH_PATTERNS)
+        self._wif_patterns = _any_substring(FALLBACK_WIF_PATTERNS)
+        self._dollar_token = re.compile(r'\$([A-Za-z0-9]+)')
+
+    @property
+    def degraded(self) -> bool:
+        """True si condition_handler est indisponible (vérifications du fallback)"""
+        return self._evaluate_conditions is None
+
+    def is_eligible(self, tweet_text: Union[str, TokenizedText], username: str = None,
+                    media_analysis: Optional[Dict] = None) -> bool:
         """
-        Fallback format guidance detection
+        Version qui délègue directement à condition_handler.evaluate_conditions
         """
-        tweet_lower = tweet_text.lower()
-        result = {
-            "format_type": "standard",
-            "ticker_format": None,
-            "name_format": None,
-            "example_ticker": None,
-            "example_name": None
-        }
-        
-        # Death pattern
-        death_patterns = ["dead", "died", "death", "rip", "passed away"]
-        if any(pattern in tweet_lower for pattern in death_patterns):
-            result["format_type"] = "rip"
-            result["ticker_format"] = "RIPXXX"
-            result["name_format"] = "rip [subject]"
-            result["example_ticker"] = "RIPVAL"
-            result["example_name"] = "rip val"
-            return result
-        
-        # Dollar sign -> Direct token reference
-        dollar_match = re.search(r'\$([A-Za-z0-9]+)', tweet_text)
-        if dollar_match:
-            token = dollar_match.group(1)
-            result["format_type"] = "dollar"
-            result["ticker_format"] = token.upper()
-            result["name_format"] = token.lower()
-            result["example_ticker"] = token.upper()
-            result["example_name"] = token.lower()
-            return result
-        
-        # Hat/wearing references -> WIF format
-        if "hat" in tweet_lower or "wif" in tweet_lower:
-            result["format_type"] = "wif"
-            result["ticker_format"] = "XWY"
-            result["name_format"] = "[subject] wif [item]"
-            result["example_ticker"] = "DWH"
-            result["example_name"] = "dog wif hat"
-            return result
-        
-        return result
-    
-    @staticmethod
-    def get_memecoin_format(tweet_text: str, username: str = None) -> Dict[str, Any]:
+        if self._evaluate_conditions is not None:
+            # Conditions du texte puis de la description du média, évaluées une seule fois
+            return self._evaluate_conditions(tweet_text, media_analysis, with_guidance=False) is not None
+
+        # Fallback plus complet en cas d'échec d'importation
+        return self._complete_fallback_check(tweet_text, username, media_analysis)
+
+    def _complete_fallback_check(self, tweet_text: Union[str, TokenizedText], username: str = None,
+                                 media_analysis: Optional[Dict] = None) -> bool:
         """
-        # Delegate to get_format_guidance which now integrates with condition_handler
+        Fallback d'urgence qui reproduit plus complètement les conditions du condition_handler
+
+        Toutes les catégories sont vérifiées d'un coup : mots du texte normalisé,
+        expressions de plusieurs mots, puis termes recherchés comme sous-chaînes.
         """
-        # Delegate to get_format_guidance which now integrates with condition_handler
-        return PatternMatcher.get_format_guidance(tweet_text, username)
-        
-        # Vérification de "elon"
-        if 'elon' in tweet_lower:
-            return True
-            
-        # Vérification de "kanye west"
-        if 'kanye west' in tweet_lower or 'ye' in tweet_lower:
-            return True
-            
-        # Vérification des mots négatifs
-        negative_words = {'pain', 'wounded', 'broken', 'defeated', 'stealing', 'shattered', 
-                         'ruined', 'damaged', 'crushed', 'bankrupt', 'destroyed', 'helpless'}
-        if any(word.lower() in negative_words for word in tweet_text.split()):
-            return True
-            
-        # Vérification des mots de mort
-        death_words = {'dead', 'deceased', 'gone', 'perished', 'buried', 'withered', 'died', 'rip', 'killed'}
-        if any(word.lower() in death_words for word in tweet_text.split()):
-            return True
-            
-        # Vérification des mots de mascottes
-        mascot_words = {'mascot', 'logo', 'character', 'fictional character'}
-        if any(word.lower() in mascot_words for word in tweet_text.split()):
-            return True
-            
-        # Vérification des mots de crime
-        crime_words = {'charged', 'arrested', 'detained', 'indicted', 'convicted', 'gun', 'knife'}
-        if any(word.lower() in crime_words for word in tweet_text.split()):
-            return True
-            
-        # Vérification "hat"
-        if 'hat' in tweet_lower or 'wif' in tweet_lower:
-            return True
-            
-        # Vérification des réseaux sociaux
-        social_media_brands = {'twitter', 'kfc', 'x', 'duolingo', 'reddit', 'twitch', 'minecraft', 'walmart'}
-        if any(word.lower() in social_media_brands for word in tweet_text.split()):
-            return True
-            
-        # Vérification des animaux
-        animals = {'lion', 'elephant', 'giraffe', 'zebra', 'tiger', 'bear', 'monkey', 'dog', 'cat'}
-        if any(word.lower() in animals for word in tweet_text.split()):
-            return True
-            
-        # Vérification des meme coins
-        meme_coins = {'pepe', 'doge', 'shiba'}
-        if any(word.lower() in meme_coins for word in tweet_text.split()):
-            return True
-            
-        # Vérification des mots crypto
-        crypto_words = {'bitcoin', 'ethereum', 'stablecoin', 'solana', 'doge'}
-        if any(word.lower() in crypto_words for word in tweet_text.split()):
+        tweet = TokenizedText.of(tweet_text)
+        tweet_lower = tweet.lower
+
+        # Vérification des "$" suivis d'un mot
+        if "$" in tweet_lower and self._dollar_word.search(tweet_lower):
             return True
-            
-        # Vérification "Strategic Reserve"
-        if 'strategic reserve' in tweet_lower:
+
+        # Mots négatifs, de mort, mascottes, crime, toilettes, marques, animaux, crypto, toucher
+        if not self._fallback_words.isdisjoint(tweet.tokens):
             return True
-            
-        # Vérification des marques d'Elon
-        elon_brands = {'spacex', 'optimus', 'boringcompany', 'tesla', 'cybertruck'}
-        if any(word.lower() in elon_brands for word in tweet_text.split()):
+        if self._fallback_phrases.search(tweet.normalized):
             return True
-            
-        # Vérification "meme"
-        if 'meme' in tweet_lower:
+
+        # Elon, Kanye, hat/wif, Strategic Reserve, délinquants sexuels, meme, styles, termes spéciaux
+        if self._fallback_substrings.search(tweet_lower):
             return True
-        
-        # --- VÉRIFICATION DES PATTERNS COMME DANS is_pattern_eligible ---
-        
+
         # Vérification des célébrités
-        celebrity_usernames = ["elonmusk", "kanyewest", "ye", "drake", "trump", "biden", 
-                              "kimkardashian", "justinbieber"]
-        if username and any(celeb.lower() in username.lower() for celeb in celebrity_usernames):
+        if username and self._celebrity_usernames.search(username.lower()):
             return True
-        
-        # Vérification des termes spéciaux
-        special_terms = ["meme", "hat", "style", "anime", "justice", "wif"]
-        if any(term in tweet_lower for term in special_terms):
-            return True
-        
+
         # Vérification de l'analyse média
         if media_analysis:
             # Si c'est un mème
             if media_analysis.get("is_meme", False):
                 return True
-            
+
             # Vérification des sujets intéressants
             subjects = media_analysis.get("subjects", [])
-            interesting_subjects = ["animal", "dog", "cat", "person", "celebrity", "hat", "computer"]
-            if subjects and any(subj in " ".join(str(s).lower() for s in subjects if s) for subj in interesting_subjects):
-                return True
-        
+            if subjects:
+                subject_text = " ".join([str(s).lower() for s in subjects if s])
+                if self._media_subjects.search(subject_text):
+                    return True
+
         return False
-    
-    @staticmethod
-    def get_format_guidance(tweet_text: str, username: str = None, media_analysis: Optional[Dict] = None) -> Dict[str, Any]:
+
+    def get_format_guidance(self, tweet_text: Union[str, TokenizedText], username: str = None,
+                            media_analysis: Optional[Dict] = None, condition_match: Any = None) -> Dict[str, Any]:
         """
         Get format guidance for memecoin generation, with direct call to condition_handler if possible
+
+        Si condition_match (ConditionMatch) est fourni, ses consignes déjà calculées sont réutilisées
         """
-        try:
-            from condition_handler import get_prompt_instructions
-            instructions = get_prompt_instructions(tweet_text, media_analysis)
-            
-            # Convert condition handler instructions to format guidance
-            result = {
-                "format_type": "standard" if not instructions["base_instruction"] else "custom",
-                "ticker_format": instructions["ticker_format"],
-                "name_format": instructions["name_format"],
-                "example_ticker": None,
-                "example_name": None
-            }
-            
-            # Add example if available
-            if instructions["examples"] and len(instructions["examples"]) > 0:
-                first_example = instructions["examples"][0]
-                result["example_ticker"] = first_example.get("ticker", "")
-                result["example_name"] = first_example.get("name", "")
-                
-            return result
-                
-        except ImportError:
-            # Fallback to basic pattern detection
-            return PatternMatcher._fallback_format_guidance(tweet_text, username, media_analysis)
-    
-    @staticmethod
-    def _fallback_format_guidance(tweet_text: str, username: str = None, media_analysis: Optional[Dict] = None) -> Dict[str, Any]:
+        format_guidance = getattr(condition_match, "format_guidance", None)
+        if format_guidance is not None:
+            return format_guidance
+
+        if self._get_prompt_instructions is not None:
+            return self._format_guidance_from_instructions(self._get_prompt_instructions(tweet_text, media_analysis))
+
+        # Fallback to basic pattern detection
+        return self._fallback_format_guidance(tweet_text, username, media_analysis)
+
+    def _fallback_format_guidance(self, tweet_text: Union[str, TokenizedText], username: str = None,
+                                  media_analysis: Optional[Dict] = None) -> Dict[str, Any]:
         """
         Fallback format guidance detection
         """
-        tweet_lower = tweet_text.lower()
+        tweet = TokenizedText.of(tweet_text)
+        tweet_lower = tweet.lower
         result = {
             "format_type": "standard",
             "ticker_format": None,
@@ -379,19 +201,18 @@ class PatternMatcher:
             "example_ticker": None,
             "example_name": None
         }
-        
+
         # Death pattern
-        death_patterns = ["dead", "died", "death", "rip", "passed away"]
-        if any(pattern in tweet_lower for pattern in death_patterns):
+        if self._death_patterns.search(tweet_lower):
             result["format_type"] = "rip"
             result["ticker_format"] = "RIPXXX"
             result["name_format"] = "rip [subject]"
             result["example_ticker"] = "RIPVAL"
             result["example_name"] = "rip val"
             return result
-        
+
         # Dollar sign -> Direct token reference
-        dollar_match = re.search(r'\$([A-Za-z0-9]+)', tweet_text)
+        dollar_match = self._dollar_token.search(tweet.text) if "$" in tweet.text else None
         if dollar_match:
             token = dollar_match.group(1)
             result["format_type"] = "dollar"
@@ -400,22 +221,22 @@ class PatternMatcher:
             result["example_ticker"] = token.upper()
             result["example_name"] = token.lower()
             return result
-        
+
         # Hat/wearing references -> WIF format
-        if "hat" in tweet_lower or "wif" in tweet_lower:
+        if self._wif_patterns.search(tweet_lower):
             result["format_type"] = "wif"
             result["ticker_format"] = "XWY"
             result["name_format"] = "[subject] wif [item]"
             result["example_ticker"] = "DWH"
             result["example_name"] = "dog wif hat"
             return result
-        
+
         return result
-    
-    @staticmethod
-    def get_memecoin_format(tweet_text: str, username: str = None) -> Dict[str, Any]:
+
+    def get_memecoin_format(self, tweet_text: Union[str, TokenizedText], username: str = None,
+                            condition_match: Any = None) -> Dict[str, Any]:
         """
         Get appropriate memecoin format based on tweet content - with direct call to condition_handler
         """
         # Delegate to get_format_guidance which now integrates with condition_handler
-        return PatternMatcher.get_format_guidance(tweet_text, username)
\ No newline at end of file
+        return self.get_format_guidance(tweet_text, username, condition_match=condition_match)
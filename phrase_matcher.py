@@ -0,0 +1,103 @@
+# phrase_matcher.py
+from typing import Any, Dict, List, Sequence, Tuple
+
+
+class PhraseMatcher:
+    """
+    Automate d'Aho-Corasick sur des séquences de mots.
+
+    Les expressions (un ou plusieurs mots) sont comparées mot à mot, ce qui donne
+    naturellement une correspondance sur les frontières de mots : 'war' ne trouve
+    pas 'award' et 'number two' ne trouve que les deux mots consécutifs.
+    Toutes les occurrences sont trouvées en un seul passage sur le texte,
+    quelle que soit la taille des vocabulaires.
+    """
+
+    def __init__(self):
+        # Noeud -> {mot: noeud suivant}
+        self._transitions: List[Dict[str, int]] = [{}]
+        # Noeud -> noeud de repli (plus long suffixe présent dans l'automate)
+        self._fail: List[int] = [0]
+        # Noeud -> [(nombre de mots de l'expression, donnée associée)]
+        self._phrases: List[List[Tuple[int, Any]]] = [[]]
+        # Idem, complété par les expressions des noeuds de repli (calculé par build)
+        self._outputs: List[List[Tuple[int, Any]]] = [[]]
+        self._built = True
+
+    def add(self, words: Sequence[str], payload: Any) -> None:
+        """
+        Ajoute une expression à l'automate
+
+        Args:
+            words: Mots de l'expression, déjà normalisés
+            payload: Donnée retournée à chaque occurrence de l'expression
+        """
+        if not words:
+            return
+
+        node = 0
+        for word in words:
+            next_node = self._transitions[node].get(word)
+            if next_node is None:
+                next_node = len(self._transitions)
+                self._transitions.append({})
+                self._fail.append(0)
+                self._phrases.append([])
+                self._transitions[node][word] = next_node
+            node = next_node
+
+        self._phrases[node].append((len(words), payload))
+        self._built = False
+
+    def build(self) -> None:
+        """Calcule les liens de repli (parcours en largeur de l'arbre)"""
+        transitions = self._transitions
+        fail = self._fail
+        outputs = [list(phrases) for phrases in self._phrases]
+
+        queue = list(transitions[0].values())
+        for node in queue:
+            fail[node] = 0
+
+        for node in queue:
+            for word, child in transitions[node].items():
+                fallback = fail[node]
+                while fallback and word not in transitions[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = transitions[fallback].get(word, 0)
+                # Les expressions qui se terminent au noeud de repli se terminent aussi ici
+                outputs[child] = outputs[child] + outputs[fail[child]]
+                queue.append(child)
+
+        self._outputs = outputs
+        self._built = True
+
+    def find_all(self, words: Sequence[str]) -> List[Tuple[int, int, Any]]:
+        """
+        Trouve toutes les expressions présentes dans une suite de mots
+
+        Args:
+            words: Mots du texte, déjà normalisés
+
+        Returns:
+            Liste de (index du premier mot, index après le dernier mot, donnée),
+            triée par position de fin
+        """
+        if not self._built:
+            self.build()
+
+        transitions = self._transitions
+        fail = self._fail
+        outputs = self._outputs
+
+        matches = []
+        node = 0
+        for position, word in enumerate(words):
+            while node and word not in transitions[node]:
+                node = fail[node]
+            node = transitions[node].get(word, 0)
+            if node:
+                end = position + 1
+                for length, payload in outputs[node]:
+                    matches.append((end - length, end, payload))
+        return matches
@@ -3,9 +3,11 @@ import re
 import json
 import os
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Union
 import hashlib
 
+from tokenized_text import TokenizedText
+
 class PumpFunFormatter:
     """
     Classe pour formater les données des tweets analysés pour l'API PumpFun
@@ -21,17 +23,21 @@ class PumpFunFormatter:
             "bullish", "elon", "giga", "mega", "alpha", "based", "rare", "epic",
             "crypto", "diamond", "hodl", "fomo", "ape", "rocket", "x"
         ]
+        # Mot complet contenant chaque mot tendance (compilé une seule fois)
+        self.trending_patterns = [
+            (keyword, re.compile(r'\b\w*' + re.escape(keyword) + r'\w*\b'))
+            for keyword in self.trending_keywords
+        ]
         
-    def _extract_trending_keyword(self, text: str) -> Optional[str]:
-        """Extrait un mot tendance du texte s'il existe"""
-        lowercase_text = text.lower()
-        for keyword in self.trending_keywords:
+    def _extract_trending_keyword(self, text: Union[str, TokenizedText]) -> Optional[str]:
+        """Extrait un mot tendance du texte (ou du TokenizedText) s'il existe"""
+        lowercase_text = TokenizedText.of(text).lower
+        for keyword, pattern in self.trending_patterns:
             if keyword in lowercase_text:
                 # Trouver le mot complet contenant le keyword
-                pattern = r'\b\w*' + re.escape(keyword) + r'\w*\b'
-                matches = re.findall(pattern, lowercase_text)
-                if matches:
-                    return matches[0]
+                found = pattern.search(lowercase_text)
+                if found:
+                    return found.group(0)
         return None
     
     def _generate_token_name(self, username: str, analysis: Dict[str, Any]) -> str:
@@ -0,0 +1,102 @@
+# rule_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+# Valeur retournée par RuleCache.get quand la clé est absente (None est un résultat valide)
+MISSING = object()
+
+
+def text_key(version: str, namespace: str, text: str) -> bytes:
+    """
+    Clé de cache d'un texte normalisé
+
+    Args:
+        version: Version des règles (voir condition_handler.RULESET_VERSION)
+        namespace: Fonction ou source évaluée ("text", "media", "prompt"...)
+        text: Texte normalisé
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(version.encode())
+    digest.update(namespace.encode())
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8", "surrogatepass"))
+    return digest.digest()
+
+
+class RuleCache:
+    """
+    Cache LRU borné des résultats du moteur de conditions
+
+    Les clés contiennent la version des règles : une entrée calculée avec
+    d'anciennes règles n'est jamais retournée. set_version vide en plus le
+    cache dès que la version change, pour libérer la mémoire.
+
+    Utilisable depuis plusieurs threads : le rechargement des règles
+    (rule_file.RuleFileWatcher) vide le cache pendant que l'analyse le lit.
+    """
+
+    def __init__(self, max_size: int, version: str = ""):
+        self.max_size = max_size
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        """Retourne la valeur associée à la clé, ou MISSING"""
+        with self._lock:
+            value = self._entries.get(key, MISSING)
+            if value is MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Enregistre une valeur et évince l'entrée la moins récemment utilisée si besoin"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            entries = self._entries
+            entries[key] = value
+            entries.move_to_end(key)
+            if len(entries) > self.max_size:
+                entries.popitem(last=False)
+
+    def set_version(self, version: str) -> None:
+        """Change la version des règles et vide le cache si elle a changé"""
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self._clear()
+
+    def clear(self) -> None:
+        """Vide le cache et remet les statistiques à zéro"""
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistiques du cache (taille, succès, échecs, taux de succès)"""
+        with self._lock:
+            hits, misses, size = self.hits, self.misses, len(self._entries)
+        lookups = hits + misses
+        return {
+            "version": self.version,
+            "size": size,
+            "max_size": self.max_size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
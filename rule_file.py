@@ -0,0 +1,167 @@
+# rule_file.py
+import os
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from tokenized_text import normalize_text
+
+# Modes de correspondance d'une condition
+FIRST_WORD = "first_word"  # parcours mot par mot : le premier mot du tweet qui correspond l'emporte
+WORD = "word"              # un mot ou une expression du vocabulaire apparaît dans le texte (frontières de mots)
+SUBSTRING = "substring"    # le terme apparaît n'importe où dans le texte nettoyé, même au milieu d'un mot
+MODES = (FIRST_WORD, WORD, SUBSTRING)
+
+
+def load_rule_file(path: str) -> Dict[str, Any]:
+    """
+    Lit et valide le fichier des règles du moteur de conditions
+
+    Le fichier contient :
+    - "conditions" : vocabulaire de chaque condition. "terms" est commun au texte et
+      aux médias, "text_terms" / "media_terms" ne s'appliquent qu'à l'un des deux.
+    - "text_rules" / "media_rules" : règles par ordre de priorité, chacune avec
+      "id" (condition), "mode" (voir MODES) et "instruction" ('{term}' y est remplacé
+      par le terme trouvé)
+
+    Les termes sont normalisés comme les textes analysés (voir normalize_text) :
+    'Trump' ou "McDonald's" sont recherchés tels qu'ils apparaissent dans le texte nettoyé.
+
+    Returns:
+        {"text_rules", "media_rules"} (tuples (identifiant, mode, instruction)) et
+        {"text_vocabularies", "media_vocabularies"} (identifiant -> frozenset de termes
+        normalisés), limités aux conditions utilisées par les règles de chaque source
+
+    Raises:
+        OSError: Fichier illisible
+        ValueError: JSON invalide ou structure incorrecte
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return parse_rule_data(data, path)
+
+
+def parse_rule_data(data: Any, path: str = "<règles>") -> Dict[str, Any]:
+    """
+    Valide le contenu déjà décodé d'un fichier des règles (voir load_rule_file)
+
+    Args:
+        data: Contenu JSON décodé
+        path: Origine des données, pour les messages d'erreur
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: un objet JSON est attendu")
+    conditions = data.get("conditions")
+    if not isinstance(conditions, dict):
+        raise ValueError(f"{path}: 'conditions' manquant ou invalide")
+
+    result = {}
+    for source in ("text", "media"):
+        rules = []
+        vocabularies = {}
+        entries = data.get(f"{source}_rules")
+        if not isinstance(entries, list):
+            raise ValueError(f"{path}: '{source}_rules' manquant ou invalide")
+
+        for position, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                raise ValueError(f"{path}: {source}_rules[{position}] n'est pas un objet")
+            condition_id, mode, instruction = (entry.get(key) for key in ("id", "mode", "instruction"))
+            if not all(isinstance(value, str) and value for value in (condition_id, mode, instruction)):
+                raise ValueError(f"{path}: {source}_rules[{position}] doit avoir 'id', 'mode' et 'instruction'")
+            if mode not in MODES:
+                raise ValueError(f"{path}: {source}_rules[{position}] : mode inconnu '{mode}' "
+                                 f"(attendu: {', '.join(MODES)})")
+            if condition_id in vocabularies:
+                raise ValueError(f"{path}: condition '{condition_id}' en double dans {source}_rules")
+            vocabularies[condition_id] = _vocabulary(path, conditions, condition_id, source)
+            rules.append((condition_id, mode, instruction))
+
+        result[f"{source}_rules"] = tuple(rules)
+        result[f"{source}_vocabularies"] = vocabularies
+    return result
+
+
+def _vocabulary(path: str, conditions: Dict[str, Any], condition_id: str, source: str) -> frozenset:
+    """Vocabulaire d'une condition pour une source : termes communs + termes propres à la source"""
+    condition = conditions.get(condition_id)
+    if not isinstance(condition, dict):
+        raise ValueError(f"{path}: condition '{condition_id}' absente de 'conditions'")
+
+    terms = set()
+    for key in ("terms", f"{source}_terms"):
+        values = condition.get(key, [])
+        if not isinstance(values, list) or not all(isinstance(value, str) and value for value in values):
+            raise ValueError(f"{path}: '{condition_id}.{key}' doit être une liste de termes")
+        for value in values:
+            term = normalize_term(value)
+            if not term:
+                raise ValueError(f"{path}: '{condition_id}.{key}' : terme sans lettre ni chiffre '{value}'")
+            terms.add(term)
+    # Un vocabulaire vide est permis : la règle ne se déclenche jamais pour cette source
+    return frozenset(terms)
+
+
+def normalize_term(term: str) -> str:
+    """Terme tel qu'il apparaît dans un texte normalisé (minuscules, ponctuation remplacée, espaces simples)"""
+    return " ".join(normalize_text(term).split())
+
+
+class RuleFileWatcher:
+    """
+    Surveille le fichier des règles (date de modification et taille) depuis un thread
+    et appelle on_change à chaque modification
+
+    Une simple scrutation suffit ici : quelques os.stat par minute, sans dépendance.
+    Si on_change échoue (fichier en cours d'écriture par exemple), la modification
+    suivante du fichier déclenche un nouvel essai.
+    """
+
+    def __init__(self, path: str, on_change: Callable[[], Any], interval: float = 2.0):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._stamp = self._read_stamp()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _read_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self) -> bool:
+        """Appelle on_change si le fichier a changé depuis le dernier appel ; retourne True dans ce cas"""
+        stamp = self._read_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        self.on_change()
+        return True
+
+    def start(self) -> None:
+        """Démarre la surveillance en arrière-plan (thread démon)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="rule-file-watcher", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Surveillance du fichier des règles: {self.path} (toutes les {self.interval}s)")
+
+    def stop(self) -> None:
+        """Arrête la surveillance"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.logger.error(f"Erreur lors du rechargement des règles: {e}")
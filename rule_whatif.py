@@ -0,0 +1,498 @@
+# rule_whatif.py
+"""
+Simulateur « what-if » des règles du moteur de conditions
+
+Applique une modification proposée des règles (vocabulaire, priorité, ou fichier de
+règles complet) à tous les tweets et analyses de médias déjà stockés, avec le moteur
+par lots (condition_handler.evaluate_batch), et affiche :
+- les tweets qui deviennent éligibles ou non éligibles, ou changent de condition
+- la variation attendue du nombre d'appels au LLM de génération
+
+Le corpus est lu une fois puis conservé dans un instantané (data/rule_whatif_corpus.json)
+mis à jour de façon incrémentale : seuls les nouveaux fichiers sont relus. Les décisions
+des règles actives sont calculées une fois par session ; chaque simulation ne réévalue
+que les tweets qui contiennent un terme d'une condition modifiée (voir affected_records).
+
+Modifications (cumulables, SOURCE = text ou media, tout si absent) :
+    add [SOURCE:]CONDITION=TERME[,TERME...]     ajouter des termes
+    remove [SOURCE:]CONDITION=TERME[,TERME...]  retirer des termes
+    move SOURCE:CONDITION=RANG                  changer la priorité (1 = la plus haute)
+
+Usage:
+    python rule_whatif.py --add hat=beanie --remove text:negative=help
+    python rule_whatif.py --move media:kfc=1
+    python rule_whatif.py --rules proposed_rules.json
+    python rule_whatif.py --interactive
+"""
+import os
+import sys
+import json
+import copy
+import re
+import time
+import logging
+import argparse
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config import Config
+from condition_handler import RuleSet, evaluate_batch, RULES, SUBSTRING
+from rule_file import parse_rule_data
+from tokenized_text import normalize_text
+
+# Appels au LLM de génération par tweet éligible (memecoin_generator.generate_memecoin)
+GENERATION_CALLS_PER_ELIGIBLE_TWEET = 1
+
+SOURCES = ("text", "media")
+
+
+class CorpusSnapshot:
+    """
+    Textes des tweets stockés et description de leur premier média, conservés dans
+    un seul fichier JSON pour éviter de relire des milliers de petits fichiers
+
+    Les noms de fichiers (username_id.json) ne changent pas : à chaque chargement,
+    seuls les fichiers absents de l'instantané sont lus et les fichiers supprimés retirés.
+    """
+
+    def __init__(self, data_dir: str = Config.DATA_DIR, path: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.data_dir = data_dir
+        self.path = path or os.path.join(data_dir, "rule_whatif_corpus.json")
+
+    def load(self, refresh: bool = False) -> Tuple[List[str], List[str], List[Optional[str]]]:
+        """
+        Charge le corpus
+
+        Args:
+            refresh: Ignorer l'instantané et relire tous les fichiers
+
+        Returns:
+            (identifiants, textes, descriptions du premier média ou None), triés par identifiant.
+            Les analyses de médias sans tweet correspondant ont un texte vide.
+        """
+        snapshot = {"tweets": {}, "media": {}}
+        if not refresh and os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Instantané du corpus illisible, reconstruction: {e}")
+
+        changed = self._sync(snapshot["tweets"], "tweets", lambda name: True,
+                             lambda data: data.get("text", ""))
+        # Seule l'analyse du premier média est évaluée par le moteur de conditions
+        changed |= self._sync(snapshot["media"], "media_analysis", lambda name: name.endswith("_0"),
+                              lambda data: data.get("description"))
+        if changed:
+            self._save(snapshot)
+
+        tweets, media = snapshot["tweets"], snapshot["media"]
+        ids, texts, descriptions = [], [], []
+        for stem in sorted(tweets):
+            ids.append(stem)
+            texts.append(tweets[stem])
+            descriptions.append(media.get(f"{stem}_0"))
+        for stem in sorted(media):
+            if stem[:-2] not in tweets:
+                ids.append(f"media/{stem}")
+                texts.append("")
+                descriptions.append(media[stem])
+        return ids, texts, descriptions
+
+    def _sync(self, entries: Dict[str, Any], subdir: str, accept, extract) -> bool:
+        """Lit les fichiers de data_dir/subdir absents de entries ; retourne True si entries a changé"""
+        directory = os.path.join(self.data_dir, subdir)
+        if not os.path.isdir(directory):
+            names = set()
+        else:
+            names = {entry.name[:-5] for entry in os.scandir(directory)
+                     if entry.name.endswith(".json") and accept(entry.name[:-5])}
+
+        removed = [stem for stem in entries if stem not in names]
+        for stem in removed:
+            del entries[stem]
+
+        added = 0
+        for stem in names.difference(entries):
+            try:
+                with open(os.path.join(directory, f"{stem}.json"), "r", encoding="utf-8") as f:
+                    entries[stem] = extract(json.load(f))
+                added += 1
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Fichier ignoré ({subdir}/{stem}.json): {e}")
+        return bool(removed or added)
+
+    def _save(self, snapshot: Dict[str, Any]) -> None:
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f"Instantané du corpus non enregistré: {e}")
+
+
+def _parse_target(spec: str, require_source: bool = False) -> Tuple[Optional[str], str, str]:
+    """'[source:]condition=valeur' -> (source ou None, condition, valeur)"""
+    target, separator, value = spec.partition("=")
+    if not separator or not value:
+        raise ValueError(f"Modification invalide '{spec}' (attendu: [source:]condition=valeur)")
+    source, _, condition_id = target.rpartition(":")
+    if source and source not in SOURCES:
+        raise ValueError(f"Source inconnue '{source}' (attendu: {', '.join(SOURCES)})")
+    if require_source and not source:
+        raise ValueError(f"Source requise dans '{spec}' (text:... ou media:...)")
+    return source or None, condition_id, value
+
+
+def apply_change(data: Dict[str, Any], action: str, spec: str) -> None:
+    """
+    Applique une modification au contenu d'un fichier de règles (voir la documentation du module)
+
+    Raises:
+        ValueError: Modification invalide ou condition inconnue
+    """
+    conditions = data["conditions"]
+    if action in ("add", "remove"):
+        source, condition_id, value = _parse_target(spec)
+        # Une condition mal orthographiée ne doit pas devenir une nouvelle condition vide
+        condition = conditions.get(condition_id)
+        if condition is None:
+            raise ValueError(f"Condition inconnue '{condition_id}'")
+        terms = [term.strip().lower() for term in value.split(",") if term.strip()]
+
+        if action == "add":
+            key = f"{source}_terms" if source else "terms"
+            values = condition.setdefault(key, [])
+            values.extend(term for term in terms if term not in values)
+            return
+
+        # Un terme absent ne doit pas donner une simulation « sans changement » trompeuse
+        keys = ("terms", "text_terms", "media_terms") if source is None else ("terms", f"{source}_terms")
+        for term in terms:
+            if not any(term in condition.get(key, []) for key in keys):
+                raise ValueError(f"Terme '{term}' absent de '{condition_id}'")
+
+        for term in terms:
+            if source is None:
+                for key in ("terms", "text_terms", "media_terms"):
+                    if term in condition.get(key, []):
+                        condition[key].remove(term)
+            elif term in condition.get(f"{source}_terms", []):
+                condition[f"{source}_terms"].remove(term)
+            elif term in condition.get("terms", []):
+                # Terme commun retiré d'une seule source : il reste propre à l'autre
+                condition["terms"].remove(term)
+                other = "media" if source == "text" else "text"
+                condition.setdefault(f"{other}_terms", []).append(term)
+        return
+
+    if action == "move":
+        source, condition_id, value = _parse_target(spec, require_source=True)
+        rules = data[f"{source}_rules"]
+        positions = [index for index, rule in enumerate(rules) if rule.get("id") == condition_id]
+        if not positions:
+            raise ValueError(f"Aucune règle '{condition_id}' dans {source}_rules")
+        try:
+            rank = int(value)
+        except ValueError:
+            raise ValueError(f"Rang invalide '{value}'")
+        rule = rules.pop(positions[0])
+        rules.insert(min(max(rank, 1), len(rules) + 1) - 1, rule)
+        return
+
+    raise ValueError(f"Action inconnue '{action}' (attendu: add, remove, move)")
+
+
+def evaluate(rules: RuleSet, texts: List[str], descriptions: List[Optional[str]]) -> List[Optional[Tuple[str, str]]]:
+    """(condition_id, instruction) ou None pour chaque tweet du corpus"""
+    return evaluate_batch(texts, descriptions, rules=rules)
+
+
+def _touched_conditions(rules_before: Tuple, rules_after: Tuple, vocabularies_before: Dict[str, frozenset],
+                        vocabularies_after: Dict[str, frozenset]) -> Set[str]:
+    """
+    Conditions d'une source dont la modification peut changer une décision
+
+    Une condition est touchée si sa règle (mode, instruction), son vocabulaire ou sa
+    présence change. Pour les changements de priorité, une décision ne change que si le
+    tweet contient des termes des deux conditions d'une paire dont l'ordre s'inverse :
+    il suffit d'ajouter une condition de chaque paire (couverture choisie gloutonnement,
+    la règle déplacée pour un simple déplacement).
+    """
+    old_rules = {condition_id: (mode, instruction) for condition_id, mode, instruction in rules_before}
+    new_rules = {condition_id: (mode, instruction) for condition_id, mode, instruction in rules_after}
+    touched = {
+        condition_id for condition_id in old_rules.keys() | new_rules.keys()
+        if old_rules.get(condition_id) != new_rules.get(condition_id)
+        or vocabularies_before.get(condition_id) != vocabularies_after.get(condition_id)
+    }
+
+    old_rank = {rule[0]: index for index, rule in enumerate(rules_before)}
+    new_rank = {rule[0]: index for index, rule in enumerate(rules_after)}
+    common = [condition_id for condition_id in old_rank if condition_id in new_rank and condition_id not in touched]
+    inversions = [
+        (first, second) for position, first in enumerate(common) for second in common[position + 1:]
+        if (old_rank[first] < old_rank[second]) != (new_rank[first] < new_rank[second])
+    ]
+    while inversions:
+        degrees = Counter(condition_id for pair in inversions for condition_id in pair)
+        chosen = degrees.most_common(1)[0][0]
+        touched.add(chosen)
+        inversions = [pair for pair in inversions if chosen not in pair]
+    return touched
+
+
+def _candidate_terms(conditions: Set[str], rule_sets: Tuple[RuleSet, ...], source: str) -> Tuple[Set[str], Set[str]]:
+    """
+    Termes qui signalent un texte pouvant déclencher l'une des conditions (sans faux négatif),
+    comme CompiledRules.may_match
+
+    Returns:
+        (premier mot de chaque expression, termes des règles recherchées comme sous-chaînes)
+    """
+    heads, substrings = set(), set()
+    for rules in rule_sets:
+        vocabularies = getattr(rules, f"{source}_vocabularies")
+        for condition_id, mode, _ in getattr(rules, f"{source}_rules"):
+            if condition_id not in conditions:
+                continue
+            for term in vocabularies[condition_id]:
+                if mode == SUBSTRING:
+                    substrings.add(term)
+                words = normalize_text(term).split()
+                if words:
+                    heads.add(words[0])
+    return heads, substrings
+
+
+def build_word_index(normalized_texts: List[Optional[str]]) -> Dict[str, array]:
+    """Index inversé mot -> numéros des textes qui le contiennent (une fois par session)"""
+    index: Dict[str, array] = {}
+    for position, text in enumerate(normalized_texts):
+        if not text:
+            continue
+        for word in set(text.split()):
+            postings = index.get(word)
+            if postings is None:
+                postings = index[word] = array("I")
+            postings.append(position)
+    return index
+
+
+def affected_records(before: RuleSet, after: RuleSet, word_indexes: Dict[str, Dict[str, array]],
+                     normalized: Dict[str, List[Optional[str]]]) -> List[int]:
+    """
+    Index des tweets dont la décision peut différer entre deux versions des règles
+
+    Les autres tweets ne contiennent aucun terme d'une condition touchée (ni dans le texte,
+    ni dans la description du média) : leur décision est forcément la même.
+
+    Args:
+        before, after: Règles comparées
+        word_indexes: Index inversé (build_word_index) des textes et des descriptions, par source
+        normalized: Textes et descriptions normalisés, par source ("text", "media")
+    """
+    candidates = set()
+    for source in SOURCES:
+        touched = _touched_conditions(
+            getattr(before, f"{source}_rules"), getattr(after, f"{source}_rules"),
+            getattr(before, f"{source}_vocabularies"), getattr(after, f"{source}_vocabularies"))
+        heads, substrings = _candidate_terms(touched, (before, after), source)
+
+        word_index = word_indexes[source]
+        for head in heads:
+            candidates.update(word_index.get(head, ()))
+        if substrings:
+            pattern = re.compile("|".join(map(re.escape, sorted(substrings, key=len, reverse=True))))
+            candidates.update(position for position, text in enumerate(normalized[source])
+                              if text and pattern.search(text))
+    return sorted(candidates)
+
+
+def compare(ids: List[str], before: List[Optional[Tuple[str, str]]],
+            after: List[Optional[Tuple[str, str]]]) -> Dict[str, Any]:
+    """
+    Compare les décisions de deux versions des règles
+
+    Returns:
+        Dictionnaire sérialisable en JSON : nombres de tweets éligibles, identifiants
+        des tweets qui changent d'éligibilité ou de condition, transitions
+        (condition avant -> après) et variation des appels au LLM
+    """
+    became_eligible, became_ineligible, condition_changed = [], [], []
+    instruction_changed = 0
+    transitions = Counter()
+
+    for record_id, old, new in zip(ids, before, after):
+        if old == new:
+            continue
+        if old is None:
+            became_eligible.append(record_id)
+        elif new is None:
+            became_ineligible.append(record_id)
+        elif old[0] != new[0]:
+            condition_changed.append(record_id)
+        else:
+            instruction_changed += 1
+            continue
+        transitions[f"{old[0] if old else '-'} -> {new[0] if new else '-'}"] += 1
+
+    eligible_before = sum(1 for decision in before if decision is not None)
+    eligible_after = sum(1 for decision in after if decision is not None)
+    return {
+        "tweets": len(ids),
+        "eligible_before": eligible_before,
+        "eligible_after": eligible_after,
+        "became_eligible": became_eligible,
+        "became_ineligible": became_ineligible,
+        "condition_changed": condition_changed,
+        "instruction_changed": instruction_changed,
+        "transitions": dict(transitions.most_common()),
+        "llm_calls_before": eligible_before * GENERATION_CALLS_PER_ELIGIBLE_TWEET,
+        "llm_calls_after": eligible_after * GENERATION_CALLS_PER_ELIGIBLE_TWEET,
+        "llm_calls_delta": (eligible_after - eligible_before) * GENERATION_CALLS_PER_ELIGIBLE_TWEET,
+    }
+
+
+def print_report(report: Dict[str, Any], texts: Dict[str, str], limit: int) -> None:
+    """Affiche le rapport de compare, avec au plus `limit` exemples par catégorie"""
+    tweets = report["tweets"]
+    before, after = report["eligible_before"], report["eligible_after"]
+    print(f"Tweets: {tweets:,}, réévalués: {report.get('reevaluated', tweets):,} ({report.get('elapsed', 0):.2f}s)")
+    print(f"Éligibles: {before:,} -> {after:,} ({after - before:+,})")
+    calls_before, delta = report["llm_calls_before"], report["llm_calls_delta"]
+    relative = f", {delta / calls_before:+.1%}" if calls_before else ""
+    print(f"Appels LLM de génération: {calls_before:,} -> {report['llm_calls_after']:,} ({delta:+,}{relative})")
+    print(f"Instruction modifiée (même condition): {report['instruction_changed']:,}")
+
+    for title, key in (("Deviennent éligibles", "became_eligible"),
+                       ("Ne sont plus éligibles", "became_ineligible"),
+                       ("Changent de condition", "condition_changed")):
+        record_ids = report[key]
+        print(f"\n{title}: {len(record_ids):,}")
+        for record_id in record_ids[:limit]:
+            print(f"- {record_id}: {texts.get(record_id, '')[:100]!r}")
+
+    if report["transitions"]:
+        print("\nTransitions (avant -> après):")
+        for transition, count in list(report["transitions"].items())[:limit]:
+            print(f"  {transition}: {count:,}")
+
+
+class WhatIfSession:
+    """Corpus et décisions des règles actives, gardés en mémoire entre deux simulations"""
+
+    def __init__(self, ids: List[str], texts: List[str], descriptions: List[Optional[str]],
+                 rules_file: Optional[str] = None, baseline_rules: Optional[RuleSet] = None):
+        self.rules_file = rules_file or Config.CONDITION_RULES_FILE
+        self.ids, self.texts, self.descriptions = ids, texts, descriptions
+        self.text_by_id = dict(zip(ids, texts))
+        self.normalized = {
+            "text": [normalize_text(text) for text in texts],
+            "media": [normalize_text(text) if text else None for text in descriptions],
+        }
+        self.word_indexes = {source: build_word_index(self.normalized[source]) for source in SOURCES}
+        self.baseline_rules = baseline_rules or RULES
+        self.baseline = evaluate(self.baseline_rules, texts, descriptions)
+        self.reset()
+
+    @classmethod
+    def from_data_dir(cls, data_dir: str = Config.DATA_DIR, rules_file: Optional[str] = None,
+                      refresh: bool = False) -> "WhatIfSession":
+        """Session sur le corpus stocké dans data_dir (voir CorpusSnapshot)"""
+        return cls(*CorpusSnapshot(data_dir).load(refresh), rules_file=rules_file)
+
+    def reset(self) -> None:
+        """Repart du fichier de règles proposé (ou des règles actives)"""
+        with open(self.rules_file, "r", encoding="utf-8") as f:
+            self.proposal = json.load(f)
+
+    def simulate(self) -> Dict[str, Any]:
+        """Compile la proposition, l'évalue sur tout le corpus et la compare aux règles actives"""
+        start = time.perf_counter()
+        rules = RuleSet.from_definitions(parse_rule_data(copy.deepcopy(self.proposal), "proposition"))
+
+        indexes = affected_records(self.baseline_rules, rules, self.word_indexes, self.normalized)
+        decisions = evaluate(rules, [self.texts[index] for index in indexes],
+                             [self.descriptions[index] for index in indexes])
+        after = list(self.baseline)
+        for index, decision in zip(indexes, decisions):
+            after[index] = decision
+
+        report = compare(self.ids, self.baseline, after)
+        report["reevaluated"] = len(indexes)
+        report["elapsed"] = time.perf_counter() - start
+        return report
+
+
+def interactive(session: WhatIfSession, limit: int) -> None:
+    """Boucle interactive : chaque modification est simulée immédiatement"""
+    print("Commandes: add|remove [source:]condition=termes, move source:condition=rang, reset, quit")
+    while True:
+        try:
+            line = input("\nwhat-if> ").strip()
+        except EOFError:
+            return
+        if not line:
+            continue
+        action, _, spec = line.partition(" ")
+        if action in ("quit", "exit"):
+            return
+        if action == "reset":
+            session.reset()
+        else:
+            try:
+                apply_change(session.proposal, action, spec.strip())
+            except ValueError as e:
+                print(f"Erreur: {e}")
+                continue
+        try:
+            print_report(session.simulate(), session.text_by_id, limit)
+        except ValueError as e:
+            print(f"Règles invalides: {e}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Effet d'une modification des règles sur le corpus stocké")
+    parser.add_argument("--data-dir", default=Config.DATA_DIR)
+    parser.add_argument("--rules", default=None,
+                        help="Fichier de règles proposé (défaut: règles actives, à modifier avec --add/--remove/--move)")
+    parser.add_argument("--add", action="append", default=[], metavar="[SOURCE:]CONDITION=TERMES")
+    parser.add_argument("--remove", action="append", default=[], metavar="[SOURCE:]CONDITION=TERMES")
+    parser.add_argument("--move", action="append", default=[], metavar="SOURCE:CONDITION=RANG")
+    parser.add_argument("--limit", type=int, default=10, help="Exemples affichés par catégorie")
+    parser.add_argument("--json", action="store_true", help="Afficher le rapport complet en JSON")
+    parser.add_argument("--refresh", action="store_true", help="Relire tous les fichiers du corpus")
+    parser.add_argument("--interactive", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    session = WhatIfSession.from_data_dir(args.data_dir, args.rules, args.refresh)
+    if not args.json:
+        print(f"Corpus chargé et évalué avec les règles actives: {len(session.ids):,} tweets "
+              f"({time.perf_counter() - start:.2f}s)\n")
+
+    try:
+        for action in ("add", "remove", "move"):
+            for spec in getattr(args, action):
+                apply_change(session.proposal, action, spec)
+        report = session.simulate()
+    except ValueError as e:
+        print(f"Erreur: {e}", file=sys.stderr)
+        return 2
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report, session.text_by_id, args.limit)
+
+    if args.interactive:
+        interactive(session, args.limit)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,12 +2,12 @@
 import re
 import spacy
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 class SimplifiedTweetAnalyzer:
     """Version simplifiée de l'analyseur de tweets pour le simulateur"""
     
-    def __init__(self):
+    def __init__(self, nlp: Optional[spacy.Language] = None):
         self.logger = logging.getLogger(__name__)
         
         # Mots à ignorer dans l'analyse (liste standard)
@@ -23,6 +23,11 @@ class SimplifiedTweetAnalyzer:
             "it", "we", "they", "them", "him", "her", "me", "us"
         ]
         
+        # Pipeline spaCy déjà chargé (partagé avec TweetAnalyzer ou un pool d'analyse)
+        if nlp is not None:
+            self.nlp = nlp
+            return
+
         # Initialisation de SpaCy pour NLP
         try:
             self.nlp = spacy.load("en_core_web_sm")
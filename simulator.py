@@ -12,6 +12,11 @@ from media_analyzer import MediaAnalyzer
 from theme_detector import ThemeDetector
 from memecoin_generator import MemecoinsGenerator
 from data_storage import DataStorage
+from tokenized_text import TokenizedText
+from condition_metrics import METRICS
+from pattern_matcher import PatternMatcher
+from nlp_cache import NlpCache
+from vision_cache import VisionCache
 
 class TweetSimulator:
     """Simulateur de tweets pour tester le système sans API Twitter"""
@@ -25,10 +30,17 @@ class TweetSimulator:
         
         # Initialiser les composants
         self.storage = DataStorage(data_dir=data_dir)
-        self.tweet_analyzer = TweetAnalyzer(config)
-        self.media_analyzer = MediaAnalyzer(config)
+        # Les sorties spaCy des tweets déjà traités sont relues depuis le cache
+        nlp_cache = NlpCache(os.path.join(data_dir, config.NLP_CACHE_FILE)) if config.NLP_CACHE_FILE else None
+        self.tweet_analyzer = TweetAnalyzer(config, nlp_cache=nlp_cache)
+        # Les analyses Vision des médias déjà vus (même URL ou même image) sont relues depuis le cache
+        vision_cache = VisionCache(
+            os.path.join(data_dir, config.VISION_CACHE_FILE), ttl=config.VISION_CACHE_TTL,
+            max_entries=config.VISION_CACHE_MAX_ENTRIES) if config.VISION_CACHE_FILE else None
+        self.media_analyzer = MediaAnalyzer(config, vision_cache=vision_cache)
         self.theme_detector = ThemeDetector(config)
         self.memecoin_generator = MemecoinsGenerator(config)
+        self.pattern_matcher = PatternMatcher()
         
         # Créer le répertoire de données
         os.makedirs(data_dir, exist_ok=True)
@@ -43,7 +55,7 @@ class TweetSimulator:
             username: Nom d'utilisateur du compte Twitter
             text: Texte du tweet
             media_urls: Liste des URLs des médias
-                Format: [{"type": "photo/video", "url": "http://..."}]
+                Format: [{"type": "photo/video", "url": "http://...", "preview_image_url": "http://..." (optionnel)}]
             likes: Nombre de likes
             retweets: Nombre de retweets
             
@@ -76,7 +88,7 @@ class TweetSimulator:
                 tweet["media"].append({
                     "type": media_type,
                     "url": media_url,
-                    "preview_image_url": media_url,
+                    "preview_image_url": media_item.get("preview_image_url", media_url),
                     "media_key": f"media_key_{tweet_id}_{idx}"
                 })
         
@@ -98,11 +110,9 @@ class TweetSimulator:
             self.logger.error(f"Tweet {tweet_id} non trouvé pour @{username}")
             return None
 
-        # 2. Analyser le texte du tweet
-        self.logger.info("Analyse du texte du tweet...")
-        text_analysis = self.tweet_analyzer.extract_keywords(tweet)
-        text_analysis["username"] = username  # Ajouter l'username pour la détection
-        self.storage.save_analysis(text_analysis, username)
+        # 2. Normaliser le texte une seule fois pour toutes les étapes
+        # (l'analyse spaCy n'est faite qu'une fois l'éligibilité établie, voir l'étape 5)
+        tokenized = TokenizedText(tweet["text"])
         
         # 3. Analyser les médias du tweet
         media_analyses = []
@@ -122,8 +132,10 @@ class TweetSimulator:
                     # Analyser le média
                     if media_type == "photo":
                         media_analysis = self.media_analyzer.analyze_image(media_url)
-                    elif media_type == "video":
-                        media_analysis = self.media_analyzer.process_video(media_url)
+                    elif media_type in ("video", "animated_gif"):
+                        # Vignette fournie par Twitter si elle existe, sinon première frame de la vidéo
+                        media_analysis = self.media_analyzer.process_video(
+                            media_url, preview_image_url=media.get("preview_image_url"))
                     else:
                         self.logger.warning(f"Type de média non pris en charge: {media_type}")
                         media_analysis = {"error": f"Type de média non pris en charge: {media_type}"}
@@ -138,48 +150,45 @@ class TweetSimulator:
         
         # 4. DÉCISION D'ÉLIGIBILITÉ SIMPLIFIÉE: Uniquement basée sur les conditions
         try:
-            from condition_handler import extract_ticker_info, is_pattern_eligible
+            from condition_handler import evaluate_conditions
             
-            # Vérifier d'abord avec extract_ticker_info (conditions textuelles)
-            ticker_info = extract_ticker_info(tweet["text"])
-            if ticker_info:
-                self.logger.info(f"Tweet éligible via extract_ticker_info: {ticker_info}")
-                is_eligible = True
-                condition_match = ticker_info
-            else:
-                # Ensuite vérifier avec is_pattern_eligible (inclut analyse média)
-                pattern_result = is_pattern_eligible(tweet["text"], username, first_media_analysis)
-                if isinstance(pattern_result, tuple):
-                    is_eligible, condition_match = pattern_result
-                else: 
-                    is_eligible = pattern_result    
-                    condition_match = "Détecté via pattern matching"
-                self.logger.info(f"Tweet éligible via is_pattern_eligible: {is_eligible}")
+            # Texte puis description du média, évalués une seule fois pour tout le traitement
+            condition_match = evaluate_conditions(tokenized, first_media_analysis)
+            is_eligible = condition_match is not None
+            if is_eligible:
+                self.logger.info(f"Tweet éligible via la condition '{condition_match.condition_id}' "
+                                 f"({condition_match.source}: '{condition_match.term}')")
             
         except ImportError as e:
             self.logger.error(f"Erreur d'importation de condition_handler: {e}")
             # Fallback via PatternMatcher
-            from pattern_matcher import PatternMatcher
-            is_eligible = PatternMatcher.is_eligible(tweet["text"], username, first_media_analysis)
+            is_eligible = self.pattern_matcher.is_eligible(tokenized, username, first_media_analysis)
             self.logger.info(f"Tweet éligible via PatternMatcher fallback: {is_eligible}")
             condition_match = "Détecté via pattern matcher fallback"
         
-        # Si non éligible, sortir immédiatement
+        # Si non éligible, sortir immédiatement (analyse légère, sans spaCy)
         if not is_eligible:
+            text_analysis = self.tweet_analyzer.extract_rule_features(tweet, tokenized)
+            text_analysis["username"] = username
+            self.storage.save_analysis(text_analysis, username)
             self.logger.info("Tweet non éligible - aucune condition validée")
             print("\nCe tweet n'est pas éligible pour la génération d'un meme coin:")
             print(f"- Tweet: \"{tweet['text']}\"")
             print("- Aucune condition validée")
             return None
         
-        # 5. Extraire les mots-clés pertinents (pour le prompt uniquement)
+        # 5. Analyser le texte du tweet avec spaCy et extraire les mots-clés pertinents (pour le prompt uniquement)
+        self.logger.info("Analyse du texte du tweet...")
+        text_analysis = self.tweet_analyzer.extract_keywords(tweet, tokenized)
+        text_analysis["username"] = username  # Ajouter l'username pour la détection
+        self.storage.save_analysis(text_analysis, username)
+        
         relevant_keywords = self.theme_detector.extract_relevant_keywords(
             text_analysis, media_analyses)
         self.logger.info(f"Mots-clés pertinents: {relevant_keywords}")
         
         # 6. Obtenir des instructions de format basées sur les conditions
-        from pattern_matcher import PatternMatcher
-        memecoin_format = PatternMatcher.get_memecoin_format(tweet["text"], username)
+        memecoin_format = self.pattern_matcher.get_memecoin_format(tokenized, username, condition_match)
         
         # 7. Générer le meme coin
         self.logger.info("Generating meme coin...")
@@ -195,6 +204,8 @@ class TweetSimulator:
 
         # Vérifier si un code de statut spécial a été retourné
         status_code = memecoin.get("status_code")
+        if METRICS.enabled and hasattr(condition_match, "condition_id"):
+            METRICS.record_outcome(condition_match.condition_id, status_code)
         if status_code in [801, 802, 803, 804]:
             # Coder les messages spécifiques pour chaque code
             status_messages = {
@@ -228,7 +239,11 @@ class TweetSimulator:
         print("\n========================================")
         print("TWEET AND MEME COIN SIMULATOR")
         print("========================================\n")
-        
+
+        # Les modifications du fichier des règles sont prises en compte sans redémarrer
+        from condition_handler import start_rule_watcher
+        start_rule_watcher()
+
         while True:
             print("\nWhat would you like to do?")
             print("1. Create a new simulated tweet")
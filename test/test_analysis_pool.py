@@ -0,0 +1,50 @@
+# test_analysis_pool.py
+import json
+import multiprocessing
+
+import spacy
+
+from config import Config
+from analysis_pool import AnalysisPool, process_memory
+from tokenized_text import TokenizedText
+from condition_handler import evaluate_conditions
+
+TWEETS = [
+    {"id": "1", "text": "RIP to the legendary Grumpy Cat $GRUMPY"},
+    {"id": "2", "text": "Quarterly results are out, see the Report"},
+    {"id": "3", "text": "Elon Musk just posted a dog wearing a hat #dogwifhat"},
+]
+
+
+def test_pool_matches_in_process_analysis():
+    """Les workers forkés donnent les mêmes analyses et conditions que le parent"""
+    with AnalysisPool(Config, nlp=spacy.blank("en"), workers=2) as pool:
+        results = pool.analyze(TWEETS, chunksize=1)
+        report = pool.memory_report()
+
+        for tweet, (analysis, condition_match) in zip(TWEETS, results):
+            tokenized = TokenizedText(tweet["text"])
+            expected_match = evaluate_conditions(tokenized)
+            if expected_match is None:
+                expected = pool.analyzer.extract_rule_features(tweet, tokenized)
+                assert condition_match is None
+            else:
+                expected = pool.analyzer.extract_keywords(tweet, tokenized)
+                assert condition_match.condition_id == expected_match.condition_id
+            assert json.dumps(analysis) == json.dumps(expected)
+
+    assert len(report["workers"]) == 2
+    if report["total_pss"] is not None:
+        assert all(worker["pss"] <= worker["rss"] for worker in report["workers"])
+        assert report["total_pss"] <= report["total_rss"]
+    assert set(process_memory(0)) == {"pid", "rss", "pss", "shared", "private"}
+
+
+def test_worker_pids_ignores_other_pools():
+    """Les workers d'un autre pool du même processus ne sont pas comptés"""
+    with multiprocessing.get_context("fork").Pool(3) as other:
+        with AnalysisPool(Config, nlp=spacy.blank("en"), workers=2) as pool:
+            other_pids = {worker.pid for worker in other._pool}
+            pids = pool.worker_pids()
+            assert len(pids) == 2
+            assert not other_pids & set(pids)
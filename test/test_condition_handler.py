@@ -0,0 +1,277 @@
+# test_condition_handler.py
+from condition_handler import (
+    extract_ticker_info, analyze_media_description, detect_trigger_themes,
+    evaluate_conditions, is_pattern_eligible, get_prompt_instructions,
+    evaluate_batch, iter_evaluate, find_phrase_hits, normalize_text,
+    TEXT_ENGINE, MEDIA_ENGINE, TEXT_VOCABULARIES, MEDIA_VOCABULARIES,
+    TEXT_RULES, MEDIA_RULES, RuleSet
+)
+from config import Config
+from phrase_matcher import PhraseMatcher
+from pattern_matcher import PatternMatcher
+from tokenized_text import TokenizedText
+
+
+def instruction(condition_id, rules=TEXT_RULES):
+    """Instruction associée à une condition"""
+    for rule_id, _, rule_instruction in rules:
+        if rule_id == condition_id:
+            return rule_instruction
+    raise KeyError(condition_id)
+
+
+def test_no_condition():
+    """Un tweet sans mot déclencheur ne correspond à aucune condition"""
+    assert extract_ticker_info("Good morning everyone") is None
+
+
+def test_first_word_rules_follow_word_order():
+    """Pour hat/elon/style/meme, c'est le premier mot du tweet qui l'emporte"""
+    assert extract_ticker_info("meme with a hat") == instruction("meme")
+    assert extract_ticker_info("hat, then a meme") == instruction("hat")
+
+
+def test_first_word_rules_beat_priority_rules():
+    """Les règles mot par mot passent avant toutes les autres conditions"""
+    assert extract_ticker_info("kanye west killed it in this style") == instruction("style")
+
+
+def test_priority_order():
+    """Parmi les autres conditions, l'ordre de priorité historique est conservé"""
+    assert extract_ticker_info("the dog died") == instruction("death")
+    assert extract_ticker_info("the dog died in pain") == instruction("negative")
+    assert extract_ticker_info("pepe and bitcoin") == instruction("meme_coin")
+    assert extract_ticker_info("Kanye West lost") == instruction("kanye")
+
+
+def test_substring_conditions():
+    """trump, mcdonald et kfc sont recherchés dans tout le texte nettoyé"""
+    assert extract_ticker_info("#TrumpTrain") == instruction("trump")
+    assert extract_ticker_info("mcdonalds fries") == instruction("mcdonald")
+    assert extract_ticker_info("I love KFC!") == instruction("kfc")
+
+
+def test_punctuation_is_normalized():
+    """La ponctuation est remplacée par des espaces avant le découpage"""
+    assert extract_ticker_info("So much PAIN!!!") == instruction("negative")
+    assert extract_ticker_info("@elon/tesla") == instruction("elon")
+
+
+def test_symbols_are_word_boundaries():
+    """Hashtags, deux-points, guillemets, parenthèses et apostrophes séparent les mots"""
+    assert extract_ticker_info("Kanye West: new album") == instruction("kanye")
+    assert extract_ticker_info('"colonel sanders" returns') == instruction("social_brand")
+    assert extract_ticker_info("(tiger)") == instruction("animal")
+    assert extract_ticker_info("ELON’S new toy") == instruction("elon")
+    assert extract_ticker_info("McDonald's fries") == instruction("mcdonald")
+    assert analyze_media_description({"description": "#taco bell is back"}) == \
+        instruction("social_brand", MEDIA_RULES)
+    assert detect_trigger_themes("#earthquake in Japan") == {"catastrophe_naturelle": ["earthquake"]}
+    assert detect_trigger_themes("Massive earthquake: many hurt") == {"catastrophe_naturelle": ["earthquake"]}
+    assert detect_trigger_themes("(war) again") == {"conflit": ["war"]}
+    assert detect_trigger_themes('"tsunami" warning') == {"catastrophe_naturelle": ["tsunami"]}
+    assert detect_trigger_themes("Un coup d'état") == {"conflit": ["coup d'état", "coup"]}
+
+
+def test_cashtags_stay_single_words():
+    """'$' reste attaché au mot : un cashtag n'est pas le mot du vocabulaire"""
+    assert TokenizedText("$DOGE: up").tokens == ["$doge", "up"]
+    assert extract_ticker_info("$TIGER pumps") is None
+
+
+def test_word_in_several_vocabularies_keeps_highest_priority():
+    """Un mot présent dans plusieurs vocabulaires déclenche la condition la plus prioritaire"""
+    assert extract_ticker_info("doge") == instruction("meme_coin")
+    assert extract_ticker_info("x") == instruction("social_brand")
+
+
+def test_multi_word_phrases():
+    """Les expressions de plusieurs mots sont reconnues sur les frontières de mots"""
+    assert extract_ticker_info("he needs to go number two") == instruction("death")
+    assert extract_ticker_info("time for number two") == instruction("toilet")
+    assert extract_ticker_info("Colonel Sanders is back") == instruction("social_brand")
+    assert extract_ticker_info("a strategic reserve of dogs") == instruction("strategic_reserve")
+    assert extract_ticker_info("wee-wee") == instruction("toilet")
+
+
+def test_media_description_templates():
+    """Les instructions des médias reprennent le terme trouvé dans la description"""
+    media_instruction = instruction("animal", MEDIA_RULES)
+    assert analyze_media_description({"description": "A tiger next to a lion"}) == \
+        media_instruction.replace("{term}", "tiger")
+    assert analyze_media_description({"description": "A taco bell sign"}) == \
+        instruction("social_brand", MEDIA_RULES)
+    assert analyze_media_description({"subjects": ["dog"]}) is None
+
+
+def test_themes_use_word_boundaries():
+    """'war' ne correspond plus à 'award', les expressions restent reconnues"""
+    assert detect_trigger_themes("She won an award") == {"celebrite": ["award"]}
+    assert detect_trigger_themes("Volcanic eruption, then war!") == {
+        "catastrophe_naturelle": ["volcanic eruption"],
+        "conflit": ["war"],
+    }
+    assert detect_trigger_themes("RIP") == {"celebrite": ["rip", "RIP"]}
+    assert detect_trigger_themes("A lovely couple") == {}
+
+
+def test_themes_with_other_rules():
+    """Un jeu de règles compilé avec d'autres thèmes est utilisé sans toucher aux règles actives"""
+    rules = RuleSet.from_file(Config.CONDITION_RULES_FILE, trigger_themes={"meteo": ["heat wave", "storm"]})
+    assert detect_trigger_themes("Storm then a heat wave", rules) == {"meteo": ["heat wave", "storm"]}
+    assert detect_trigger_themes("Storm then a heat wave") == {}
+
+
+def test_phrase_matcher_overlapping_phrases():
+    """L'automate trouve les expressions imbriquées ou qui se chevauchent"""
+    matcher = PhraseMatcher()
+    matcher.add(["a", "b", "c"], "abc")
+    matcher.add(["b", "c"], "bc")
+    matcher.add(["c", "d"], "cd")
+    matcher.add(["b"], "b")
+    hits = matcher.find_all("x a b c d".split())
+    assert hits == [(2, 3, "b"), (1, 4, "abc"), (2, 4, "bc"), (3, 5, "cd")]
+
+
+def test_evaluate_conditions_text_match():
+    """La condition textuelle est évaluée une fois et porte le terme et sa position"""
+    match = evaluate_conditions("RIP my old friend, Kanye West")
+    assert match.condition_id == "kanye"
+    assert match.source == "text"
+    assert match.term == "kanye west"
+    assert match.span == (19, 29)
+    assert match.instruction == extract_ticker_info("RIP my old friend, Kanye West")
+    assert match.prompt_instructions == get_prompt_instructions("RIP my old friend, Kanye West")
+    assert match.format_guidance["format_type"] == "custom"
+
+    match = evaluate_conditions("#TrumpTrain")
+    assert (match.condition_id, match.term, match.span) == ("trump", "trump", (1, 6))
+
+
+def test_evaluate_conditions_media_match():
+    """Sans condition textuelle, la description du média est utilisée"""
+    media_analysis = {"description": "A tiger next to a lion", "subjects": []}
+    match = evaluate_conditions("Look at this", media_analysis)
+    assert match.condition_id == "animal"
+    assert match.source == "media"
+    assert match.span == (2, 7)
+    assert match.instruction == analyze_media_description(media_analysis)
+    assert evaluate_conditions("Look at this", {"subjects": ["tiger"]}) is None
+
+
+def test_is_pattern_eligible_returns_bool():
+    """is_pattern_eligible retourne toujours un booléen"""
+    assert is_pattern_eligible("Good morning") is False
+    assert is_pattern_eligible("Good morning", media_analysis={"description": "a cat"}) is True
+    assert is_pattern_eligible("my pet tiger") is True
+
+
+def test_evaluate_batch_matches_single_calls():
+    """Le lot donne les mêmes conditions que les appels unitaires, dans le même ordre"""
+    texts = ["Good morning", "the dog died", "Look at this", "the dog died", "Kanye West lost"]
+    descriptions = [None, None, "A tiger next to a lion", "a cat", None]
+    results = evaluate_batch(texts, descriptions, chunk_size=2)
+    assert results == [
+        None,
+        ("death", instruction("death")),
+        ("animal", analyze_media_description({"description": descriptions[2]})),
+        ("death", instruction("death")),
+        ("kanye", instruction("kanye")),
+    ]
+    assert evaluate_batch(texts) == [r if r is None or r[0] != "animal" else None for r in results]
+
+
+def test_iter_evaluate_streams_input():
+    """Le flux d'entrée est consommé par lots, sans être chargé entièrement"""
+    consumed = []
+
+    def tweets():
+        for index in range(10):
+            consumed.append(index)
+            yield "pepe" if index % 2 else "hello"
+
+    results = iter_evaluate(tweets(), chunk_size=3)
+    assert next(results) is None
+    assert consumed == [0, 1, 2]
+    assert [r and r[0] for r in results] == [
+        "meme_coin", None, "meme_coin", None, "meme_coin", None, "meme_coin", None, "meme_coin"]
+
+
+def test_tokenized_text_is_shared():
+    """Un TokenizedText est découpé une fois et ses occurrences sont réutilisées"""
+    tweet = TokenizedText("RIP Kanye-West, number two!")
+    assert tweet.tokens == ["rip", "kanye", "west", "number", "two"]
+    assert {"kanye west", "number two", "west number two"} <= tweet.ngrams
+    assert "rip" in tweet.token_set
+
+    assert extract_ticker_info(tweet) == extract_ticker_info(tweet.text)
+    hits = tweet.phrase_hits
+    assert detect_trigger_themes(tweet) == detect_trigger_themes(tweet.text)
+    assert evaluate_conditions(tweet).condition_id == "kanye"
+    assert tweet.phrase_hits is hits
+    assert TokenizedText.of(tweet) is tweet
+
+
+def test_fallback_check_uses_normalized_words():
+    """Le fallback de PatternMatcher compare les mots du texte normalisé"""
+    matcher = PatternMatcher()
+    assert matcher._complete_fallback_check("So much pain!")
+    assert matcher._complete_fallback_check(TokenizedText("time for wee-wee"))
+    assert matcher._complete_fallback_check("number   two")
+    assert matcher._complete_fallback_check("pay $5 now")
+    assert not matcher._complete_fallback_check("Good morning")
+    assert not matcher._complete_fallback_check("pay 5$ now")
+
+
+def test_prefilter_has_no_false_negatives():
+    """Tout texte pour lequel le moteur trouve une condition passe le préfiltre"""
+    for engine, vocabularies in ((TEXT_ENGINE, TEXT_VOCABULARIES), (MEDIA_ENGINE, MEDIA_VOCABULARIES)):
+        terms = sorted(set().union(*vocabularies.values()))
+        for term in terms:
+            for text in (term, f"Look: {term.upper()}!", f"x{term}y and more", f"@{term}/{term}"):
+                text_lower = normalize_text(text)
+                tokens = text_lower.split()
+                if engine.match(find_phrase_hits(text_lower), text_lower) is not None:
+                    assert engine.may_match(tokens, text_lower), (engine.namespace, text)
+
+
+def test_prefilter_rejects_unrelated_text():
+    """Un texte sans aucun terme candidat est rejeté avant l'automate"""
+    text_lower = normalize_text("Good morning everyone, have a nice day")
+    assert not TEXT_ENGINE.may_match(text_lower.split(), text_lower)
+    assert not MEDIA_ENGINE.may_match(text_lower.split(), text_lower)
+
+
+def test_prompt_instructions_format_precedence():
+    """La dernière catégorie du texte l'emporte, l'objet porté vient de la dernière action"""
+    result = get_prompt_instructions("that anime made me cry, RIP")
+    assert result["name_format"] == "[style]ification"
+    assert [example["ticker"] for example in result["examples"]] == ["ANIME", "KNIT"]
+
+    media_analysis = {
+        "description": "A photo",
+        "subjects": ["small dog", "person"],
+        "actions": ["dog wearing a coat and a hat", "dog with glasses", "dog with a ball"],
+    }
+    result = get_prompt_instructions("look", media_analysis)
+    assert result["name_format"] == "small dog wif glasses"
+    assert result["ticker_format"] == "sWg"
+
+    # "Carti" (avec majuscule) n'est jamais trouvé dans les textes en minuscules
+    media_analysis["description"] = "Carti on stage"
+    assert get_prompt_instructions("look", media_analysis)["name_format"] == "small dog wif glasses"
+    media_analysis["description"] = "Elon and Trump on stage"
+    assert get_prompt_instructions("look", media_analysis)["ticker_format"] == "ELO"
+
+
+def test_pattern_matcher_is_built_once():
+    """PatternMatcher garde les fonctions du moteur et bascule sur le fallback sans elles"""
+    matcher = PatternMatcher()
+    assert not matcher.degraded
+    assert matcher.is_eligible("my dog died", "someone")
+    assert matcher.get_memecoin_format("$PEPE to the moon")["ticker_format"]
+
+    matcher._evaluate_conditions = matcher._get_prompt_instructions = None
+    assert matcher.degraded
+    assert matcher.is_eligible("my dog died", "someone")
+    assert matcher.get_memecoin_format("$PEPE to the moon")["format_type"] == "dollar"
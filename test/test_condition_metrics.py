@@ -0,0 +1,37 @@
+# test_condition_metrics.py
+import json
+
+import condition_handler
+from condition_handler import evaluate_conditions
+from condition_metrics import ConditionMetrics
+
+
+def test_disabled_metrics_record_nothing(monkeypatch):
+    """Désactivées, les métriques ne sont pas mises à jour"""
+    metrics = ConditionMetrics(enabled=False)
+    monkeypatch.setattr(condition_handler, "METRICS", metrics)
+    evaluate_conditions("the dog died")
+    assert metrics.evaluations == 0
+
+
+def test_hits_latency_and_rejections(monkeypatch, tmp_path):
+    """Conditions par source, histogramme et taux de rejet sont exportés en JSON"""
+    metrics = ConditionMetrics(enabled=True)
+    monkeypatch.setattr(condition_handler, "METRICS", metrics)
+
+    evaluate_conditions("the dog died")
+    evaluate_conditions("Look at this", {"description": "a tiger"})
+    evaluate_conditions("Good morning")
+    metrics.record_outcome("trump", 802)
+    metrics.record_outcome("trump", None)
+
+    path = metrics.export(str(tmp_path / "metrics.json"))
+    with open(path, "r", encoding="utf-8") as f:
+        snapshot = json.load(f)
+
+    assert snapshot["evaluations"] == 3
+    assert snapshot["no_match"] == 1
+    assert snapshot["hits"] == {"death": {"text": 1, "media": 0}, "animal": {"text": 0, "media": 1}}
+    assert sum(snapshot["latency_histogram"].values()) == 3
+    assert snapshot["outcomes"]["trump"]["rejection_rate"] == 0.5
+    assert snapshot["outcomes"]["trump"]["status_codes"] == {"802": 1}
@@ -0,0 +1,58 @@
+# test_gazetteer.py
+import spacy
+
+from config import Config
+from gazetteer import Gazetteer
+from tweet_analyzer import TweetAnalyzer
+
+
+def test_find_known_entities():
+    """Noms, comptes (forme canonique), cashtags ; l'occurrence la plus longue l'emporte"""
+    gazetteer = Gazetteer.from_config(Config)
+    entities = gazetteer.find("@elonmusk says Tesla and SpaceX love $DOGE, Kanye West agrees")
+    assert {"text": "Elon Musk", "type": "PERSON"} in entities
+    assert {"text": "Tesla", "type": "ORG"} in entities
+    assert {"text": "$DOGE", "type": "PRODUCT"} in entities
+    assert {"text": "Kanye West", "type": "PERSON"} in entities
+    assert gazetteer.find("nothing to see here") == []
+
+
+def test_custom_vocabularies():
+    """Les vocabulaires fournis remplacent ceux des règles actives"""
+    gazetteer = Gazetteer.from_config(Config, vocabularies={"crypto": ["grumpy"]}, examples_file="")
+    assert gazetteer.find("Buy $GRUMPY now") == [{"text": "$GRUMPY", "type": "PRODUCT"}]
+    assert gazetteer.find("Buy $DOGE now") == []
+
+
+def test_covers_candidates():
+    """Seuls les mots en majuscule initiale doivent être des entités connues"""
+    gazetteer = Gazetteer.from_config(Config)
+    assert gazetteer.covers_candidates("Tesla launch today")
+    assert gazetteer.covers_candidates("@elonmusk loves Tesla")
+    assert not gazetteer.covers_candidates("Tesla opens in Paris")
+    assert not gazetteer.covers_candidates("Spring in Paris")
+
+
+def test_ner_skipped_only_when_gazetteer_covers_tweet(monkeypatch):
+    """Avec GAZETTEER_SKIP_NER, le composant "ner" n'est désactivé que si les entités connues couvrent le tweet"""
+    nlp = spacy.blank("en")
+    # Faux NER (règles) pour vérifier quand le composant est exécuté
+    nlp.add_pipe("entity_ruler", name="ner").add_patterns([
+        {"label": "GPE", "pattern": "Paris"},
+        {"label": "EVENT", "pattern": "launch"},
+    ])
+    tweets = [{"id": "1", "text": "Tesla launch in Paris"}, {"id": "2", "text": "Tesla launch today"}]
+
+    monkeypatch.setattr(Config, "GAZETTEER_SKIP_NER", True)
+    analyzer = TweetAnalyzer(Config, nlp=nlp)
+    analyses = analyzer.extract_keywords_batch(tweets)
+    assert analyses[0]["named_entities"] == [
+        {"text": "Tesla", "type": "ORG"}, {"text": "launch", "type": "EVENT"}, {"text": "Paris", "type": "GPE"}]
+    assert analyses[1]["named_entities"] == [{"text": "Tesla", "type": "ORG"}]
+    assert analyzer.extract_keywords(tweets[1]) == analyses[1]
+    assert nlp.pipe_names == ["ner"]
+
+    # Par défaut, le NER est toujours exécuté
+    monkeypatch.setattr(Config, "GAZETTEER_SKIP_NER", False)
+    analysis = TweetAnalyzer(Config, nlp=nlp).extract_keywords(tweets[1])
+    assert analysis["named_entities"] == [{"text": "Tesla", "type": "ORG"}, {"text": "launch", "type": "EVENT"}]
@@ -0,0 +1,33 @@
+# test_golden_corpus.py
+import json
+
+import condition_handler
+from benchmarks.golden_corpus import GOLDEN_FILE, golden_records, run, compare
+
+
+def test_decisions_match_golden_output(monkeypatch):
+    """Le moteur prend exactement les décisions enregistrées dans la référence"""
+    # Sans cache, pour évaluer réellement chaque enregistrement
+    monkeypatch.setattr(condition_handler.RULE_CACHE, "max_size", 0)
+    condition_handler.RULE_CACHE.clear()
+
+    with open(GOLDEN_FILE, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+
+    decisions, _ = run(golden_records())
+    assert compare(decisions, golden) == []
+
+
+def test_golden_inputs_are_frozen(monkeypatch):
+    """Les entrées de la référence ne dépendent ni de data/ ni des vocabulaires courants"""
+    import benchmarks.golden_corpus as golden_corpus
+
+    expected = golden_records()
+
+    def live_corpus(*args, **kwargs):
+        raise AssertionError("la référence ne doit pas relire les répertoires de données")
+
+    monkeypatch.setattr(golden_corpus, "load_corpus", live_corpus)
+    monkeypatch.setattr(condition_handler, "TEXT_VOCABULARIES",
+                        {**condition_handler.TEXT_VOCABULARIES, "added": frozenset({"zzz new term"})})
+    assert golden_records() == expected
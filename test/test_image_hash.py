@@ -0,0 +1,78 @@
+# test_image_hash.py
+import random
+
+import cv2
+import numpy as np
+
+from config import Config
+from image_hash import HammingIndex, dhash, hamming
+from test_vision_cache import make_analyzer
+
+
+def make_image(seed: int) -> np.ndarray:
+    """Image synthétique (disques de couleur et texte)"""
+    rng = np.random.default_rng(seed)
+    image = np.zeros((480, 640, 3), np.uint8)
+    for _ in range(12):
+        color = tuple(int(value) for value in rng.integers(0, 255, 3))
+        center = (int(rng.integers(0, 640)), int(rng.integers(0, 480)))
+        cv2.circle(image, center, int(rng.integers(20, 150)), color, -1)
+    cv2.putText(image, "MEME", (100, 300), cv2.FONT_HERSHEY_SIMPLEX, 4, (255, 255, 255), 8)
+    return image
+
+
+def encode(image: np.ndarray, quality: int = 95) -> bytes:
+    return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+
+
+def test_dhash_tolerates_resize_recompression_and_crop():
+    """Les variantes d'une image restent proches ; une autre image est loin"""
+    image = make_image(1)
+    reference = dhash(encode(image))
+    assert hamming(reference, dhash(encode(cv2.resize(image, (320, 240)), quality=30))) <= 2
+    assert hamming(reference, dhash(encode(image[10:-10, 14:-14]))) <= Config.VISION_NEAR_DUPLICATE_DISTANCE
+    assert hamming(reference, dhash(encode(make_image(2)))) > Config.VISION_NEAR_DUPLICATE_DISTANCE
+    assert dhash(b"not an image") is None
+
+
+def test_index_matches_brute_force():
+    """La recherche multi-blocs trouve exactement les hashes d'une recherche exhaustive"""
+    rng = random.Random(7)
+    hashes = [rng.getrandbits(64) for _ in range(2000)]
+    # Variantes proches de quelques hashes, à toutes les distances jusqu'à 12
+    for index in range(200):
+        flipped = hashes[index]
+        for bit in rng.sample(range(64), index % 13):
+            flipped ^= 1 << bit
+        hashes.append(flipped)
+    index = HammingIndex()
+    index.update((image_hash, item_id) for item_id, image_hash in enumerate(hashes))
+
+    for query in hashes[:50] + [rng.getrandbits(64) for _ in range(20)]:
+        for max_distance in (0, 3, 6, 12):
+            expected = sorted((hamming(query, image_hash), item_id) for item_id, image_hash in enumerate(hashes)
+                              if hamming(query, image_hash) <= max_distance)
+            assert index.search(query, max_distance) == expected
+
+
+def test_near_duplicate_reuses_analysis(tmp_path, monkeypatch):
+    """Une version recadrée et recompressée d'une image analysée n'appelle pas l'API"""
+    image = make_image(1)
+    content = {"https://pbs.twimg.com/media/A.jpg": encode(image),
+               "https://pbs.twimg.com/media/B.jpg": encode(image[10:-10, 14:-14], quality=60),
+               "https://pbs.twimg.com/media/C.jpg": encode(make_image(2))}
+    analyzer = make_analyzer(tmp_path, monkeypatch, content)
+
+    first = analyzer.analyze_image("https://pbs.twimg.com/media/A.jpg")
+    assert analyzer.analyze_image("https://pbs.twimg.com/media/B.jpg") == first
+    assert analyzer.client.calls == 1
+    analyzer.analyze_image("https://pbs.twimg.com/media/C.jpg")
+    assert analyzer.client.calls == 2
+
+    # Un autre analyseur (autre processus) retrouve les hashes enregistrés
+    other = make_analyzer(tmp_path, monkeypatch, {"https://example.com/copy.jpg": encode(image, quality=40)})
+    assert other.analyze_image("https://example.com/copy.jpg") == first
+    assert other.client.calls == 0
+
+    stats = analyzer.vision_cache.stats()
+    assert stats["similar_hits"] == 1 and stats["misses"] == 2
@@ -0,0 +1,27 @@
+# test_memory_monitor.py
+import json
+
+from memory_monitor import MemoryMonitor, process_memory
+
+
+def test_samples_are_bounded_and_exported(tmp_path):
+    """L'historique garde les derniers échantillons et s'exporte en JSON"""
+    path = tmp_path / "memory_usage.json"
+    monitor = MemoryMonitor(enabled=True, export_path=str(path), sample_interval=0, history_size=3)
+    for index in range(5):
+        monitor.record(10, nlp_strings=index)
+
+    snapshot = json.loads(path.read_text(encoding="utf-8"))
+    assert snapshot["processed"] == 50
+    assert [sample["nlp_strings"] for sample in snapshot["samples"]] == [2, 3, 4]
+    assert [sample["processed"] for sample in snapshot["samples"]] == [30, 40, 50]
+    if process_memory()["rss"] is not None:
+        assert snapshot["rss_min_kb"] <= snapshot["rss_last_kb"] <= snapshot["rss_max_kb"]
+
+
+def test_record_waits_for_interval():
+    """Entre deux intervalles, record ne fait que compter"""
+    monitor = MemoryMonitor(enabled=True, sample_interval=3600)
+    monitor.record(1)
+    monitor.record(1)
+    assert monitor.processed == 2 and len(monitor.samples) == 1
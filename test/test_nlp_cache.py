@@ -0,0 +1,52 @@
+# test_nlp_cache.py
+import json
+
+import spacy
+
+from config import Config
+from nlp_cache import NlpCache, model_version
+from tweet_analyzer import TweetAnalyzer
+
+TWEET = {"id": "1", "text": "Elon is dancing with the Tesla engineers"}
+
+
+def make_nlp(version: str = "1.0.0") -> spacy.Language:
+    """Pipeline sans modèle entraîné, avec des entités et des catégories fixées par règles"""
+    nlp = spacy.blank("en")
+    nlp.meta["version"] = version
+    nlp.add_pipe("entity_ruler").add_patterns([{"label": "PERSON", "pattern": "Elon"}])
+    ruler = nlp.add_pipe("attribute_ruler")
+    ruler.add([[{"LOWER": "engineers"}]], {"POS": "NOUN"})
+    ruler.add([[{"LOWER": "dancing"}]], {"POS": "VERB"})
+    return nlp
+
+
+def test_cached_outputs_are_reused_across_instances(tmp_path):
+    """Un texte déjà analysé est relu depuis le fichier, sans appeler spaCy"""
+    path = str(tmp_path / "nlp_cache.sqlite3")
+    nlp = make_nlp()
+    expected = TweetAnalyzer(Config, nlp=nlp).extract_keywords(TWEET)
+    assert expected["named_entities"] == [{"text": "Elon", "type": "PERSON"}, {"text": "Tesla", "type": "ORG"}]
+    assert TweetAnalyzer(Config, nlp=nlp, nlp_cache=NlpCache(path)).extract_keywords(TWEET) == expected
+
+    cache = NlpCache(path)
+    analyzer = TweetAnalyzer(Config, nlp=nlp, nlp_cache=cache)
+    analyzer.nlp = None  # Tout appel à spaCy échouerait
+    assert json.dumps(analyzer.extract_keywords(TWEET)) == json.dumps(expected)
+    assert json.dumps(analyzer.extract_keywords_batch([TWEET, TWEET])[1]) == json.dumps(expected)
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 0
+
+
+def test_model_change_misses_and_stop_words_apply(tmp_path, monkeypatch):
+    """Une autre version du modèle ne lit pas les anciennes sorties ; STOP_WORDS s'applique à la lecture"""
+    cache = NlpCache(str(tmp_path / "nlp_cache.sqlite3"))
+    TweetAnalyzer(Config, nlp=make_nlp(), nlp_cache=cache).extract_keywords(TWEET)
+    assert model_version(make_nlp("1.0.0")) != model_version(make_nlp("2.0.0"))
+
+    TweetAnalyzer(Config, nlp=make_nlp("2.0.0"), nlp_cache=cache).extract_keywords(TWEET)
+    assert cache.stats()["misses"] == 2 and cache.stats()["size"] == 2
+
+    monkeypatch.setattr(Config, "STOP_WORDS", list(Config.STOP_WORDS) + ["engineers"])
+    analysis = TweetAnalyzer(Config, nlp=make_nlp(), nlp_cache=cache).extract_keywords(TWEET)
+    assert cache.stats()["hits"] == 1
+    assert analysis["important_nouns"] == [] and analysis["significant_verbs"] == ["dancing"]
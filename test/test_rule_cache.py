@@ -0,0 +1,101 @@
+# test_rule_cache.py
+import condition_handler
+from condition_handler import extract_ticker_info, get_prompt_instructions, RULE_CACHE
+from rule_cache import RuleCache, MISSING, text_key
+
+
+def test_lru_eviction_and_stats():
+    """L'entrée la moins récemment utilisée est évincée, succès et échecs sont comptés"""
+    cache = RuleCache(2)
+    cache.put("a", 1)
+    cache.put("b", None)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("c") == 3
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+    assert len(cache) == 2
+
+
+def test_version_change_clears_cache():
+    """Un changement de version des règles vide le cache"""
+    cache = RuleCache(10, version="v1")
+    cache.put(text_key("v1", "text", "hello"), None)
+    cache.set_version("v1")
+    assert len(cache) == 1
+    cache.set_version("v2")
+    assert len(cache) == 0
+    assert text_key("v1", "text", "hello") != text_key("v2", "text", "hello")
+
+
+def test_repeated_text_is_served_from_cache():
+    """Un texte déjà évalué (même après normalisation) est servi par le cache"""
+    RULE_CACHE.clear()
+    first = extract_ticker_info("The dog DIED!")
+    hits = RULE_CACHE.hits
+    assert extract_ticker_info("the dog died?") == first
+    assert RULE_CACHE.hits == hits + 1
+
+
+def test_prompt_instructions_are_copied(monkeypatch):
+    """Modifier le résultat retourné ne modifie pas l'entrée du cache"""
+    RULE_CACHE.clear()
+    result = get_prompt_instructions("my dog wif hat")
+    result["examples"].append({"ticker": "X", "name": "x"})
+    assert get_prompt_instructions("my dog wif hat")["examples"] != result["examples"]
+
+    # Une nouvelle version des règles n'utilise pas les anciennes entrées
+    rules = condition_handler.RULES
+    other = condition_handler.RuleSet(
+        rules.text_rules, rules.media_rules,
+        dict(rules.text_vocabularies, hat=rules.text_vocabularies["hat"] | {"beanie"}),
+        rules.media_vocabularies, rules.trigger_themes)
+    assert other.version != rules.version
+    monkeypatch.setattr(condition_handler, "RULES", other)
+    hits = RULE_CACHE.hits
+    get_prompt_instructions("my dog wif hat")
+    assert RULE_CACHE.hits == hits
+
+
+def test_concurrent_reload_and_lookups():
+    """Vider le cache depuis un autre thread (rechargement des règles) pendant les lectures"""
+    import sys
+    import threading
+
+    cache = RuleCache(8, version="v0")
+    errors = []
+    stop = threading.Event()
+
+    def reload_rules():
+        version = 0
+        while not stop.is_set():
+            version += 1
+            cache.set_version(f"v{version}")
+
+    def lookups():
+        try:
+            for index in range(100000):
+                key = index % 4
+                if cache.get(key) is MISSING:
+                    cache.put(key, index)
+        except Exception as e:
+            errors.append(e)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    reloader = threading.Thread(target=reload_rules)
+    reloader.start()
+    try:
+        workers = [threading.Thread(target=lookups) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        stop.set()
+        reloader.join()
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    assert len(cache) <= 8
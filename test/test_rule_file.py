@@ -0,0 +1,118 @@
+# test_rule_file.py
+import json
+
+import condition_handler
+from condition_handler import (
+    extract_ticker_info, reload_rules, install_rules, find_phrase_hits, RuleSet, SUBSTRING
+)
+from config import Config
+from rule_file import load_rule_file, parse_rule_data, RuleFileWatcher
+from tokenized_text import TokenizedText
+
+
+def write_rules(path, update):
+    """Copie le fichier des règles dans path après modification par update(data)"""
+    with open(Config.CONDITION_RULES_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    update(data)
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_vocabularies_per_source():
+    """Termes communs + termes propres à chaque source, conditions limitées aux règles de la source"""
+    definitions = load_rule_file(Config.CONDITION_RULES_FILE)
+    assert "war" in definitions["text_vocabularies"]["negative"]
+    assert "war" not in definitions["media_vocabularies"]["negative"]
+    assert "musk" in definitions["media_vocabularies"]["elon"]
+    assert "musk" not in definitions["text_vocabularies"]["elon"]
+    assert "kanye" in definitions["text_vocabularies"]
+    assert "kanye" not in definitions["media_vocabularies"]
+    assert ("trump", SUBSTRING) == definitions["text_rules"][10][:2]
+
+
+def test_reload_swaps_rules(tmp_path):
+    """Un terme ajouté au fichier est pris en compte sans redémarrage, y compris par un texte déjà découpé"""
+    original = condition_handler.RULES
+    tweet = TokenizedText("nice beanie")
+    assert extract_ticker_info(tweet) is None
+    hits = find_phrase_hits(tweet)
+
+    path = write_rules(tmp_path / "rules.json", lambda data: data["conditions"]["hat"]["terms"].append("beanie"))
+    try:
+        assert reload_rules(path)
+        assert condition_handler.RULES is not original
+        assert condition_handler.RULESET_VERSION == condition_handler.RULES.version != original.version
+        assert condition_handler.RULE_CACHE.version == condition_handler.RULES.version
+        assert extract_ticker_info(tweet) == original.text.instructions[0]
+        assert find_phrase_hits(tweet) is not hits
+
+        # Fichier identique : rien n'est remplacé, le cache est conservé
+        assert not reload_rules(path)
+    finally:
+        install_rules(original)
+    assert extract_ticker_info("nice beanie") is None
+
+
+def test_invalid_file_keeps_rules(tmp_path):
+    """Un fichier invalide est ignoré et les règles actives sont conservées"""
+    original = condition_handler.RULES
+
+    broken = tmp_path / "broken.json"
+    broken.write_text("{\"conditions\": ", encoding="utf-8")
+    assert not reload_rules(str(broken))
+
+    unknown_mode = write_rules(tmp_path / "mode.json", lambda data: data["text_rules"][0].update(mode="regex"))
+    assert not reload_rules(unknown_mode)
+
+    misspelled_mode = write_rules(tmp_path / "case.json", lambda data: data["text_rules"][4].update(mode="Word"))
+    assert not reload_rules(misspelled_mode)
+
+    empty_term = write_rules(tmp_path / "term.json", lambda data: data["conditions"]["kfc"]["terms"].append("!!"))
+    assert not reload_rules(empty_term)
+
+    missing = write_rules(tmp_path / "missing.json", lambda data: data["conditions"].pop("kfc"))
+    assert not reload_rules(missing)
+
+    assert not reload_rules(str(tmp_path / "absent.json"))
+    assert condition_handler.RULES is original
+
+
+def test_terms_are_normalized(tmp_path):
+    """Majuscules et ponctuation des termes sont normalisées comme le texte, y compris en mode sous-chaîne"""
+    with open(Config.CONDITION_RULES_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data["conditions"]["trump"]["terms"] = ["Trump"]
+    data["conditions"]["kfc"]["terms"] = ["K.F.C"]
+    definitions = parse_rule_data(data)
+    assert definitions["text_vocabularies"]["trump"] == {"trump"}
+    assert definitions["text_vocabularies"]["kfc"] == {"k f c"}
+    assert definitions["media_vocabularies"]["trump"] == {"trump", "donald trump"}
+
+    original = condition_handler.RULES
+    path = write_rules(tmp_path / "rules.json", lambda data: data["conditions"]["kfc"].update(terms=["K.F.C"]))
+    try:
+        assert reload_rules(path)
+        instructions = {condition_id: instruction for condition_id, _, instruction in original.text_rules}
+        assert extract_ticker_info("Lunch at K.F.C!") == instructions["kfc"]
+    finally:
+        install_rules(original)
+
+
+def test_watcher_detects_changes(tmp_path):
+    """Le watcher appelle on_change uniquement quand le fichier change"""
+    path = tmp_path / "rules.json"
+    path.write_text("{}", encoding="utf-8")
+    changes = []
+    watcher = RuleFileWatcher(str(path), lambda: changes.append(True), interval=60)
+    assert not watcher.check()
+
+    path.write_text("{\"changed\": true}", encoding="utf-8")
+    assert watcher.check()
+    assert not watcher.check()
+    assert changes == [True]
+
+
+def test_ruleset_from_file_matches_active_rules():
+    """Recompiler le fichier donne la même version que les règles actives"""
+    assert RuleSet.from_file(Config.CONDITION_RULES_FILE).version == condition_handler.RULES.version
@@ -0,0 +1,87 @@
+# test_rule_whatif.py
+import copy
+import json
+
+import pytest
+
+from condition_handler import RuleSet
+from rule_file import parse_rule_data
+from rule_whatif import CorpusSnapshot, WhatIfSession, apply_change, compare, evaluate
+
+TEXTS = ["my dog died", "new beanie today", "kfc is great", "nothing here", "", "RIP legend"]
+DESCRIPTIONS = [None, None, "a man eating kfc", "a cat wearing a hat", "a lion", None]
+IDS = [f"tweet_{index}" for index in range(len(TEXTS))]
+
+
+def full_evaluation(session):
+    """Décisions de la proposition recalculées sur tout le corpus"""
+    rules = RuleSet.from_definitions(parse_rule_data(copy.deepcopy(session.proposal)))
+    return compare(session.ids, session.baseline, evaluate(rules, session.texts, session.descriptions))
+
+
+def test_apply_change_edits_rule_data():
+    """Ajout, retrait (commun retiré d'une seule source) et déplacement"""
+    data = {
+        "conditions": {"hat": {"terms": ["hat", "cap"]}, "kfc": {"terms": ["kfc"]}},
+        "text_rules": [{"id": "hat"}, {"id": "kfc"}],
+        "media_rules": [{"id": "hat"}, {"id": "kfc"}],
+    }
+    apply_change(data, "add", "text:hat=Beanie")
+    apply_change(data, "remove", "media:hat=cap")
+    apply_change(data, "move", "media:kfc=1")
+    assert data["conditions"]["hat"] == {"terms": ["hat"], "text_terms": ["beanie", "cap"]}
+    assert [rule["id"] for rule in data["media_rules"]] == ["kfc", "hat"]
+
+    with pytest.raises(ValueError):
+        apply_change(data, "move", "kfc=1")
+    with pytest.raises(ValueError):
+        apply_change(data, "remove", "unknown=x")
+    with pytest.raises(ValueError):
+        apply_change(data, "add", "text:haat=beanie")
+    assert "haat" not in data["conditions"]
+    with pytest.raises(ValueError):
+        apply_change(data, "remove", "hat=hat,beret")
+    assert data["conditions"]["hat"]["terms"] == ["hat"]
+    with pytest.raises(ValueError):
+        apply_change(data, "remove", "text:kfc=burger")
+
+
+def test_simulation_reports_changes_and_llm_calls():
+    """Les tweets qui changent sont signalés, avec la variation des appels au LLM"""
+    session = WhatIfSession(IDS, TEXTS, DESCRIPTIONS)
+    apply_change(session.proposal, "add", "hat=beanie")
+    apply_change(session.proposal, "move", "media:kfc=1")
+    report = session.simulate()
+
+    assert report["became_eligible"] == ["tweet_1"]
+    assert report["llm_calls_delta"] == 1
+    assert report["reevaluated"] < len(IDS)
+    assert {key: value for key, value in report.items() if key not in ("elapsed", "reevaluated")} \
+        == full_evaluation(session)
+
+
+def test_incremental_matches_full_evaluation():
+    """Ne réévaluer que les tweets touchés donne le même résultat que tout réévaluer"""
+    session = WhatIfSession(IDS, TEXTS, DESCRIPTIONS)
+    for action, spec in (("remove", "death=died,dead"), ("move", "text:animal=5"),
+                         ("remove", "text:kfc=kfc"), ("add", "media:animal=man")):
+        apply_change(session.proposal, action, spec)
+        report = session.simulate()
+        assert {key: value for key, value in report.items() if key not in ("elapsed", "reevaluated")} \
+            == full_evaluation(session), spec
+
+
+def test_corpus_snapshot_reads_only_new_files(tmp_path):
+    """L'instantané est complété par les nouveaux fichiers et perd les fichiers supprimés"""
+    (tmp_path / "tweets").mkdir()
+    (tmp_path / "media_analysis").mkdir()
+    (tmp_path / "tweets" / "a_1.json").write_text(json.dumps({"text": "first"}), encoding="utf-8")
+    (tmp_path / "media_analysis" / "a_1_0.json").write_text(json.dumps({"description": "a hat"}), encoding="utf-8")
+    (tmp_path / "media_analysis" / "a_1_1.json").write_text(json.dumps({"description": "ignored"}), encoding="utf-8")
+
+    snapshot = CorpusSnapshot(str(tmp_path))
+    assert snapshot.load() == (["a_1"], ["first"], ["a hat"])
+
+    (tmp_path / "tweets" / "b_2.json").write_text(json.dumps({"text": "second"}), encoding="utf-8")
+    (tmp_path / "tweets" / "a_1.json").unlink()
+    assert snapshot.load() == (["b_2", "media/a_1_0"], ["second", ""], [None, "a hat"])
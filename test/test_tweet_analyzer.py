@@ -0,0 +1,67 @@
+# test_tweet_analyzer.py
+import json
+
+import spacy
+
+from config import Config
+from tweet_analyzer import TweetAnalyzer
+
+TWEETS = [
+    {"id": "1", "text": "RIP to the legendary Grumpy Cat, gone but never forgotten $GRUMPY"},
+    {"id": "2", "text": "Elon Musk just posted a dog wearing a hat #dogwifhat"},
+    {"id": "3", "text": ""},
+    {"id": "4", "text": "Breaking: Tesla unveils the new Cybertruck. Walmart shoppers react!"},
+]
+
+
+def test_batch_matches_single_tweet_analysis():
+    """extract_keywords_batch produit exactement les analyses de extract_keywords, dans l'ordre"""
+    analyzer = TweetAnalyzer(Config, nlp=spacy.blank("en"))
+    expected = [json.dumps(analyzer.extract_keywords(tweet)) for tweet in TWEETS]
+
+    for batch_size in (1, 3, 64):
+        analyses = analyzer.extract_keywords_batch(TWEETS, batch_size=batch_size, n_process=1)
+        assert [json.dumps(analysis) for analysis in analyses] == expected
+
+    analyses = analyzer.extract_keywords_batch(TWEETS, batch_size=2, n_process=2)
+    assert [json.dumps(analysis) for analysis in analyses] == expected
+
+
+def test_rule_features_skip_spacy():
+    """L'analyse légère n'appelle pas spaCy et garde les champs de l'analyse complète"""
+    nlp = spacy.blank("en")
+    analyzer = TweetAnalyzer(Config, nlp=nlp)
+    full = analyzer.extract_keywords(TWEETS[0])
+
+    analyzer.nlp = None  # Tout appel à spaCy échouerait
+    light = analyzer.extract_rule_features(TWEETS[0])
+    assert light.pop("analysis_tier") == "rules"
+    assert light.keys() == full.keys()
+    assert light["symbols"] == full["symbols"] == ["$GRUMPY"]
+    assert light["detected_themes"] == full["detected_themes"]
+    assert light["named_entities"] == light["important_nouns"] == []
+
+
+def test_recycled_pipeline_gives_same_analyses(monkeypatch):
+    """La reconstruction du pipeline borne le vocabulaire sans changer les analyses"""
+    tweets = [{"id": str(index), "text": f"Elon posted a rocket #tag{index} $COIN{index} @user{index}"}
+              for index in range(10)]
+
+    def make_nlp():
+        nlp = spacy.blank("en")
+        ruler = nlp.add_pipe("attribute_ruler")
+        ruler.add([[{"LOWER": "posted"}]], {"POS": "VERB"})
+        ruler.add([[{"LOWER": "rocket"}]], {"POS": "NOUN"})
+        return nlp
+
+    expected = [json.dumps(TweetAnalyzer(Config, nlp=make_nlp()).extract_keywords(tweet)) for tweet in tweets]
+
+    monkeypatch.setattr(Config, "NLP_MAX_NEW_STRINGS", 60)
+    nlp = make_nlp()
+    analyzer = TweetAnalyzer(Config, nlp=nlp)
+    base_strings = len(analyzer.nlp.vocab.strings)
+    assert [json.dumps(analyzer.extract_keywords(tweet)) for tweet in tweets] == expected
+    assert '"posted"' in expected[0] and '"rocket"' in expected[0]
+    assert analyzer.recycles >= 1
+    assert analyzer.nlp is not nlp and analyzer.nlp.pipe_names == ["attribute_ruler"]
+    assert len(analyzer.nlp.vocab.strings) <= base_strings + 60 + 20
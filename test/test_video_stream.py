@@ -0,0 +1,202 @@
+# test_video_stream.py
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+import pytest
+import requests
+
+from config import Config
+from media_analyzer import MediaAnalyzer
+from video_stream import RangedHttpStream, contact_sheet, read_first_frame, sample_keyframes
+from test_vision_cache import FakeClient
+
+
+def write_video(path: str, seconds: int, color: int) -> str:
+    """Vidéo MP4 (index 'moov' en fin de fichier) dont la première image est unie, de niveau color"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 25, (320, 180))
+    rng = np.random.default_rng(color)
+    for index in range(seconds * 25):
+        frame = np.full((180, 320, 3), color, np.uint8) if index == 0 else \
+            rng.integers(0, 255, (180, 320, 3), dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+class VideoHandler(BaseHTTPRequestHandler):
+    """Sert les fichiers du répertoire du serveur, avec ou sans requêtes Range"""
+
+    def do_GET(self):
+        path = os.path.join(self.server.directory, self.path.lstrip("/"))
+        with open(path, "rb") as f:
+            data = f.read()
+        match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if match and self.server.ranges:
+            start, end = int(match.group(1)), min(int(match.group(2)), len(data) - 1)
+            if not self.server.range_end:
+                # Serveur qui ignore la fin de la plage demandée
+                end = len(data) - 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+            data = data[start:end + 1]
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), VideoHandler)
+    httpd.directory = str(tmp_path)
+    httpd.ranges = True
+    httpd.range_end = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_first_frame_fetches_only_needed_bytes(tmp_path, server):
+    """Seuls l'en-tête, l'index et la première image sont téléchargés, quelle que soit la durée"""
+    size = os.path.getsize(write_video(str(tmp_path / "long.mp4"), 20, 200))
+    with RangedHttpStream(f"{server.base_url}/long.mp4", max_bytes=size, block_size=64 * 1024) as stream:
+        frame = read_first_frame(stream)
+        assert stream.size == size
+        assert stream.bytes_fetched < size / 10
+    assert frame is not None and abs(float(frame.mean()) - 200) < 8
+
+
+def test_size_cap_and_servers_without_ranges(tmp_path, server):
+    """Sans Range, le fichier est lu depuis le début dans la limite ; au-delà, échec sans exception"""
+    size = os.path.getsize(write_video(str(tmp_path / "video.mp4"), 2, 50))
+    server.ranges = False
+    with RangedHttpStream(f"{server.base_url}/video.mp4", max_bytes=size + 1, block_size=64 * 1024) as stream:
+        assert abs(float(read_first_frame(stream).mean()) - 50) < 8
+    with RangedHttpStream(f"{server.base_url}/video.mp4", max_bytes=size // 2, block_size=64 * 1024) as stream:
+        assert read_first_frame(stream) is None
+        assert stream.error is not None
+
+
+def test_size_cap_when_server_ignores_range_end(tmp_path, server, monkeypatch):
+    """Une réponse 206 plus longue que la plage demandée n'est lue que jusqu'à la limite"""
+    size = os.path.getsize(write_video(str(tmp_path / "long.mp4"), 20, 120))
+    server.range_end = False
+    responses = []
+    session_get = requests.Session.get
+
+    def recording_get(self, *args, **kwargs):
+        response = session_get(self, *args, **kwargs)
+        responses.append(response)
+        return response
+
+    monkeypatch.setattr(requests.Session, "get", recording_get)
+    with RangedHttpStream(f"{server.base_url}/long.mp4", max_bytes=size // 4, block_size=64 * 1024) as stream:
+        frame = read_first_frame(stream)
+        assert stream.bytes_fetched <= size // 4
+    assert frame is not None and abs(float(frame.mean()) - 120) < 8
+    # Octets réellement reçus : au plus un fragment de 64 Ko de plus par requête
+    assert sum(response.raw.tell() for response in responses) <= size // 4 + len(responses) * 64 * 1024
+
+
+def test_session_closed_when_first_request_fails(server, monkeypatch):
+    """Un échec de la première requête ferme la session avant de lever l'exception"""
+    closed = []
+    session_close = requests.Session.close
+    monkeypatch.setattr(requests.Session, "close", lambda self: (closed.append(self), session_close(self)))
+    with pytest.raises(requests.RequestException):
+        RangedHttpStream(f"{server.base_url}/missing.mp4", max_bytes=10 ** 6)
+    assert len(closed) == 1
+
+
+def test_concurrent_extractions_are_isolated(tmp_path, server, monkeypatch):
+    """Des extractions simultanées retournent chacune la frame de leur vidéo, en JPEG"""
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "test-key")
+    analyzer = MediaAnalyzer(Config)
+    colors = [30, 90, 150, 210]
+    for color in colors:
+        write_video(str(tmp_path / f"{color}.mp4"), 3, color)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        frames = list(executor.map(analyzer.extract_first_frame,
+                                   [f"{server.base_url}/{color}.mp4" for color in colors]))
+    for color, frame in zip(colors, frames):
+        image = cv2.imdecode(np.frombuffer(frame, np.uint8), cv2.IMREAD_COLOR)
+        assert abs(float(image.mean()) - color) < 8
+    assert analyzer.extract_first_frame(f"{server.base_url}/missing.mp4") is None
+
+
+def test_preview_image_fast_path(tmp_path, server, monkeypatch):
+    """La vignette Twitter est analysée sans toucher à la vidéo ; la première frame reste le recours"""
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "test-key")
+    analyzer = MediaAnalyzer(Config)
+    analyzed = []
+
+    def analyze_image(image_url, context=None):
+        analyzed.append(image_url)
+        return {"error": "thumbnail unavailable"} if "broken" in image_url else {"description": image_url}
+
+    monkeypatch.setattr(analyzer, "analyze_image", analyze_image)
+    thumbnail = "https://pbs.twimg.com/ext_tw_video_thumb/1/pu/img/thumbnail.jpg"
+    assert analyzer.process_video(f"{server.base_url}/missing.mp4", thumbnail) == {"description": thumbnail}
+    assert analyzed == [thumbnail]
+
+    write_video(str(tmp_path / "video.mp4"), 1, 120)
+    video_url = f"{server.base_url}/video.mp4"
+    # Vignette en échec, ou "vignette" qui est la vidéo elle-même : première frame
+    for preview in ("https://pbs.twimg.com/tweet_video_thumb/broken.jpg", video_url, None):
+        analyzed.clear()
+        analysis = analyzer.process_video(video_url, preview)
+        assert analyzed[-1].startswith("data:image/jpeg;base64,")
+        assert analysis["description"] == analyzed[-1]
+
+
+def write_scenes(path: str, colors, seconds_per_scene: int = 2) -> str:
+    """Vidéo d'une scène unie (légèrement bruitée) par couleur BGR"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 25, (320, 180))
+    rng = np.random.default_rng(0)
+    for color in colors:
+        for _ in range(seconds_per_scene * 25):
+            frame = np.full((180, 320, 3), color, np.uint8) + rng.integers(0, 8, (180, 320, 3), dtype=np.uint8)
+            writer.write(frame)
+    writer.release()
+    return path
+
+
+def test_keyframes_one_per_scene_in_one_vision_call(tmp_path, server, monkeypatch):
+    """Une frame par scène, réunies en une planche contact envoyée en un seul appel Vision"""
+    colors = [(200, 40, 40), (40, 200, 40), (40, 40, 200)]
+    write_scenes(str(tmp_path / "scenes.mp4"), colors)
+    with RangedHttpStream(f"{server.base_url}/scenes.mp4", max_bytes=10 ** 7) as stream:
+        frames = sample_keyframes(stream, max_frames=6, candidates=12)
+    assert [round(timestamp) for timestamp, _ in frames] == [0, 2, 4]
+    for (_, frame), color in zip(frames, colors):
+        assert np.abs(frame.mean(axis=(0, 1)) - color).max() < 12
+    assert contact_sheet(frames, tile_width=160).shape == (180, 320, 3)
+
+    with RangedHttpStream(f"{server.base_url}/scenes.mp4", max_bytes=10 ** 7) as stream:
+        assert len(sample_keyframes(stream, max_frames=2, candidates=12)) == 2
+
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "test-key")
+    analyzer = MediaAnalyzer(Config)
+    analyzer.client = FakeClient()
+    requests_sent = []
+    create = analyzer.client.create
+    analyzer.client.chat.completions.create = lambda **kwargs: requests_sent.append(kwargs) or create(**kwargs)
+    assert "error" not in analyzer.process_video(f"{server.base_url}/scenes.mp4")
+    assert len(requests_sent) == 1
+    assert "contact sheet of 3 frames" in requests_sent[0]["messages"][0]["content"][0]["text"]
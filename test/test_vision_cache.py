@@ -0,0 +1,89 @@
+# test_vision_cache.py
+import json
+import time
+import base64
+from types import SimpleNamespace
+
+from config import Config
+from media_analyzer import MediaAnalyzer
+from vision_cache import VisionCache, normalize_media_url
+
+ANALYSIS = {"description": "A cat in an earthquake", "subjects": ["cat"], "is_meme": True}
+
+
+class FakeClient:
+    """Client OpenAI qui compte les appels"""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(ANALYSIS)))])
+
+
+def make_analyzer(tmp_path, monkeypatch, content=None):
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "test-key")
+    analyzer = MediaAnalyzer(Config, vision_cache=VisionCache(str(tmp_path / "vision_cache.sqlite3")))
+    analyzer.client = FakeClient()
+    # Contenu des médias sans réseau (les URL data: restent décodées par MediaAnalyzer)
+    media_content = analyzer._media_content
+    monkeypatch.setattr(analyzer, "_media_content",
+                        lambda url: media_content(url) if url.startswith("data:") else (content or {}).get(url))
+    return analyzer
+
+
+def test_twitter_variants_are_folded():
+    """Les variantes de taille et de format d'un média Twitter ont la même URL canonique"""
+    expected = "https://pbs.twimg.com/media/ABC.jpg"
+    assert normalize_media_url("https://pbs.twimg.com/media/ABC?format=jpg&name=small") == expected
+    assert normalize_media_url("http://PBS.twimg.com/media/ABC.jpg:large") == expected
+    assert normalize_media_url("https://pbs.twimg.com/media/ABC.jpg?name=orig#top") == expected
+    assert normalize_media_url("https://pbs.twimg.com/media/ABC?format=png") != expected
+    assert normalize_media_url("https://Example.com/a.png?b=2&a=1") == "https://example.com/a.png?a=1&b=2"
+
+
+def test_repeated_image_skips_api(tmp_path, monkeypatch):
+    """Une même image (autre variante d'URL, ou autre URL avec le même contenu) n'est analysée qu'une fois"""
+    content = {"https://pbs.twimg.com/media/ABC?format=jpg&name=small": b"image",
+               "https://i.imgur.com/copy.jpg": b"image"}
+    analyzer = make_analyzer(tmp_path, monkeypatch, content)
+
+    first = analyzer.analyze_image("https://pbs.twimg.com/media/ABC?format=jpg&name=small")
+    assert "catastrophe_naturelle" in first["detected_themes"]
+    assert analyzer.analyze_image("https://pbs.twimg.com/media/ABC?format=jpg&name=large") == first
+    assert analyzer.analyze_image("https://i.imgur.com/copy.jpg") == first
+    assert analyzer.analyze_image("https://i.imgur.com/copy.jpg") == first
+    data_url = "data:image/jpeg;base64," + base64.b64encode(b"image").decode()
+    assert analyzer.analyze_image(data_url) == first
+    assert analyzer.client.calls == 1
+
+    stats = analyzer.vision_cache.stats()
+    assert (stats["url_hits"], stats["content_hits"], stats["misses"]) == (2, 2, 1)
+    assert stats["hit_rate"] == 0.8
+
+    # Un autre modèle ne relit pas les anciennes analyses
+    monkeypatch.setattr(Config, "OPENAI_VISION_MODEL", "other-model")
+    other = MediaAnalyzer(Config, vision_cache=analyzer.vision_cache)
+    other.client = FakeClient()
+    other.analyze_image("https://i.imgur.com/copy.jpg")
+    assert other.client.calls == 1
+
+
+def test_ttl_and_size_eviction(tmp_path):
+    """Les entrées expirées sont ignorées ; au-delà de max_entries, les moins récemment lues disparaissent"""
+    cache = VisionCache(str(tmp_path / "vision_cache.sqlite3"), ttl=3600, max_entries=2)
+    keys = [VisionCache.url_key("v1", f"https://example.com/{index}.jpg") for index in range(3)]
+    cache.put(ANALYSIS, keys[0])
+    cache.put(ANALYSIS, keys[1])
+    cache.get(keys[0])
+    cache.put(ANALYSIS, keys[2])
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == ANALYSIS and cache.get(keys[2]) == ANALYSIS
+
+    cache.ttl = 0
+    time.sleep(0.01)
+    assert cache.get(keys[0]) is None
+    cache.put(ANALYSIS, keys[1])
+    assert cache.stats()["size"] == 1
@@ -0,0 +1,74 @@
+# tokenized_text.py
+import re
+from typing import Any, FrozenSet, List, Optional, Tuple, Union
+
+# Tout caractère autre qu'une lettre, un chiffre, '_', '$' ou une espace sépare deux
+# mots (':', '#', '"', '(', "'", emojis...). Chacun est remplacé par une seule espace :
+# le texte normalisé garde la longueur du texte en minuscules. '$' reste attaché au
+# mot qui le suit : un cashtag ('$doge') n'est pas le mot 'doge'.
+_SEPARATOR_PATTERN = re.compile(r"[^\w\s$]")
+
+# Longueur maximale des n-grammes (les expressions des vocabulaires font au plus 3 mots)
+MAX_NGRAM = 3
+
+
+def normalize_text(text: str) -> str:
+    """Met le texte en minuscules et remplace la ponctuation et les symboles par des espaces"""
+    return _SEPARATOR_PATTERN.sub(" ", text.lower())
+
+
+class TokenizedText:
+    """
+    Représentation normalisée d'un texte (tweet ou description de média),
+    construite une seule fois puis partagée par tous les analyseurs
+
+    Attributes:
+        text: Texte d'origine
+        lower: Texte en minuscules (recherches de sous-chaînes)
+        normalized: Texte en minuscules, ponctuation et symboles remplacés par des espaces
+        tokens: Mots du texte normalisé
+        phrase_hits: Occurrences de l'automate d'expressions, renseignées par
+            condition_handler.find_phrase_hits au premier appel
+        phrase_matcher: Automate qui a produit phrase_hits (recalculées si les règles changent)
+    """
+
+    __slots__ = ("text", "lower", "normalized", "tokens", "phrase_hits", "phrase_matcher", "_token_set", "_ngrams")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        self.normalized = _SEPARATOR_PATTERN.sub(" ", self.lower)
+        self.tokens: List[str] = self.normalized.split()
+        self.phrase_hits: Optional[List[Tuple[int, int, Any]]] = None
+        self.phrase_matcher: Any = None
+        self._token_set: Optional[FrozenSet[str]] = None
+        self._ngrams: Optional[FrozenSet[str]] = None
+
+    @classmethod
+    def of(cls, text: Union[str, "TokenizedText"]) -> "TokenizedText":
+        """Retourne text tel quel s'il est déjà découpé, sinon le découpe"""
+        if isinstance(text, cls):
+            return text
+        return cls(text)
+
+    @property
+    def token_set(self) -> FrozenSet[str]:
+        """Ensemble des mots du texte normalisé"""
+        if self._token_set is None:
+            self._token_set = frozenset(self.tokens)
+        return self._token_set
+
+    @property
+    def ngrams(self) -> FrozenSet[str]:
+        """Ensemble des suites de 1 à MAX_NGRAM mots consécutifs, séparés par une espace"""
+        if self._ngrams is None:
+            tokens = self.tokens
+            ngrams = set(tokens)
+            for size in range(2, MAX_NGRAM + 1):
+                for start in range(len(tokens) - size + 1):
+                    ngrams.add(" ".join(tokens[start:start + size]))
+            self._ngrams = frozenset(ngrams)
+        return self._ngrams
+
+    def __repr__(self) -> str:
+        return f"TokenizedText({self.text!r})"
@@ -1,46 +1,246 @@
 import re
 import spacy
 import logging
-from typing import Dict, List, Any, Optional, Set
+from typing import Dict, List, Any, Optional, Set, Union
 from config import Config
+from condition_handler import detect_trigger_themes
+from tokenized_text import TokenizedText
+from nlp_cache import NlpCache, model_version
+from memory_monitor import MEMORY
+from gazetteer import Gazetteer
 
 class TweetAnalyzer:
     """Classe pour analyser et extraire les informations importantes des tweets"""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, nlp: Optional[spacy.Language] = None,
+                 nlp_cache: Optional[NlpCache] = None):
         self.config = config
         self.logger = logging.getLogger(__name__)
+        # Cache persistant des sorties spaCy (None pour toujours appeler spaCy)
+        self.nlp_cache = nlp_cache
         
-        # Initialisation de SpaCy pour NLP
+        # Pipeline spaCy déjà chargé (partagé entre analyseurs, tests, benchmarks)
+        if nlp is not None:
+            self.nlp = nlp
+        else:
+            self.nlp = self._load_model()
+        self.model_version = model_version(self.nlp)
+
+        # Entités connues (célébrités, marques, meme coins) trouvées sans le NER :
+        # le composant "ner" n'est alors pas exécuté (GAZETTEER_SKIP_NER)
+        self.gazetteer = Gazetteer.from_config(config)
+        self.has_ner = "ner" in self.nlp.pipe_names
+
+        # Le vocabulaire spaCy grossit avec chaque nouveau mot (hashtags, cashtags, mentions) :
+        # au-delà de NLP_MAX_NEW_STRINGS nouvelles chaînes, le pipeline est reconstruit
+        # depuis sa copie initiale (voir _maybe_recycle)
+        self.recycles = 0
+        self._model_snapshot = None
+        if config.NLP_MAX_NEW_STRINGS > 0:
+            self._model_snapshot = (self.nlp.config, self.nlp.to_bytes())
+            self._base_strings = len(self.nlp.vocab.strings)
+
+    def _load_model(self) -> spacy.Language:
+        """Initialisation de SpaCy pour NLP (sans les composants dont l'analyse ne lit pas la sortie)"""
+        exclude = list(self.config.SPACY_EXCLUDED_COMPONENTS)
         try:
-            self.nlp = spacy.load("en_core_web_sm")
+            return spacy.load("en_core_web_sm", exclude=exclude)
         except OSError:
             self.logger.warning("Modèle SpaCy non trouvé. Installation en cours...")
             import subprocess
             subprocess.call([
                 "python", "-m", "spacy", "download", "en_core_web_sm"
             ])
-            self.nlp = spacy.load("en_core_web_sm")
+            return spacy.load("en_core_web_sm", exclude=exclude)
 
-    def extract_keywords(self, tweet: Dict[str, Any]) -> Dict[str, Any]:
+    def extract_keywords(self, tweet: Dict[str, Any], tokenized: Optional[TokenizedText] = None) -> Dict[str, Any]:
         """
         Extrait les mots-clés importants d'un tweet
         
         Args:
             tweet: Dictionnaire contenant les informations du tweet
+            tokenized: Texte du tweet déjà découpé (construit ici si absent)
             
         Returns:
             Dictionnaire avec les informations d'analyse du tweet
         """
-        text = tweet["text"]
-        
-        # Analyse avec SpaCy
-        doc = self.nlp(text)
+        if tokenized is None:
+            tokenized = TokenizedText(tweet["text"])
         
+        # Entités connues, puis analyse avec SpaCy (ou sortie déjà enregistrée dans le cache)
+        known_entities = self.gazetteer.find(tokenized)
+        output = self._spacy_outputs([tweet["text"]], skip_ner=[self._skips_ner(tokenized, known_entities)])[0]
+        return self._build_analysis(tweet, tokenized, output, known_entities)
+
+    def extract_rule_features(self, tweet: Dict[str, Any],
+                              tokenized: Optional[TokenizedText] = None) -> Dict[str, Any]:
+        """
+        Analyse légère d'un tweet, sans spaCy (expressions régulières et thèmes uniquement)
+
+        Premier niveau de l'analyse : suffisant pour les tweets rejetés par le moteur de
+        conditions, qui n'ont pas besoin des entités, substantifs et verbes. Les champs
+        spaCy sont vides et "analysis_tier" vaut "rules".
+
+        Args:
+            tweet: Dictionnaire contenant les informations du tweet
+            tokenized: Texte du tweet déjà découpé (construit ici si absent)
+
+        Returns:
+            Dictionnaire avec les mêmes champs que extract_keywords
+        """
+        if tokenized is None:
+            tokenized = TokenizedText(tweet["text"])
+
+        analysis = self._build_analysis(tweet, tokenized, None, self.gazetteer.find(tokenized))
+        analysis["analysis_tier"] = "rules"
+        return analysis
+
+    def extract_keywords_batch(self, tweets: List[Dict[str, Any]],
+                               batch_size: Optional[int] = None,
+                               n_process: Optional[int] = None,
+                               tokenized: Optional[List[TokenizedText]] = None) -> List[Dict[str, Any]]:
+        """
+        Extrait les mots-clés d'un lot de tweets avec nlp.pipe
+
+        Le résultat de chaque tweet est identique à celui de extract_keywords : seul
+        l'appel à spaCy est groupé (et éventuellement réparti sur plusieurs processus),
+        le reste de l'analyse est fait ici, dans l'ordre des tweets. Les textes déjà
+        présents dans le cache ne passent pas par spaCy.
+
+        Args:
+            tweets: Tweets à analyser
+            batch_size: Nombre de textes par lot spaCy (défaut: Config.SPACY_BATCH_SIZE)
+            n_process: Nombre de processus spaCy (défaut: Config.SPACY_N_PROCESS)
+            tokenized: Textes déjà découpés, dans l'ordre des tweets (construits ici si absents)
+
+        Returns:
+            Liste des analyses, dans l'ordre des tweets
+        """
+        if batch_size is None:
+            batch_size = self.config.SPACY_BATCH_SIZE
+        if n_process is None:
+            n_process = self.config.SPACY_N_PROCESS
+        if tokenized is None:
+            tokenized = [TokenizedText(tweet["text"]) for tweet in tweets]
+
+        known_entities = [self.gazetteer.find(tweet_tokens) for tweet_tokens in tokenized]
+        outputs = self._spacy_outputs([tweet["text"] for tweet in tweets], batch_size, n_process,
+                                      skip_ner=[self._skips_ner(tweet_tokens, entities)
+                                                for tweet_tokens, entities in zip(tokenized, known_entities)])
+        return [
+            self._build_analysis(tweet, tweet_tokens, output, entities)
+            for tweet, tweet_tokens, output, entities in zip(tweets, tokenized, outputs, known_entities)
+        ]
+
+    def _skips_ner(self, tokenized: TokenizedText, known_entities: List[Dict[str, str]]) -> bool:
+        """
+        True si le NER spaCy est inutile : option GAZETTEER_SKIP_NER activée et entités
+        connues couvrant tous les mots candidats du tweet (voir Gazetteer.covers_candidates)
+        """
+        return (self.config.GAZETTEER_SKIP_NER and bool(known_entities)
+                and self.gazetteer.covers_candidates(tokenized))
+
+    def _spacy_outputs(self, texts: List[str], batch_size: int = 1, n_process: int = 1,
+                       skip_ner: Optional[List[bool]] = None) -> List[Dict[str, Any]]:
+        """
+        Sorties spaCy utilisées par l'analyse (voir _spacy_features), lues dans le cache
+        quand il existe ; seuls les textes absents du cache passent par nlp.pipe
+
+        Args:
+            skip_ner: Pour chaque texte, True pour désactiver le composant "ner"
+        """
+        if skip_ner is None:
+            skip_ner = [False] * len(texts)
+        # Sans NER, les sorties diffèrent : elles ont leur propre clé de cache
+        without_ner = [self.has_ner and skip for skip in skip_ner]
+
+        keys = None
+        cached = {}
+        if self.nlp_cache is not None:
+            versions = (self.model_version, self.model_version + "/-ner")
+            keys = [NlpCache.key(versions[skip], text) for text, skip in zip(texts, without_ner)]
+            cached = self.nlp_cache.get_many(keys)
+
+        missing = [index for index in range(len(texts)) if keys is None or keys[index] not in cached]
+        computed = {}
+        for disable_ner in (False, True):
+            group = [index for index in missing if without_ner[index] == disable_ner]
+            if not group:
+                continue
+            with self.nlp.select_pipes(disable=["ner"] if disable_ner else []):
+                docs = self.nlp.pipe((texts[index] for index in group), batch_size=batch_size, n_process=n_process)
+                computed.update((index, self._spacy_features(doc)) for index, doc in zip(group, docs))
+        if self.nlp_cache is not None and computed:
+            self.nlp_cache.put_many((keys[index], output) for index, output in computed.items())
+        if computed:
+            self._maybe_recycle()
+        if MEMORY.enabled:
+            MEMORY.record(len(texts), nlp_strings=len(self.nlp.vocab.strings), nlp_recycles=self.recycles)
+
+        return [computed[index] if index in computed else cached[keys[index]] for index in range(len(texts))]
+
+    def _maybe_recycle(self) -> bool:
+        """
+        Reconstruit le pipeline depuis sa copie initiale si le vocabulaire a trop grossi
+
+        Le StringStore et les lexèmes de spaCy ne rétrécissent jamais ; un nouveau
+        pipeline (même configuration, mêmes poids) repart du vocabulaire du modèle et
+        donne exactement les mêmes sorties. Les Doc ne sont pas conservés au-delà de
+        _spacy_features, l'ancien vocabulaire est donc libéré.
+
+        Returns:
+            True si le pipeline a été reconstruit
+        """
+        if self._model_snapshot is None:
+            return False
+        new_strings = len(self.nlp.vocab.strings) - self._base_strings
+        if new_strings <= self.config.NLP_MAX_NEW_STRINGS:
+            return False
+
+        config, data = self._model_snapshot
+        nlp = spacy.util.get_lang_class(config["nlp"]["lang"]).from_config(config)
+        self.nlp = nlp.from_bytes(data)
+        self._base_strings = len(self.nlp.vocab.strings)
+        self.recycles += 1
+        self.logger.info(f"Pipeline spaCy reconstruit ({new_strings} nouvelles chaînes, "
+                         f"{self.recycles} reconstruction(s))")
+        return True
+
+    @staticmethod
+    def _spacy_features(doc: Any) -> Dict[str, Any]:
+        """
+        Ce que l'analyse lit dans un Doc spaCy : les entités (texte, type) et les
+        substantifs et verbes de plus de 3 caractères (texte, minuscules, catégorie).
+        STOP_WORDS est appliqué ensuite, dans _build_analysis.
+        """
+        return {
+            "ents": [[ent.text, ent.label_] for ent in doc.ents],
+            "tokens": [
+                [token.text, token.lower_, token.pos_] for token in doc
+                if token.pos_ in ("NOUN", "VERB") and len(token.text) > 3
+            ],
+        }
+
+    def _build_analysis(self, tweet: Dict[str, Any], tokenized: TokenizedText,
+                        spacy_output: Optional[Dict[str, Any]],
+                        known_entities: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+        """
+        Analyse d'un tweet à partir des sorties spaCy (voir _spacy_features),
+        ou sans spaCy si spacy_output est None
+
+        known_entities (gazetteer) passent avant les entités spaCy, qui ne sont
+        ajoutées que pour un texte pas déjà trouvé
+        """
+        text = tweet["text"]
+        tokens = spacy_output["tokens"] if spacy_output is not None else ()
+
         # Extraction des entités nommées
-        named_entities = [
-            {"text": ent.text, "type": ent.label_}
-            for ent in doc.ents
+        named_entities = list(known_entities) if known_entities else []
+        known_texts = {entity["text"] for entity in named_entities}
+        named_entities += [
+            {"text": ent_text, "type": ent_label}
+            for ent_text, ent_label in (spacy_output["ents"] if spacy_output is not None else ())
+            if ent_text not in known_texts
         ]
         
         # Extraction des mots commençant par une majuscule (hors début de phrase)
@@ -53,18 +253,16 @@ class TweetAnalyzer:
         
         # Extraction des substantifs importants
         important_nouns = [
-            token.text for token in doc
-            if token.pos_ == "NOUN"
-            and token.text.lower() not in self.config.STOP_WORDS
-            and len(token.text) > 3
+            token_text for token_text, token_lower, token_pos in tokens
+            if token_pos == "NOUN"
+            and token_lower not in self.config.STOP_WORDS
         ]
         
         # Extraction des verbes significatifs 
         significant_verbs = [
-            token.text for token in doc
-            if token.pos_ == "VERB"
-            and token.text.lower() not in self.config.STOP_WORDS
-            and len(token.text) > 3
+            token_text for token_text, token_lower, token_pos in tokens
+            if token_pos == "VERB"
+            and token_lower not in self.config.STOP_WORDS
         ]
         
         # Identifiants uniques pour le tweet
@@ -84,7 +282,7 @@ class TweetAnalyzer:
         tweet_identity = " ".join(unique_identifiers[:5])  # Limité aux 5 premiers identifiants
         
         # Détection des thèmes potentiels
-        detected_themes = self.detect_themes(text)
+        detected_themes = self.detect_themes(tokenized)
 
         # Prioritize hashtags, $symbols, and proper nouns
         prioritized_identifiers = []
@@ -124,29 +322,18 @@ class TweetAnalyzer:
         
         return analysis
     
-    def detect_themes(self, text: str) -> Dict[str, List[str]]:
+    def detect_themes(self, text: Union[str, TokenizedText]) -> Dict[str, List[str]]:
         """
         Détecte les thèmes potentiels dans le texte du tweet
         
         Args:
-            text: Texte du tweet
+            text: Texte du tweet (ou TokenizedText déjà construit)
             
         Returns:
             Dictionnaire des thèmes détectés avec les termes correspondants
         """
-        text_lower = text.lower()
-        detected_themes = {}
-        
-        for theme, keywords in self.config.TRIGGER_THEMES.items():
-            matches = []
-            for keyword in keywords:
-                if keyword.lower() in text_lower:
-                    matches.append(keyword)
-            
-            if matches:
-                detected_themes[theme] = matches
-                
-        return detected_themes
+        # Un seul passage de l'automate d'expressions partagé (frontières de mots)
+        return detect_trigger_themes(text)
     
     def is_tweet_eligible(self, analysis: Dict[str, Any]) -> bool:
         """
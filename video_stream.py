@@ -0,0 +1,273 @@
+# video_stream.py
+import io
+import re
+import sys
+import math
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import requests
+
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+
+class VideoTooLargeError(IOError):
+    """Le décodage demande plus d'octets que la limite de téléchargement"""
+
+
+class RangedHttpStream(io.BufferedIOBase):
+    """
+    Fichier distant lu à la demande par requêtes HTTP Range, en blocs de block_size octets
+
+    Seuls les blocs lus par le décodeur sont téléchargés (en-tête du conteneur, index
+    'moov' en fin de fichier le cas échéant, premières images), au plus max_bytes au
+    total. Si le serveur ignore les requêtes Range, le fichier est lu séquentiellement
+    depuis le début, toujours dans la limite de max_bytes.
+
+    Chaque instance a sa propre session HTTP et ses propres blocs : des extractions
+    simultanées ne partagent rien.
+
+    Le décodeur (FFmpeg, via cv2.VideoCapture) appelle read et seek depuis du code
+    natif, où une exception Python arrête le processus : les erreurs (limite atteinte,
+    erreur HTTP) sont donc conservées dans `error` et read retourne b"" (fin de fichier).
+    """
+
+    def __init__(self, url: str, max_bytes: int, block_size: int = 256 * 1024, timeout: float = 10):
+        super().__init__()
+        self.logger = logging.getLogger(__name__)
+        self.url = url
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self.timeout = timeout
+        self.size: Optional[int] = None
+        self.bytes_fetched = 0
+        self.requests = 0
+        self.position = 0
+        self.error: Optional[Exception] = None
+        self._blocks: Dict[int, bytes] = {}
+        self._session = requests.Session()
+        # Réponse complète (serveur sans Range), lue au fur et à mesure
+        self._response: Optional[requests.Response] = None
+        # Taille du fichier, nécessaire à seek(..., SEEK_END). En cas d'échec, le
+        # constructeur lève l'exception : la session est fermée ici, avant tout `with`
+        try:
+            self._block(0)
+        except BaseException:
+            self.close()
+            raise
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            if self.size is None:
+                return -1
+            offset += self.size
+        self.position = max(0, offset)
+        return self.position
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        end = sys.maxsize if size is None or size < 0 else self.position + size
+        if self.size is not None:
+            end = min(end, self.size)
+        chunks = []
+        while self.position < end and self.error is None:
+            index, offset = divmod(self.position, self.block_size)
+            try:
+                block = self._block(index)
+            except (VideoTooLargeError, requests.RequestException) as e:
+                self.error = e
+                break
+            if offset >= len(block):
+                break
+            chunk = block[offset:offset + end - self.position]
+            chunks.append(chunk)
+            self.position += len(chunk)
+        return b"".join(chunks)
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def _block(self, index: int) -> bytes:
+        """Bloc numéro index (téléchargé au premier accès, vide au-delà de la fin du fichier)"""
+        block = self._blocks.get(index)
+        if block is not None:
+            return block
+        start = index * self.block_size
+        if self.size is not None and start >= self.size:
+            return b""
+        if self._response is not None:
+            return self._sequential_block(index)
+
+        end = start + self.block_size - 1
+        if self.size is not None:
+            end = min(end, self.size - 1)
+        self._reserve(end - start + 1)
+        response = self._session.get(self.url, headers={"Range": f"bytes={start}-{end}"},
+                                     stream=True, timeout=self.timeout)
+        self.requests += 1
+        response.raise_for_status()
+
+        if response.status_code != 206:
+            # Range ignoré : le fichier arrive en entier, depuis le début
+            length = response.headers.get("Content-Length", "")
+            self.size = int(length) if length.isdigit() else None
+            self._response = response
+            return self._sequential_block(index)
+
+        match = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+        if match and match.group(3) != "*":
+            self.size = int(match.group(3))
+        # Au plus la longueur réservée, même si le serveur ignore la fin de la plage
+        # demandée (au-delà, la connexion est abandonnée après un fragment de trop)
+        length = end - start + 1
+        block = bytearray()
+        with response:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                block += chunk
+                if len(block) > length:
+                    break
+        block = bytes(block[:length])
+        self.bytes_fetched += len(block)
+        self._blocks[index] = block
+        return block
+
+    def _sequential_block(self, index: int) -> bytes:
+        """Bloc d'une réponse sans Range : tous les blocs qui le précèdent sont lus d'abord"""
+        while index not in self._blocks and self._response is not None:
+            self._reserve(self.block_size if self.size is None
+                          else min(self.block_size, self.size - len(self._blocks) * self.block_size))
+            block = bytearray()
+            while len(block) < self.block_size:
+                chunk = self._response.raw.read(self.block_size - len(block), decode_content=True)
+                if not chunk:
+                    break
+                block += chunk
+            self.bytes_fetched += len(block)
+            self._blocks[len(self._blocks)] = bytes(block)
+            if len(block) < self.block_size:
+                # Fin du fichier
+                self.size = (len(self._blocks) - 1) * self.block_size + len(block)
+                self._response.close()
+                self._response = None
+        return self._blocks.get(index, b"")
+
+    def _reserve(self, length: int) -> None:
+        """Vérifie qu'un téléchargement de length octets reste dans la limite"""
+        if self.bytes_fetched + length > self.max_bytes:
+            raise VideoTooLargeError(f"Plus de {self.max_bytes} octets nécessaires pour décoder {self.url}")
+
+    def close(self) -> None:
+        if not self.closed:
+            if self._response is not None:
+                self._response.close()
+            self._session.close()
+        super().close()
+
+
+def read_first_frame(stream: io.BufferedIOBase) -> Optional[np.ndarray]:
+    """
+    Première image d'une vidéo lue depuis un flux (décodage FFmpeg en mémoire)
+
+    Returns:
+        Image BGR, ou None si le flux n'est pas une vidéo décodable
+    """
+    capture = cv2.VideoCapture(stream, cv2.CAP_FFMPEG, [])
+    try:
+        if not capture.isOpened():
+            return None
+        ok, frame = capture.read()
+        return frame if ok else None
+    finally:
+        capture.release()
+
+
+def _scene_histogram(frame: np.ndarray) -> np.ndarray:
+    """Histogramme teinte/saturation d'une vignette de la frame (insensible aux mouvements de caméra)"""
+    small = cv2.cvtColor(cv2.resize(frame, (64, 36), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2HSV)
+    histogram = cv2.calcHist([small], [0, 1], None, [16, 8], [0, 180, 0, 256])
+    return cv2.normalize(histogram, histogram)
+
+
+def sample_keyframes(stream: io.BufferedIOBase, max_frames: int, candidates: int = 12,
+                     threshold: float = 0.3) -> List[Tuple[float, np.ndarray]]:
+    """
+    Frames représentatives d'une vidéo, une par changement de scène
+
+    `candidates` instants répartis sur la durée sont lus par positionnement (seuls les
+    passages correspondants sont téléchargés par RangedHttpStream) ; une frame est
+    retenue si son histogramme s'écarte de celui de la dernière frame retenue d'au
+    moins `threshold` (distance de Bhattacharyya, de 0 à 1). La première frame est
+    toujours retenue ; au-delà de max_frames, les changements les plus marqués sont conservés.
+
+    Returns:
+        Liste de (instant en secondes, image BGR), dans l'ordre de la vidéo
+    """
+    capture = cv2.VideoCapture(stream, cv2.CAP_FFMPEG, [])
+    try:
+        if not capture.isOpened():
+            return []
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+        positions = sorted({int(index * frame_count / candidates) for index in range(candidates)}) \
+            if frame_count > 0 else [0]
+
+        kept: List[Tuple[float, float, np.ndarray]] = []
+        last_histogram = None
+        for position in positions:
+            if position and not capture.set(cv2.CAP_PROP_POS_FRAMES, position):
+                break
+            ok, frame = capture.read()
+            if not ok:
+                # Fin du flux ou limite de téléchargement atteinte : frames déjà retenues
+                break
+            histogram = _scene_histogram(frame)
+            change = 1.0 if last_histogram is None else \
+                cv2.compareHist(last_histogram, histogram, cv2.HISTCMP_BHATTACHARYYA)
+            if change >= threshold:
+                kept.append((change, position / fps, frame))
+                last_histogram = histogram
+    finally:
+        capture.release()
+
+    if len(kept) > max_frames:
+        # La première frame (changement 1.0) reste, puis les changements les plus marqués
+        kept = sorted(sorted(kept, key=lambda item: -item[0])[:max_frames], key=lambda item: item[1])
+    return [(timestamp, frame) for _, timestamp, frame in kept]
+
+
+def contact_sheet(frames: List[Tuple[float, np.ndarray]], tile_width: int = 512) -> np.ndarray:
+    """
+    Planche contact : frames en grille (lignes de ceil(sqrt(n)) frames), numérotées avec leur instant
+
+    Args:
+        frames: Liste de (instant en secondes, image BGR), voir sample_keyframes
+        tile_width: Largeur de chaque frame dans la planche (hauteur proportionnelle)
+    """
+    columns = math.ceil(math.sqrt(len(frames)))
+    rows = math.ceil(len(frames) / columns)
+    height, width = frames[0][1].shape[:2]
+    tile_height = max(1, round(height * tile_width / width))
+    sheet = np.zeros((rows * tile_height, columns * tile_width, 3), np.uint8)
+    for index, (timestamp, frame) in enumerate(frames):
+        tile = cv2.resize(frame, (tile_width, tile_height), interpolation=cv2.INTER_AREA)
+        label = f"{index + 1}  {int(timestamp) // 60}:{int(timestamp) % 60:02d}"
+        (text_width, text_height), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+        cv2.rectangle(tile, (0, 0), (text_width + 12, text_height + 14), (0, 0, 0), -1)
+        cv2.putText(tile, label, (6, text_height + 7), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        row, column = divmod(index, columns)
+        sheet[row * tile_height:(row + 1) * tile_height, column * tile_width:(column + 1) * tile_width] = tile
+    return sheet
@@ -0,0 +1,253 @@
+# vision_cache.py
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Paramètres de pbs.twimg.com qui ne désignent qu'une variante du même média
+_TWITTER_MEDIA_HOSTS = ("pbs.twimg.com",)
+_TWITTER_SIZE_SUFFIXES = (":thumb", ":small", ":medium", ":large", ":orig")
+
+
+def normalize_media_url(url: str) -> str:
+    """
+    URL canonique d'un média
+
+    Schéma et hôte en minuscules, fragment supprimé, paramètres triés. Pour les
+    médias Twitter, les variantes d'un même fichier sont confondues :
+    '…/media/ID?format=jpg&name=small', '…/media/ID.jpg:large' et '…/media/ID.jpg'
+    donnent toutes '…/media/ID.jpg'.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = parts.netloc.lower()
+    path = parts.path
+    query = parse_qsl(parts.query, keep_blank_values=True)
+
+    if host in _TWITTER_MEDIA_HOSTS:
+        scheme = "https"
+        # Taille demandée ('name=small', ou suffixe ':large' des anciennes URLs)
+        query = [(name, value) for name, value in query if name != "name"]
+        for suffix in _TWITTER_SIZE_SUFFIXES:
+            if path.endswith(suffix):
+                path = path[:-len(suffix)]
+                break
+        # Format en paramètre ('format=jpg') ou en extension ('.jpg')
+        image_format = dict(query).get("format")
+        query = [(name, value) for name, value in query if name != "format"]
+        if image_format and "." not in path.rsplit("/", 1)[-1]:
+            path = f"{path}.{image_format.lower()}"
+
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ""))
+
+
+class VisionCache:
+    """
+    Cache persistant (SQLite) des analyses d'images OpenAI Vision
+
+    Une analyse est enregistrée sous deux clés : l'URL normalisée du média (voir
+    normalize_media_url) et l'empreinte de son contenu, qui retrouve la même image
+    republiée sous une autre URL. Les clés comprennent la version de l'analyse
+    (modèle et prompt) : un changement de l'un ou de l'autre ignore les anciennes entrées.
+
+    Le hash perceptuel de chaque image analysée est aussi enregistré (image_hashes),
+    pour retrouver une version recadrée ou recompressée d'une image déjà analysée
+    (voir image_hash.HammingIndex).
+
+    Les entrées expirent après ttl secondes ; au-delà de max_entries, les moins
+    récemment lues sont supprimées. Comme NlpCache, utilisable depuis plusieurs
+    threads et après un fork.
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, max_entries: int = 10000):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.url_hits = 0
+        self.content_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Une connexion SQLite ne doit pas être partagée entre processus après un fork
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS analyses (key BLOB PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS analyses_accessed ON analyses (accessed_at)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS image_hashes (id INTEGER PRIMARY KEY, version TEXT NOT NULL, "
+                "hash INTEGER NOT NULL, key BLOB NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS image_hashes_version ON image_hashes (version, id)")
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def url_key(version: str, url: str) -> bytes:
+        """Clé d'une URL de média (normalisée ici) pour une version de l'analyse"""
+        return VisionCache._key(version, b"url", normalize_media_url(url).encode("utf-8", "surrogatepass"))
+
+    @staticmethod
+    def content_key(version: str, content: bytes) -> bytes:
+        """Clé du contenu d'un média pour une version de l'analyse"""
+        return VisionCache._key(version, b"content", hashlib.sha256(content).digest())
+
+    @staticmethod
+    def _key(version: str, namespace: bytes, value: bytes) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(version.encode())
+        digest.update(namespace)
+        digest.update(b"\0")
+        digest.update(value)
+        return digest.digest()
+
+    def get(self, key: bytes, kind: str = "url") -> Optional[Dict[str, Any]]:
+        """
+        Analyse enregistrée pour une clé, ou None (absente ou expirée)
+
+        Args:
+            key: Clé (url_key ou content_key)
+            kind: "url", "content" ou "similar" (image proche), pour les statistiques ;
+                  les échecs sont comptés par record_miss, après la dernière recherche
+        """
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute("SELECT value, created_at FROM analyses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] <= self.ttl:
+                try:
+                    with connection:
+                        connection.execute("UPDATE analyses SET accessed_at = ? WHERE key = ?", (now, key))
+                except sqlite3.Error:
+                    pass
+                if kind == "url":
+                    self.url_hits += 1
+                elif kind == "similar":
+                    self.similar_hits += 1
+                else:
+                    self.content_hits += 1
+                return json.loads(row[0])
+            return None
+
+    def record_miss(self) -> None:
+        """Compte un échec (aucune analyse réutilisable : l'API sera appelée)"""
+        with self._lock:
+            self.misses += 1
+
+    def put(self, analysis: Dict[str, Any], *keys: Optional[bytes]) -> None:
+        """Enregistre une analyse sous chacune des clés (None ignorées), puis applique l'éviction"""
+        value = json.dumps(analysis, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        rows = [(key, value, now, now) for key in keys if key is not None]
+        if not rows:
+            return
+        with self._lock:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO analyses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                        rows)
+                    self._evict(connection, now)
+            except sqlite3.Error as e:
+                # Le cache n'est qu'une optimisation : l'analyse continue sans lui
+                self.logger.warning(f"Écriture impossible dans le cache Vision {self.path}: {e}")
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        """Supprime les entrées expirées, puis les moins récemment lues au-delà de max_entries"""
+        deleted = connection.execute("DELETE FROM analyses WHERE created_at < ?", (now - self.ttl,)).rowcount
+        size = connection.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        if size > self.max_entries:
+            deleted += connection.execute(
+                "DELETE FROM analyses WHERE key IN (SELECT key FROM analyses ORDER BY accessed_at LIMIT ?)",
+                (size - self.max_entries,)).rowcount
+        if deleted:
+            connection.execute("DELETE FROM image_hashes WHERE key NOT IN (SELECT key FROM analyses)")
+
+    def add_image_hash(self, version: str, image_hash: int, key: bytes) -> Optional[int]:
+        """
+        Enregistre le hash perceptuel d'une image analysée
+
+        Args:
+            version: Version de l'analyse
+            image_hash: Hash sur 64 bits (voir image_hash.dhash)
+            key: Clé de l'analyse de l'image (content_key)
+
+        Returns:
+            Identifiant du hash, ou None en cas d'échec
+        """
+        with self._lock:
+            connection = self._connect()
+            try:
+                with connection:
+                    # SQLite stocke des entiers signés sur 64 bits
+                    cursor = connection.execute(
+                        "INSERT INTO image_hashes (version, hash, key) VALUES (?, ?, ?)",
+                        (version, image_hash - (1 << 64) if image_hash >= 1 << 63 else image_hash, key))
+                return cursor.lastrowid
+            except sqlite3.Error as e:
+                self.logger.warning(f"Écriture impossible dans le cache Vision {self.path}: {e}")
+                return None
+
+    def image_hashes(self, version: str, after: int = 0) -> List[Tuple[int, int]]:
+        """Hashes perceptuels enregistrés pour une version, d'identifiant > after : liste de (identifiant, hash)"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id, hash FROM image_hashes WHERE version = ? AND id > ? ORDER BY id", (version, after))
+            return [(item_id, image_hash & 0xFFFFFFFFFFFFFFFF) for item_id, image_hash in rows]
+
+    def image_hash_key(self, item_id: int) -> Optional[bytes]:
+        """Clé de l'analyse associée à un hash perceptuel (None si l'analyse a été supprimée)"""
+        with self._lock:
+            row = self._connect().execute("SELECT key FROM image_hashes WHERE id = ?", (item_id,)).fetchone()
+        return bytes(row[0]) if row is not None else None
+
+    def clear(self) -> None:
+        """Vide le cache et remet les statistiques à zéro"""
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM analyses")
+                connection.execute("DELETE FROM image_hashes")
+            self.url_hits = 0
+            self.content_hits = 0
+            self.similar_hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistiques du cache (entrées, succès par URL, contenu et image proche, échecs, taux de succès)"""
+        with self._lock:
+            size = self._connect().execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        hits = self.url_hits + self.content_hits + self.similar_hits
+        lookups = hits + self.misses
+        return {
+            "path": self.path,
+            "size": size,
+            "url_hits": self.url_hits,
+            "content_hits": self.content_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        """Ferme la connexion (rouverte automatiquement au prochain accès)"""
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None